@@ -3,35 +3,33 @@ Sincronização Santander: autenticação mTLS, extrato PIX e match com clientes
 
 - Usa os certificados em backend/certs/ (privada.key + .crt do Santander).
 - Busca o extrato de PIX via API Balance and Statement.
-- Para cada entrada PIX, verifica se existe cliente correspondente (valor + nome).
-- Se houver match, insere na tabela transacoes (evitando duplicata por hash_bancario).
+- Para cada entrada PIX, verifica se existe cliente correspondente (valor + nome),
+  via índice PixMatcher (app/api/pix_matcher.py).
+- Se houver match, grava na tabela transacoes em lotes (upsert; a constraint
+  unique(cliente_id, data_pagamento) evita duplicatas).
 """
-from datetime import date, datetime, timedelta
-from typing import Any
+from datetime import date, datetime
+from typing import Any, AsyncIterator
 
-# Autenticação mTLS: certificados da pasta certs/
-def _obter_cliente_mtls_santander():
-    """
-    Retorna cliente HTTP com autenticação mTLS usando privada.key e certificado .crt
-    da pasta backend/certs/. Levanta FileNotFoundError se os arquivos não existirem.
-    """
-    import sys
-    from pathlib import Path
-    backend_dir = Path(__file__).resolve().parent.parent.parent
-    if str(backend_dir) not in sys.path:
-        sys.path.insert(0, str(backend_dir))
-    from conexao_banco import obter_cliente_santander_async
-    return obter_cliente_santander_async()  # valida certs ao montar o client
+from app.api.pix_matcher import PixMatcher, normalizar_nome
+from app.cache import invalidar_cache_clientes
+from app.api.sync_cursor import gravar_cursor, inicio_janela, ler_cursor
+
+# Linhas por POST no insert em lote de transacoes
+_TAMANHO_LOTE = 500
+# Chave do cursor em sync_cursores (uma conta Santander por instalação)
+_CONTA_CURSOR = "santander"
 
 
-async def _buscar_extrato_pix(dias: int = 30) -> list[dict[str, Any]]:
+async def _iterar_extrato_pix(dias: int = 30, desde: date | None = None) -> AsyncIterator[dict[str, Any]]:
     """
-    Busca extrato no Santander via mTLS (certificados em certs/).
-    Retorna apenas entradas PIX normalizadas: descricao, valor, data, hash_bancario.
+    Extrato no Santander via mTLS (certificados em certs/), em streaming conforme as páginas chegam.
+    Devolve apenas entradas PIX normalizadas: descricao, valor, data, hash_bancario.
     """
-    from app.santander_api import buscar_extrato
-    raw = await buscar_extrato(dias=dias)
-    return [t for t in raw if t.get("eh_pix") and t.get("valor") and float(t["valor"]) > 0]
+    from app.santander_api import iterar_extrato
+    async for t in iterar_extrato(dias=dias, desde=desde):
+        if t.get("eh_pix") and t.get("valor") and float(t["valor"]) > 0:
+            yield t
 
 
 def _parse_data_pagamento(s: str | None, fallback: date) -> date:
@@ -56,12 +54,7 @@ def _parse_data_pagamento(s: str | None, fallback: date) -> date:
 
 def _normalizar_nome(s: str) -> str:
     """Minúsculo, sem acentos, para match."""
-    if not s:
-        return ""
-    s = s.lower().strip()
-    for a, b in [("á", "a"), ("é", "e"), ("í", "i"), ("ó", "o"), ("ú", "u"), ("ã", "a"), ("õ", "o"), ("ç", "c")]:
-        s = s.replace(a, b)
-    return s
+    return normalizar_nome(s)
 
 
 def _cliente_corresponde_entrada_pix(
@@ -69,7 +62,7 @@ def _cliente_corresponde_entrada_pix(
     valor_pix: float,
     descricao_pix: str,
 ) -> bool:
-    """True se valor e nome do PIX batem com o cliente."""
+    """True se valor e nome do PIX batem com o cliente (regra de referência do PixMatcher)."""
     valor_cli = round(float(cliente.get("valor_mensalidade") or 0), 2)
     if round(valor_pix, 2) != valor_cli:
         return False
@@ -79,78 +72,108 @@ def _cliente_corresponde_entrada_pix(
     return nome_cli in _normalizar_nome(descricao_pix)
 
 
-async def sincronizar_santander_com_supabase(dias: int = 30) -> dict[str, Any]:
+async def _gravar_lote(supabase, linhas: list[dict[str, Any]]) -> int:
+    """
+    Grava um lote de transações num único POST. A constraint unique(cliente_id, data_pagamento)
+    descarta o que já existe (ON CONFLICT DO NOTHING). Retorna quantas linhas foram criadas.
+    """
+    if not linhas:
+        return 0
+    r = await (
+        supabase.table("transacoes")
+        .upsert(linhas, on_conflict="cliente_id,data_pagamento", ignore_duplicates=True)
+        .execute()
+    )
+    criadas = len(r.data or [])
+    if criadas:
+        invalidar_cache_clientes()
+    return criadas
+
+
+async def sincronizar_santander_com_supabase(dias: int = 30, completo: bool = False) -> dict[str, Any]:
     """
     1. Autentica no Santander via mTLS (certificados em backend/certs/).
-    2. Busca o extrato de PIX.
+    2. Busca o extrato de PIX (blocos de datas em paralelo, paginado, em streaming), só a
+       partir do cursor salvo (sync_cursores) menos a sobreposição; completo=True ignora o
+       cursor e busca os últimos `dias` dias.
     3. Para cada entrada PIX, verifica se existe cliente correspondente no Supabase.
-    4. Se houver match, insere na tabela transacoes (sem duplicar por hash_bancario).
+    4. Acumula os matches e grava em lotes de _TAMANHO_LOTE (upsert ignorando duplicatas
+       pela constraint unique(cliente_id, data_pagamento)).
+    5. Terminado sem erro, avança o cursor.
 
-    Retorna: { "message", "transacoes_extrato", "matches_criados" }.
+    Retorna: { "message", "desde", "incremental", "transacoes_extrato", "matches_criados" }.
     Levanta FileNotFoundError se os certificados não existirem.
     """
-    from app.db import get_supabase
+    from app.db import get_supabase_async
+    from conexao_banco import cliente_santander
 
-    # Garante que os certificados existem antes de chamar a API
-    _obter_cliente_mtls_santander()
+    # Garante que os certificados existem antes de chamar a API (cliente compartilhado, não recria)
+    await cliente_santander.obter()
 
-    transacoes_pix = await _buscar_extrato_pix(dias=dias)
-    supabase = get_supabase()
+    supabase = get_supabase_async()
     hoje = date.today()
-    inicio_periodo = hoje - timedelta(days=90)
-
-    # Transações já existentes (cliente_id + data) e hashes já usados
-    r_trans = (
-        supabase.table("transacoes")
-        .select("cliente_id, data_pagamento, hash_bancario")
-        .gte("data_pagamento", str(inicio_periodo))
-        .lte("data_pagamento", str(hoje))
-        .execute()
-    )
-    trans_list = r_trans.data or []
-    existentes = {(str(t.get("cliente_id")), str(t.get("data_pagamento"))) for t in trans_list}
-    hashes_ja_usados = {t.get("hash_bancario") for t in trans_list if t.get("hash_bancario")}
+    cursor = None if completo else await ler_cursor(_CONTA_CURSOR)
+    desde = inicio_janela(cursor, dias, hoje)
+    hash_cursor = (cursor or {}).get("ultimo_hash")
 
     # Clientes ativos para match
-    r_clientes = (
+    r_clientes = await (
         supabase.table("clientes")
         .select("id, nome, valor_mensalidade, status_ativo")
         .eq("status_ativo", True)
         .execute()
     )
     clientes = list(r_clientes.data or [])
+    matcher = PixMatcher(clientes)
 
+    # Dedupe dentro deste extrato; o que já está no banco é resolvido pela constraint única
+    vistos: set[tuple[str, str]] = set()
+    hashes_vistos: set[str] = set()
+    lote: list[dict[str, Any]] = []
     match_count = 0
-    for entrada in transacoes_pix:
+    total_extrato = 0
+    ultima: tuple[date, str | None] | None = None
+    # Match começa com a primeira página, sem esperar o extrato inteiro
+    async for entrada in _iterar_extrato_pix(desde=desde):
+        total_extrato += 1
         valor = round(float(entrada["valor"]), 2)
         descricao = (entrada.get("descricao") or "")
         hash_bancario = entrada.get("hash_bancario")
-        if hash_bancario and hash_bancario in hashes_ja_usados:
-            continue
         data_pag = _parse_data_pagamento(entrada.get("data"), hoje)
+        if ultima is None or data_pag >= ultima[0]:
+            ultima = (data_pag, hash_bancario)
+        if hash_bancario and (hash_bancario in hashes_vistos or hash_bancario == hash_cursor):
+            continue
 
-        for cliente in clientes:
+        for cliente in matcher.candidatos(valor, descricao):
             cid = str(cliente["id"])
-            if (cid, str(data_pag)) in existentes:
-                continue
-            if not _cliente_corresponde_entrada_pix(cliente, valor, descricao):
+            if (cid, str(data_pag)) in vistos:
                 continue
-            # Match: inserir na tabela transacoes
-            supabase.table("transacoes").insert({
+            lote.append({
                 "cliente_id": cid,
                 "valor": valor,
                 "data_pagamento": str(data_pag),
                 "status_nota_fiscal": "pendente",
                 "hash_bancario": hash_bancario or None,
-            }).execute()
-            existentes.add((cid, str(data_pag)))
+            })
+            vistos.add((cid, str(data_pag)))
             if hash_bancario:
-                hashes_ja_usados.add(hash_bancario)
-            match_count += 1
+                hashes_vistos.add(hash_bancario)
             break
 
+        if len(lote) >= _TAMANHO_LOTE:
+            match_count += await _gravar_lote(supabase, lote)
+            lote = []
+
+    match_count += await _gravar_lote(supabase, lote)
+
+    # Extrato lido até hoje; a sobreposição da próxima busca cobre lançamentos retroativos
+    await gravar_cursor(_CONTA_CURSOR, hoje, ultima[1] if ultima else hash_cursor)
+
     return {
         "message": "Sincronização concluída",
-        "transacoes_extrato": len(transacoes_pix),
+        "desde": desde.isoformat(),
+        "incremental": cursor is not None,
+        "transacoes_extrato": total_extrato,
         "matches_criados": match_count,
     }
@@ -0,0 +1,301 @@
+"""
+Busca de clientes por nome ou documento (baixa manual do webhook).
+
+Índice em memória carregado no startup (em segundo plano) e atualizado a cada escrita
+em clientes feita pela API; recarregado por completo a cada CLIENTES_INDICE_TTL_SECONDS
+para pegar alterações feitas fora dela.
+- Documento: comparação só pelos dígitos (123.456.789-09 == 12345678909).
+- Nome: normalizado (minúsculo, sem acentos); trigramas para substring e tokens
+  ordenados (bisect) para prefixo de palavra, sem varrer todos os clientes.
+- Ranking: documento/nome exato < nome começa com < todas as palavras por prefixo < substring.
+Enquanto o índice não está pronto, ou quando ele não acha nada, a busca vai ao banco (eq no documento / ilike no nome,
+com índice pg_trgm da migração 008_clientes_busca.sql).
+"""
+import asyncio
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+from typing import Any
+
+from app.api.pix_matcher import normalizar_nome
+from app.config import settings
+from app.db import get_supabase_async
+
+logger = logging.getLogger(__name__)
+
+_COLUNAS = "id,nome,valor_mensalidade,documento_cpf_cnpj"
+_PAGINA = 1000
+_RE_DOCUMENTO = re.compile(r"^[\d.\-/\s]+$")
+
+EXATO, PREFIXO, PALAVRAS, SUBSTRING = range(4)
+
+
+def digitos(s) -> str:
+    return re.sub(r"\D", "", str(s or ""))
+
+
+def _trigramas(s: str) -> set[str]:
+    return {s[i: i + 3] for i in range(len(s) - 2)}
+
+
+def _palavras_por_prefixo(tokens: list[str], nome_norm: str) -> bool:
+    palavras = nome_norm.split()
+    return bool(tokens) and all(any(p.startswith(t) for p in palavras) for t in tokens)
+
+
+def _rank(consulta_norm: str, tokens: list[str], nome_norm: str) -> int | None:
+    """Posição no ranking para o nome já normalizado, ou None se não corresponde."""
+    if nome_norm == consulta_norm:
+        return EXATO
+    if nome_norm.startswith(consulta_norm):
+        return PREFIXO
+    if _palavras_por_prefixo(tokens, nome_norm):
+        return PALAVRAS
+    if consulta_norm in nome_norm:
+        return SUBSTRING
+    return None
+
+
+class IndiceClientes:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clientes: dict[str, dict[str, Any]] = {}
+        self._nomes: dict[str, str] = {}
+        self._por_nome: dict[str, set[str]] = {}
+        self._nomes_ordenados: list[tuple[str, str]] = []
+        self._por_doc: dict[str, set[str]] = {}
+        self._por_trigrama: dict[str, set[str]] = {}
+        self._por_token: dict[str, set[str]] = {}
+        self._tokens: list[str] = []
+        self._carregado_em = 0.0
+        self._carregando: asyncio.Task | None = None
+        self.buscas = 0
+        self.buscas_no_banco = 0
+
+    @property
+    def pronto(self) -> bool:
+        return self._carregado_em > 0
+
+    # --- manutenção do índice ---
+
+    def _adicionar(self, cliente: dict[str, Any], ordenar: bool = True) -> None:
+        cid = str(cliente["id"])
+        nome = normalizar_nome(cliente.get("nome") or "")
+        self._clientes[cid] = {k: cliente.get(k) for k in ("id", "nome", "valor_mensalidade", "documento_cpf_cnpj")}
+        self._nomes[cid] = nome
+        self._por_nome.setdefault(nome, set()).add(cid)
+        if ordenar:
+            bisect.insort(self._nomes_ordenados, (nome, cid))
+        else:
+            self._nomes_ordenados.append((nome, cid))
+        doc = digitos(cliente.get("documento_cpf_cnpj"))
+        if doc:
+            self._por_doc.setdefault(doc, set()).add(cid)
+        for tri in _trigramas(nome):
+            self._por_trigrama.setdefault(tri, set()).add(cid)
+        for token in set(nome.split()):
+            ids = self._por_token.get(token)
+            if ids is None:
+                ids = self._por_token[token] = set()
+                if ordenar:
+                    bisect.insort(self._tokens, token)
+                else:
+                    self._tokens.append(token)
+            ids.add(cid)
+
+    def _retirar(self, cid: str) -> None:
+        cliente = self._clientes.pop(cid, None)
+        nome = self._nomes.pop(cid, "")
+        if cliente is None:
+            return
+        self._por_nome.get(nome, set()).discard(cid)
+        i = bisect.bisect_left(self._nomes_ordenados, (nome, cid))
+        if i < len(self._nomes_ordenados) and self._nomes_ordenados[i] == (nome, cid):
+            del self._nomes_ordenados[i]
+        self._por_doc.get(digitos(cliente.get("documento_cpf_cnpj")), set()).discard(cid)
+        for tri in _trigramas(nome):
+            self._por_trigrama.get(tri, set()).discard(cid)
+        for token in set(nome.split()):
+            # O token fica na lista ordenada (com conjunto vazio) até a próxima recarga
+            self._por_token.get(token, set()).discard(cid)
+
+    def atualizar(self, cliente: dict[str, Any] | None) -> None:
+        """Reflete um cliente criado/alterado (linha devolvida pelo Supabase)."""
+        if not cliente or not cliente.get("id") or not self.pronto:
+            return
+        with self._lock:
+            self._retirar(str(cliente["id"]))
+            self._adicionar(cliente)
+
+    def remover(self, cliente_id) -> None:
+        with self._lock:
+            self._retirar(str(cliente_id))
+
+    async def carregar(self) -> None:
+        """Lê todos os clientes (keyset por id) e troca o índice de uma vez."""
+        supabase = get_supabase_async()
+        linhas: list[dict] = []
+        ultimo_id = None
+        while True:
+            q = supabase.table("clientes").select(_COLUNAS).order("id").limit(_PAGINA)
+            if ultimo_id is not None:
+                q = q.gt("id", ultimo_id)
+            pagina = (await q.execute()).data or []
+            linhas.extend(pagina)
+            if len(pagina) < _PAGINA:
+                break
+            ultimo_id = pagina[-1]["id"]
+        # Montagem (CPU) fora do event loop: segundos em bases grandes
+        novo = await asyncio.to_thread(IndiceClientes._montar, linhas)
+        with self._lock:
+            for attr in ("_clientes", "_nomes", "_por_nome", "_nomes_ordenados", "_por_doc", "_por_trigrama", "_por_token", "_tokens"):
+                setattr(self, attr, getattr(novo, attr))
+            self._carregado_em = time.monotonic()
+        logger.info("Índice de clientes carregado: %d cliente(s)", len(linhas))
+
+    @staticmethod
+    def _montar(linhas: list[dict]) -> "IndiceClientes":
+        novo = IndiceClientes()
+        for c in linhas:
+            novo._adicionar(c, ordenar=False)
+        novo._nomes_ordenados.sort()
+        novo._tokens.sort()
+        return novo
+
+    async def _carregar_com_log(self) -> None:
+        try:
+            await self.carregar()
+        except Exception as e:
+            logger.warning("Índice de clientes: falha ao carregar (%s); buscas vão ao banco", e)
+
+    def aquecer(self) -> None:
+        """Dispara a carga em segundo plano (startup ou índice vencido)."""
+        if self._carregando is None or self._carregando.done():
+            self._carregando = asyncio.create_task(self._carregar_com_log())
+
+    async def parar(self) -> None:
+        if self._carregando is not None and not self._carregando.done():
+            self._carregando.cancel()
+            await asyncio.gather(self._carregando, return_exceptions=True)
+
+    # --- busca ---
+
+    def _faixa_tokens(self, prefixo: str) -> range:
+        """Posições em _tokens dos tokens que começam com prefixo."""
+        return range(bisect.bisect_left(self._tokens, prefixo), bisect.bisect_left(self._tokens, prefixo + "\uffff"))
+
+    def _ids_por_palavras(self, tokens: list[str]) -> set[str]:
+        """Clientes com todas as palavras da consulta como prefixo de alguma palavra do nome."""
+        if not tokens:
+            return set()
+        # Parte do token mais seletivo e confere os demais direto no nome
+        faixas = [(sum(len(self._por_token[self._tokens[i]]) for i in self._faixa_tokens(t)), t) for t in tokens]
+        _, mais_seletivo = min(faixas)
+        ids: set[str] = set()
+        for i in self._faixa_tokens(mais_seletivo):
+            ids |= self._por_token[self._tokens[i]]
+        if len(tokens) == 1:
+            return ids
+        return {cid for cid in ids if _palavras_por_prefixo(tokens, self._nomes[cid])}
+
+    def _ids_por_substring(self, consulta: str) -> set[str]:
+        tris = _trigramas(consulta)
+        if not tris:
+            return set()
+        conjuntos = sorted((self._por_trigrama.get(t, set()) for t in tris), key=len)
+        return {cid for cid in conjuntos[0].intersection(*conjuntos[1:]) if consulta in self._nomes[cid]}
+
+    def _buscar_no_indice(self, consulta: str, limite: int) -> list[tuple[int, dict[str, Any]]]:
+        """Preenche por faixa de rank (melhor primeiro) e para ao atingir o limite."""
+        resultado: list[tuple[int, dict[str, Any]]] = []
+        vistos: set[str] = set()
+
+        def incluir(rank: int, ids) -> None:
+            for cid in ids:
+                if len(resultado) >= limite:
+                    return
+                if cid not in vistos:
+                    vistos.add(cid)
+                    resultado.append((rank, self._clientes[cid]))
+
+        with self._lock:
+            doc = digitos(consulta)
+            if doc and _RE_DOCUMENTO.match(consulta):
+                incluir(EXATO, self._por_doc.get(doc, ()))
+            consulta_norm = normalizar_nome(consulta)
+            tokens = consulta_norm.split()
+            incluir(EXATO, sorted(self._por_nome.get(consulta_norm, ())))
+            i = bisect.bisect_left(self._nomes_ordenados, (consulta_norm, ""))
+            while len(resultado) < limite and i < len(self._nomes_ordenados) and self._nomes_ordenados[i][0].startswith(consulta_norm):
+                incluir(PREFIXO, (self._nomes_ordenados[i][1],))
+                i += 1
+            for rank, buscar_ids in ((PALAVRAS, lambda: self._ids_por_palavras(tokens)), (SUBSTRING, lambda: self._ids_por_substring(consulta_norm))):
+                if len(resultado) >= limite:
+                    break
+                ids = buscar_ids() - vistos
+                incluir(rank, heapq.nsmallest(limite - len(resultado), ids, key=lambda cid: (self._nomes[cid], cid)))
+        return resultado
+
+    async def _buscar_no_banco(self, consulta: str) -> list[tuple[int, dict[str, Any]]]:
+        self.buscas_no_banco += 1
+        supabase = get_supabase_async()
+        doc = digitos(consulta)
+        if doc and _RE_DOCUMENTO.match(consulta):
+            r = await supabase.table("clientes").select(_COLUNAS).in_("documento_cpf_cnpj", {consulta, doc}).execute()
+            if r.data:
+                return [(EXATO, c) for c in r.data]
+        # Curingas do ILIKE vindos do usuário viram literais
+        padrao = re.sub(r"[%_*\\]", " ", consulta).strip()
+        if not padrao:
+            return []
+        r = await supabase.table("clientes").select(_COLUNAS).ilike("nome", f"*{padrao}*").limit(50).execute()
+        consulta_norm = normalizar_nome(consulta)
+        tokens = consulta_norm.split()
+        resultado = []
+        for c in r.data or []:
+            rank = _rank(consulta_norm, tokens, normalizar_nome(c.get("nome") or ""))
+            resultado.append((SUBSTRING if rank is None else rank, c))
+        return resultado
+
+    async def buscar(self, consulta: str, limite: int = 10) -> list[tuple[int, dict[str, Any]]]:
+        """Candidatos (rank, cliente) ordenados do melhor para o pior (rank menor = melhor)."""
+        consulta = (consulta or "").strip()
+        if not consulta:
+            return []
+        self.buscas += 1
+        if self.pronto and time.monotonic() - self._carregado_em > settings.CLIENTES_INDICE_TTL_SECONDS:
+            self.aquecer()  # recarga em segundo plano; responde com o índice atual
+        if self.pronto:
+            resultado = self._buscar_no_indice(consulta, limite)
+            if resultado:
+                return resultado
+            # Sem acerto no índice: o cliente pode ter sido criado em outro worker/réplica ou
+            # direto no Supabase depois da última carga
+        resultado = await self._buscar_no_banco(consulta)
+        resultado.sort(key=lambda rc: (rc[0], normalizar_nome(rc[1].get("nome") or "")))
+        return resultado[:limite]
+
+    async def melhores(self, consulta: str) -> list[dict[str, Any]]:
+        """
+        Candidatos para a baixa: só os exatos (documento ou nome normalizado) quando houver;
+        senão todos. Um único resultado = correspondência sem ambiguidade. Prefixo/palavras/
+        substring nunca desempatam sozinhos ("Maria" com "Maria Silva" e "Ana Maria" é ambíguo).
+        """
+        candidatos = await self.buscar(consulta)
+        exatos = [c for rank, c in candidatos if rank == EXATO]
+        return exatos or [c for _, c in candidatos]
+
+    def stats(self) -> dict:
+        return {
+            "pronto": self.pronto,
+            "clientes": len(self._clientes),
+            "idade_segundos": round(time.monotonic() - self._carregado_em, 1) if self.pronto else None,
+            "buscas": self.buscas,
+            "buscas_no_banco": self.buscas_no_banco,
+        }
+
+
+indice_clientes = IndiceClientes()
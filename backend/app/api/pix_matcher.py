@@ -0,0 +1,107 @@
+"""
+Match de entradas PIX com clientes (valor + nome) em tempo quase linear.
+
+- Clientes agrupados pelo valor da mensalidade em centavos inteiros.
+- Nomes normalizados uma única vez (minúsculo, sem acentos via unicodedata).
+- Para cada grupo de valor, um autômato Aho–Corasick com os nomes: a descrição do PIX
+  é varrida uma vez e devolve todos os clientes cujo nome aparece nela.
+
+Mesma regra de _cliente_corresponde_entrada_pix (bank_sync), sem o loop entradas × clientes.
+"""
+import unicodedata
+from collections import deque
+from typing import Any
+
+
+def normalizar_nome(s: str) -> str:
+    """Minúsculo, sem acentos (qualquer diacrítico Unicode), para match."""
+    if not s:
+        return ""
+    s = s.lower().strip()
+    if s.isascii():
+        return s
+    s = unicodedata.normalize("NFKD", s)
+    return "".join(c for c in s if not unicodedata.combining(c))
+
+
+def valor_em_centavos(valor) -> int:
+    """Valor monetário -> centavos inteiros (mesmo critério de round(valor, 2))."""
+    return round(float(valor or 0) * 100)
+
+
+class _AhoCorasick:
+    """Autômato de busca de múltiplos padrões; buscar() devolve os índices dos padrões encontrados."""
+
+    def __init__(self, padroes: list[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._saida: list[list[int]] = [[]]
+        for i, padrao in enumerate(padroes):
+            estado = 0
+            for ch in padrao:
+                prox = self._goto[estado].get(ch)
+                if prox is None:
+                    prox = len(self._goto)
+                    self._goto[estado][ch] = prox
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._saida.append([])
+                estado = prox
+            self._saida[estado].append(i)
+        self._construir_falhas()
+
+    def _construir_falhas(self) -> None:
+        fila = deque(self._goto[0].values())
+        while fila:
+            estado = fila.popleft()
+            for ch, prox in self._goto[estado].items():
+                fila.append(prox)
+                f = self._fail[estado]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                destino = self._goto[f].get(ch, 0)
+                self._fail[prox] = destino if destino != prox else 0
+                if self._saida[self._fail[prox]]:
+                    self._saida[prox] = self._saida[prox] + self._saida[self._fail[prox]]
+
+    def buscar(self, texto: str) -> set[int]:
+        goto, fail, saida = self._goto, self._fail, self._saida
+        achados: set[int] = set()
+        estado = 0
+        for ch in texto:
+            while estado and ch not in goto[estado]:
+                estado = fail[estado]
+            estado = goto[estado].get(ch, 0)
+            if saida[estado]:
+                achados.update(saida[estado])
+        return achados
+
+
+class PixMatcher:
+    """
+    Índice de clientes para match de PIX. Monte uma vez por sincronização:
+        matcher = PixMatcher(clientes)
+        for cliente in matcher.candidatos(valor, descricao): ...
+    """
+
+    def __init__(self, clientes: list[dict[str, Any]]):
+        self._clientes = clientes
+        por_valor: dict[int, list[tuple[int, str]]] = {}
+        for idx, cliente in enumerate(clientes):
+            nome = normalizar_nome(cliente.get("nome") or "")
+            if not nome:
+                continue
+            por_valor.setdefault(valor_em_centavos(cliente.get("valor_mensalidade")), []).append((idx, nome))
+        self._grupos: dict[int, tuple[_AhoCorasick, list[int]]] = {
+            centavos: (_AhoCorasick([nome for _, nome in itens]), [idx for idx, _ in itens])
+            for centavos, itens in por_valor.items()
+        }
+
+    def candidatos(self, valor_pix: float, descricao_pix: str) -> list[dict[str, Any]]:
+        """Clientes com o mesmo valor cujo nome aparece na descrição, na ordem original da lista."""
+        grupo = self._grupos.get(valor_em_centavos(valor_pix))
+        if grupo is None:
+            return []
+        automato, indices = grupo
+        achados = automato.buscar(normalizar_nome(descricao_pix))
+        return [self._clientes[indices[i]] for i in sorted(achados)]
@@ -0,0 +1,68 @@
+"""
+Cursor da sincronização bancária (tabela sync_cursores, migração 009_sync_cursores.sql).
+
+Guarda, por conta, a última data de extrato já processada e o hash da última transação.
+A próxima sincronização busca só a partir dessa data menos SYNC_OVERLAP_DIAS (lançamentos
+que entram com data retroativa); o que se repete na sobreposição é descartado pela
+constraint única de transacoes. Sem a tabela, a sincronização volta a usar a janela inteira.
+"""
+import logging
+from datetime import date, datetime, timezone, timedelta
+from typing import Any
+
+from app.config import settings
+from app.db import get_supabase_async
+
+logger = logging.getLogger(__name__)
+
+
+async def ler_cursor(conta: str) -> dict[str, Any] | None:
+    """Cursor da conta ({ultima_data, ultimo_hash}) ou None (primeira vez ou tabela ausente)."""
+    try:
+        r = await (
+            get_supabase_async()
+            .table("sync_cursores")
+            .select("ultima_data, ultimo_hash")
+            .eq("conta", conta)
+            .limit(1)
+            .execute()
+        )
+    except Exception as e:
+        logger.warning("Sync: não foi possível ler o cursor de %s (%s); usando a janela completa", conta, e)
+        return None
+    if not r.data:
+        return None
+    linha = r.data[0]
+    try:
+        return {"ultima_data": date.fromisoformat(str(linha["ultima_data"])[:10]), "ultimo_hash": linha.get("ultimo_hash")}
+    except (KeyError, ValueError):
+        return None
+
+
+def inicio_janela(cursor: dict[str, Any] | None, dias: int, hoje: date) -> date:
+    """Data inicial da busca: delta desde o cursor (com sobreposição), nunca antes de hoje - dias."""
+    limite = hoje - timedelta(days=dias)
+    if not cursor:
+        return limite
+    return max(limite, min(hoje, cursor["ultima_data"] - timedelta(days=settings.SYNC_OVERLAP_DIAS)))
+
+
+async def gravar_cursor(conta: str, ultima_data: date, ultimo_hash: str | None) -> None:
+    """Avança o cursor; chamar só depois que a sincronização terminou sem erro."""
+    try:
+        await (
+            get_supabase_async()
+            .table("sync_cursores")
+            .upsert(
+                {
+                    "conta": conta,
+                    "ultima_data": ultima_data.isoformat(),
+                    "ultimo_hash": ultimo_hash,
+                    "atualizado_em": datetime.now(timezone.utc).isoformat(),
+                },
+                on_conflict="conta",
+            )
+            .execute()
+        )
+    except Exception as e:
+        logger.warning("Sync: não foi possível gravar o cursor de %s: %s", conta, e)
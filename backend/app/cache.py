@@ -0,0 +1,123 @@
+"""
+Cache em memória (LRU + TTL) para respostas de leitura da API.
+
+- Limitado a max_itens (descarta o menos usado) e com expiração por TTL.
+- invalidar_cache_clientes() deve ser chamado após qualquer escrita em clientes/transacoes
+  (rotas de clientes, webhook e bank sync).
+- Contadores de hit/miss expostos em GET /api/health/stats.
+- etag_de(): ETag derivado do conteúdo da resposta (hash), igual em qualquer worker/réplica
+  que devolveria os mesmos dados; 304 a If-None-Match sem reenviar o corpo.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from app.config import settings
+
+_AUSENTE = object()
+_caches: list["TTLCache"] = []
+
+
+class TTLCache:
+    def __init__(self, nome: str, max_itens: int, ttl: float):
+        self.nome = nome
+        self._max_itens = max(1, max_itens)
+        self._ttl = ttl
+        self._itens: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Incrementa a cada limpar(): valor calculado antes de uma escrita não é gravado depois dela
+        self._geracao = 0
+        self.hits = 0
+        self.misses = 0
+        self.expirados = 0
+        self.descartados = 0
+        _caches.append(self)
+
+    def get(self, chave, default=None):
+        agora = time.monotonic()
+        with self._lock:
+            item = self._itens.get(chave, _AUSENTE)
+            if item is not _AUSENTE:
+                expira_em, valor = item
+                if expira_em > agora:
+                    self._itens.move_to_end(chave)
+                    self.hits += 1
+                    return valor
+                del self._itens[chave]
+                self.expirados += 1
+            self.misses += 1
+            return default
+
+    def set(self, chave, valor, geracao: int | None = None) -> None:
+        with self._lock:
+            if geracao is not None and geracao != self._geracao:
+                return
+            self._itens[chave] = (time.monotonic() + self._ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self._max_itens:
+                self._itens.popitem(last=False)
+                self.descartados += 1
+
+    def get_or_set(self, chave, calcular: Callable[[], Any]):
+        """Devolve o valor em cache ou calcula, grava e devolve."""
+        valor = self.get(chave, _AUSENTE)
+        if valor is not _AUSENTE:
+            return valor
+        geracao = self._geracao
+        valor = calcular()
+        self.set(chave, valor, geracao)
+        return valor
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+            self._geracao += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "itens": len(self._itens),
+            "max_itens": self._max_itens,
+            "ttl_segundos": self._ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "taxa_hit": round(self.hits / total, 4) if total else 0.0,
+            "expirados": self.expirados,
+            "descartados": self.descartados,
+        }
+
+
+# Respostas de GET /api/clientes e /api/clientes/dashboard
+respostas_clientes = TTLCache("respostas_clientes", settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+
+
+def invalidar_cache_clientes() -> None:
+    """Descarta respostas derivadas de clientes/transacoes (chamar após escrever nessas tabelas)."""
+    respostas_clientes.limpar()
+
+
+def etag_de(*conteudo) -> str:
+    """
+    ETag (fraco) a partir do conteúdo (JSON-serializável) da resposta. Não depende de estado
+    do processo: com vários workers/réplicas, o mesmo dado gera o mesmo ETag e dado novo
+    (escrita em outro worker ou direto no Supabase) gera outro.
+    """
+    bruto = json.dumps(conteudo, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return 'W/"' + hashlib.sha1(bruto.encode()).hexdigest()[:20] + '"'
+
+
+def etag_confere(if_none_match: str | None, etag: str) -> bool:
+    """Comparação fraca (RFC 9110) entre o header If-None-Match e o ETag atual."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    alvo = etag.removeprefix("W/")
+    return any(t.strip().removeprefix("W/") == alvo for t in if_none_match.split(","))
+
+
+def cache_stats() -> dict:
+    return {c.nome: c.stats() for c in _caches}
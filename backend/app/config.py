@@ -9,12 +9,72 @@ class Settings(BaseSettings):
     # Supabase
     SUPABASE_URL: str = ""
     SUPABASE_KEY: str = ""
+    # Pool HTTP keep-alive para o PostgREST (compartilhado por todas as queries)
+    SUPABASE_POOL_MAX_CONNECTIONS: int = 20
+    SUPABASE_POOL_MAX_KEEPALIVE: int = 10
+    SUPABASE_POOL_KEEPALIVE_EXPIRY: float = 30.0
+    SUPABASE_HTTP2: bool = False  # requer o pacote h2 (pip install httpx[http2])
 
     # Santander Sandbox - caminho dos certificados (relativo à pasta backend)
     CERT_DIR: Path = Path(__file__).resolve().parent.parent / "certs"
     CERT_KEY_FILE: str = "privada.key"
     CERT_FILE: str = "santander.crt"  # ou santander.pem - nome do certificado do Santander
     SANTANDER_EXTRATO_URL: str = "https://api.santander.com.br/sandbox/extrato/v1"
+    # Extrato: janela dividida em blocos de N dias buscados em paralelo, com paginação
+    SANTANDER_CHUNK_DIAS: int = 7
+    SANTANDER_MAX_CONCURRENCY: int = 4
+    SANTANDER_PAGE_SIZE: int = 50
+    SANTANDER_MAX_PAGINAS: int = 200
+    # Sync incremental: dias refeitos antes do cursor salvo (lançamentos com data retroativa)
+    SYNC_OVERLAP_DIAS: int = 2
+
+    # Cache em memória das respostas de clientes/dashboard (LRU + TTL)
+    CACHE_TTL_SECONDS: float = 30.0
+    CACHE_MAX_ENTRIES: int = 256
+
+    # Índice em memória de clientes (busca da baixa manual): recarga completa a cada N segundos
+    CLIENTES_INDICE_TTL_SECONDS: float = 300.0
+
+    # Webhook WhatsApp: workers e tamanho da fila de processamento
+    WEBHOOK_WORKERS: int = 4
+    WEBHOOK_QUEUE_SIZE: int = 500
+    # Dedupe de mensagens reenviadas (messageId): LRU em memória + tabela webhook_mensagens opcional
+    WEBHOOK_DEDUPE_MAX_ENTRIES: int = 10000
+    WEBHOOK_DEDUPE_TTL_SECONDS: float = 86400.0
+    WEBHOOK_DEDUPE_PERSISTENT: bool = False
+
+    # Interpretação local (regex) de cadastro/baixa antes de chamar o GPT
+    INTERPRETADOR_LOCAL: bool = True
+
+    # Cache das interpretações do GPT (texto limpo + prompt + modelo); SQLite opcional persiste entre reinícios
+    LLM_CACHE_MAX_ENTRIES: int = 2000
+    LLM_CACHE_TTL_SECONDS: float = 7 * 86400.0
+    LLM_CACHE_SQLITE_PATH: str = ""
+
+    # Whisper: limite do áudio (a API aceita até 25 MB) e cache de transcrições por hash do áudio
+    WHISPER_MAX_AUDIO_BYTES: int = 25 * 1024 * 1024
+    TRANSCRICAO_CACHE_MAX_ENTRIES: int = 500
+    TRANSCRICAO_CACHE_TTL_SECONDS: float = 86400.0
+
+    # OpenAI (GPT/Whisper do webhook): concorrência, prazo por chamada e retry com backoff
+    OPENAI_MAX_CONCURRENCY: int = 4
+    OPENAI_TIMEOUT_SECONDS: float = 60.0
+    OPENAI_MAX_RETRIES: int = 3
+    OPENAI_BACKOFF_BASE_SECONDS: float = 0.5
+    OPENAI_BACKOFF_MAX_SECONDS: float = 8.0
+
+    # Z-API (envio de respostas): limite de taxa, tentativas e tamanho do buffer de falhas
+    ZAPI_RATE_PER_SECOND: float = 5.0
+    ZAPI_RATE_BURST: int = 10
+    ZAPI_MAX_RETRIES: int = 3
+    ZAPI_DEAD_LETTER_SIZE: int = 200
+
+    # Métricas Prometheus em GET /metrics (histogramas por rota, tabela, OpenAI, Santander, Z-API)
+    METRICS_ENABLED: bool = True
+
+    # Tracing (spans do webhook, PostgREST, OpenAI, Santander, Z-API); TRACING_FILE vazio = stdout
+    TRACING_ENABLED: bool = False
+    TRACING_FILE: str = ""
 
     # CORS: origens permitidas separadas por vírgula (ex.: https://meu-app.vercel.app)
     CORS_ORIGINS: str = ""
@@ -1,16 +1,35 @@
 """
 Acesso ao Supabase via REST API.
 Suporta chaves novas (sb_secret_...) com header apikey e legadas (JWT) com Bearer.
+
+Todas as queries usam um pool HTTP keep-alive compartilhado (_Pool), aberto no startup
+do app (abrir_pools) e fechado no shutdown (fechar_pools). Assim cada statement reaproveita
+a conexão TCP+TLS com o PostgREST em vez de fazer um handshake novo.
+
+get_supabase() é síncrono (rotas `def`); get_supabase_async() usa o mesmo builder com
+`await ....execute()` para rotas `async def`.
 """
 import os
+import logging
+import threading
+import time
+
+import httpx
 from dotenv import load_dotenv
 
+from app.config import settings
+from app.metrics import DB_SEGUNDOS, registrar_gauge
+from app.tracing import span
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 _SUPABASE_URL = os.getenv("SUPABASE_URL", "").rstrip("/")
 _SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
 # Chaves sb_* devem usar só header apikey (não Bearer)
 _USE_APIKEY_ONLY = _SUPABASE_KEY.startswith("sb_") if _SUPABASE_KEY else False
+_TIMEOUT = 30
 
 
 def _headers():
@@ -28,22 +47,211 @@ def _rest(table: str):
     return f"{_SUPABASE_URL}/rest/v1/{table}"
 
 
+def _http2_habilitado() -> bool:
+    """HTTP/2 só se pedido na config e se o pacote h2 estiver instalado."""
+    if not settings.SUPABASE_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("SUPABASE_HTTP2=true mas o pacote h2 não está instalado; usando HTTP/1.1.")
+        return False
+    return True
+
+
+class _Pool:
+    """
+    Pool de conexões keep-alive (httpx.Client) compartilhado pelas queries síncronas.
+    Conta requisições e conexões novas (via extensão trace do httpcore) para expor a taxa de reuso.
+    """
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self._client = None
+        self._lock = threading.Lock()
+        # Os hooks rodam nas threads do threadpool (queries síncronas): += não é atômico
+        self._lock_contadores = threading.Lock()
+        self._requisicoes = 0
+        self._conexoes_novas = 0
+
+    def _kwargs_client(self) -> dict:
+        return {
+            "headers": _headers(),
+            "timeout": _TIMEOUT,
+            "http2": _http2_habilitado(),
+            "limits": httpx.Limits(
+                max_connections=settings.SUPABASE_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SUPABASE_POOL_MAX_KEEPALIVE,
+                keepalive_expiry=settings.SUPABASE_POOL_KEEPALIVE_EXPIRY,
+            ),
+            "event_hooks": {"request": [self._ao_enviar]},
+        }
+
+    def abrir(self) -> None:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(**self._kwargs_client())
+
+    def fechar(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    @property
+    def client(self):
+        # Scripts e chamadas fora do app (sem lifespan) abrem o pool sob demanda
+        if self._client is None:
+            self.abrir()
+        return self._client
+
+    def executar(self, req: dict, resultado, tabela: str, verbo: str):
+        inicio = time.perf_counter()
+        status = "erro"
+        with span(f"db.{verbo}", tabela=tabela) as sp:
+            try:
+                r = self.client.request(**req)
+                status = str(r.status_code)
+            finally:
+                sp.set_attribute("http.status_code", status)
+                DB_SEGUNDOS.observar(time.perf_counter() - inicio, tabela, verbo, status)
+            r.raise_for_status()
+            return resultado(r)
+
+    def _contar_requisicao(self, request: httpx.Request) -> None:
+        with self._lock_contadores:
+            self._requisicoes += 1
+        request.extensions["trace"] = self._trace
+
+    def _contar_evento(self, evento: str) -> None:
+        if evento == "connection.connect_tcp.complete":
+            with self._lock_contadores:
+                self._conexoes_novas += 1
+
+    def _ao_enviar(self, request: httpx.Request) -> None:
+        self._contar_requisicao(request)
+
+    def _trace(self, evento: str, info: dict) -> None:
+        self._contar_evento(evento)
+
+    def conexoes(self) -> dict:
+        """Conexões abertas no pool do httpcore agora (em uso = abertas - ociosas)."""
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        conexoes = list(getattr(pool, "connections", ()))
+        ociosas = sum(1 for c in conexoes if c.is_idle())
+        return {"abertas": len(conexoes), "em_uso": len(conexoes) - ociosas, "ociosas": ociosas}
+
+    def stats(self) -> dict:
+        with self._lock_contadores:
+            requisicoes, conexoes_novas = self._requisicoes, self._conexoes_novas
+        reusadas = max(0, requisicoes - conexoes_novas)
+        return {
+            "aberto": self._client is not None,
+            "conexoes": self.conexoes(),
+            "http2": bool(self._client is not None and _http2_habilitado()),
+            "max_conexoes": settings.SUPABASE_POOL_MAX_CONNECTIONS,
+            "requisicoes": requisicoes,
+            "conexoes_novas": conexoes_novas,
+            "conexoes_reusadas": reusadas,
+            "taxa_reuso": round(reusadas / requisicoes, 4) if requisicoes else 0.0,
+        }
+
+
+class _AsyncPool(_Pool):
+    """Mesmo pool, com httpx.AsyncClient: execute() das queries vira awaitable."""
+
+    def abrir(self) -> None:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.AsyncClient(**self._kwargs_client())
+
+    async def fechar(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    async def executar(self, req: dict, resultado, tabela: str, verbo: str):
+        inicio = time.perf_counter()
+        status = "erro"
+        with span(f"db.{verbo}", tabela=tabela) as sp:
+            try:
+                r = await self.client.request(**req)
+                status = str(r.status_code)
+            finally:
+                sp.set_attribute("http.status_code", status)
+                DB_SEGUNDOS.observar(time.perf_counter() - inicio, tabela, verbo, status)
+            r.raise_for_status()
+            return resultado(r)
+
+    async def _ao_enviar(self, request: httpx.Request) -> None:
+        self._contar_requisicao(request)
+
+    async def _trace(self, evento: str, info: dict) -> None:
+        self._contar_evento(evento)
+
+
+_pool = _Pool("supabase")
+_pool_async = _AsyncPool("supabase_async")
+
+
+def abrir_pools() -> None:
+    """Abre os pools HTTP do Supabase (chamado no startup do app)."""
+    if _SUPABASE_URL and _SUPABASE_KEY:
+        _pool.abrir()
+        _pool_async.abrir()
+
+
+async def fechar_pools() -> None:
+    """Fecha os pools HTTP do Supabase (chamado no shutdown do app)."""
+    _pool.fechar()
+    await _pool_async.fechar()
+
+
+def pool_stats() -> dict:
+    """Estatísticas por pool (requisições, conexões novas/reusadas, taxa de reuso)."""
+    return {p.nome: p.stats() for p in (_pool, _pool_async)}
+
+
+def _metricas_pools() -> dict:
+    return {(p.nome, estado): n for p in (_pool, _pool_async) for estado, n in p.conexoes().items() if estado != "abertas"}
+
+
+registrar_gauge("db_pool_connections", "Conexões HTTP com o PostgREST por pool e estado", _metricas_pools, ("pool", "state"))
+
+
 class _Table:
-    def __init__(self, name: str):
+    def __init__(self, name: str, pool: _Pool):
         self._name = name
         self._url = _rest(name)
+        self._pool = pool
 
     def select(self, columns: str = "*"):
-        return _Query(self._name, self._url, select=columns)
-
-    def insert(self, data: dict):
-        return _Insert(self._name, self._url, data)
+        return _Query(self._name, self._url, self._pool, select=columns)
+
+    def insert(self, data: dict | list[dict]):
+        return _Insert(self._name, self._url, self._pool, data)
+
+    def upsert(self, data: dict | list[dict], on_conflict: str | None = None, ignore_duplicates: bool = False):
+        """
+        INSERT ... ON CONFLICT. on_conflict: colunas da constraint única (ex.: "cliente_id,data_pagamento").
+        ignore_duplicates=True ignora as linhas em conflito (DO NOTHING); senão faz merge (DO UPDATE).
+        """
+        return _Insert(
+            self._name,
+            self._url,
+            self._pool,
+            data,
+            upsert=True,
+            on_conflict=on_conflict,
+            ignore_duplicates=ignore_duplicates,
+        )
 
     def update(self, data: dict):
-        return _Update(self._name, self._url, data)
+        return _Update(self._name, self._url, self._pool, data)
 
     def delete(self):
-        return _Delete(self._name, self._url)
+        return _Delete(self._name, self._url, self._pool)
 
 
 class _Result:
@@ -51,14 +259,48 @@ class _Result:
         self.data = data
 
 
-class _Query:
-    def __init__(self, table: str, base_url: str, select: str):
+class _Operacao:
+    """
+    Base dos builders: monta a requisição e delega o envio ao pool.
+    Com pool síncrono execute() devolve _Result; com _AsyncPool devolve um awaitable.
+    tabela/verbo rotulam a métrica db_request_duration_seconds.
+    """
+
+    verbo = ""
+
+    def __init__(self, tabela: str, base_url: str, pool: _Pool):
+        self._tabela = tabela
         self._url = base_url
+        self._pool = pool
+
+    def _requisicao(self) -> dict:
+        raise NotImplementedError
+
+    def _resultado(self, r: httpx.Response) -> _Result:
+        raise NotImplementedError
+
+    def execute(self):
+        return self._pool.executar(self._requisicao(), self._resultado, self._tabela, self.verbo)
+
+
+def valor_postgrest(val) -> str:
+    """Valor entre aspas para filtros compostos (or=/in.), escapando aspas e barras."""
+    v = str(val).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{v}"'
+
+
+class _Query(_Operacao):
+    verbo = "select"
+
+    def __init__(self, table: str, base_url: str, pool: _Pool, select: str):
+        super().__init__(table, base_url, pool)
         self._params: list[tuple[str, str]] = [("select", select)]
+        self._order: list[str] = []
         self._single = False
 
     def order(self, col: str, asc: bool = True):
-        self._params.append(("order", f"{col}.{'asc' if asc else 'desc'}"))
+        # Chamadas encadeadas viram um único order=col1.asc,col2.asc (desempate)
+        self._order.append(f"{col}.{'asc' if asc else 'desc'}")
         return self
 
     def eq(self, col: str, val):
@@ -67,33 +309,82 @@ class _Query:
         self._params.append((col, f"eq.{val}"))
         return self
 
+    def gt(self, col: str, val):
+        self._params.append((col, f"gt.{val}"))
+        return self
+
     def gte(self, col: str, val):
         self._params.append((col, f"gte.{val}"))
         return self
 
+    def lt(self, col: str, val):
+        self._params.append((col, f"lt.{val}"))
+        return self
+
     def lte(self, col: str, val):
         self._params.append((col, f"lte.{val}"))
         return self
 
+    def ilike(self, col: str, padrao: str):
+        """Padrão do PostgREST com * como curinga (ex.: "*silva*")."""
+        self._params.append((col, f"ilike.{padrao}"))
+        return self
+
+    def in_(self, col: str, vals):
+        self._params.append((col, f"in.({','.join(valor_postgrest(v) for v in vals)})"))
+        return self
+
+    def not_in(self, col: str, vals):
+        self._params.append((col, f"not.in.({','.join(valor_postgrest(v) for v in vals)})"))
+        return self
+
+    def or_(self, filtros: str):
+        """Filtro OR cru do PostgREST, ex.: "nome.gt.\"Ana\",and(nome.eq.\"Ana\",id.gt.123)"."""
+        self._params.append(("or", f"({filtros})"))
+        return self
+
+    def limit(self, n: int):
+        self._params.append(("limit", str(int(n))))
+        return self
+
     def single(self):
         self._single = True
         return self
 
-    def execute(self):
-        import httpx
-        qs = "&".join(f"{k}={v}" for k, v in self._params)
-        r = httpx.get(f"{self._url}?{qs}", headers=_headers(), timeout=30)
-        r.raise_for_status()
+    def _requisicao(self) -> dict:
+        params = self._params + ([("order", ",".join(self._order))] if self._order else [])
+        return {"method": "GET", "url": self._url, "params": params}
+
+    def _resultado(self, r: httpx.Response) -> _Result:
         data = r.json()
         if self._single:
             data = data[0] if isinstance(data, list) and len(data) else None
         return _Result(data)
 
 
-class _Insert:
-    def __init__(self, table: str, base_url: str, data: dict):
-        self._url = base_url
+class _Insert(_Operacao):
+    """
+    Insert de uma linha (dict) ou em lote (list[dict], um único POST).
+    Com lista, .data é a lista de linhas efetivamente gravadas (no upsert com
+    ignore_duplicates, as linhas em conflito não voltam).
+    """
+
+    def __init__(
+        self,
+        table: str,
+        base_url: str,
+        pool: _Pool,
+        data: dict | list[dict],
+        upsert: bool = False,
+        on_conflict: str | None = None,
+        ignore_duplicates: bool = False,
+    ):
+        super().__init__(table, base_url, pool)
+        self.verbo = "upsert" if upsert else "insert"
         self._data = data
+        self._upsert = upsert
+        self._on_conflict = on_conflict
+        self._ignore_duplicates = ignore_duplicates
 
     def select(self):
         return self
@@ -101,19 +392,34 @@ class _Insert:
     def single(self):
         return self
 
-    def execute(self):
-        import httpx
-        h = {**_headers(), "Prefer": "return=representation"}
-        r = httpx.post(self._url, json=self._data, headers=h, timeout=30)
-        r.raise_for_status()
+    def _requisicao(self) -> dict:
+        prefer = ["return=representation"]
+        params: list[tuple[str, str]] = []
+        if self._upsert:
+            prefer.append("resolution=ignore-duplicates" if self._ignore_duplicates else "resolution=merge-duplicates")
+            if self._on_conflict:
+                params.append(("on_conflict", self._on_conflict))
+        return {
+            "method": "POST",
+            "url": self._url,
+            "params": params,
+            "json": self._data,
+            "headers": {"Prefer": ",".join(prefer)},
+        }
+
+    def _resultado(self, r: httpx.Response) -> _Result:
         data = r.json()
+        if isinstance(self._data, list):
+            return _Result(data if isinstance(data, list) else [])
         out = data[0] if isinstance(data, list) and data else data
         return _Result(out)
 
 
-class _Update:
-    def __init__(self, table: str, base_url: str, data: dict):
-        self._url = base_url
+class _Update(_Operacao):
+    verbo = "update"
+
+    def __init__(self, table: str, base_url: str, pool: _Pool, data: dict):
+        super().__init__(table, base_url, pool)
         self._data = data
         self._filter_col = self._filter_val = None
 
@@ -127,44 +433,85 @@ class _Update:
     def single(self):
         return self
 
-    def execute(self):
-        import httpx
+    def _requisicao(self) -> dict:
         if not self._filter_col:
             raise ValueError("update precisa de .eq(col, val)")
-        qs = f"{self._filter_col}=eq.{self._filter_val}"
-        h = {**_headers(), "Prefer": "return=representation"}
-        r = httpx.patch(f"{self._url}?{qs}", json=self._data, headers=h, timeout=30)
-        r.raise_for_status()
+        return {
+            "method": "PATCH",
+            "url": self._url,
+            "params": [(self._filter_col, f"eq.{self._filter_val}")],
+            "json": self._data,
+            "headers": {"Prefer": "return=representation"},
+        }
+
+    def _resultado(self, r: httpx.Response) -> _Result:
         data = r.json()
         out = data[0] if isinstance(data, list) and data else None
         return _Result(out)
 
 
-class _Delete:
-    def __init__(self, table: str, base_url: str):
-        self._url = base_url
+class _Delete(_Operacao):
+    verbo = "delete"
+
+    def __init__(self, table: str, base_url: str, pool: _Pool):
+        super().__init__(table, base_url, pool)
         self._filter_col = self._filter_val = None
 
     def eq(self, col: str, val):
         self._filter_col, self._filter_val = col, val
         return self
 
-    def execute(self):
-        import httpx
+    def _requisicao(self) -> dict:
         if not self._filter_col:
             raise ValueError("delete precisa de .eq(col, val)")
-        qs = f"{self._filter_col}=eq.{self._filter_val}"
-        r = httpx.delete(f"{self._url}?{qs}", headers=_headers(), timeout=30)
-        r.raise_for_status()
+        return {
+            "method": "DELETE",
+            "url": self._url,
+            "params": [(self._filter_col, f"eq.{self._filter_val}")],
+        }
+
+    def _resultado(self, r: httpx.Response) -> _Result:
         return _Result(None)
 
 
+class _Rpc(_Operacao):
+    """Chamada de função do Postgres exposta pelo PostgREST (POST /rest/v1/rpc/<fn>)."""
+
+    verbo = "rpc"
+
+    def __init__(self, fn: str, base_url: str, pool: _Pool, params: dict | None):
+        super().__init__(fn, base_url, pool)
+        self._params = params or {}
+
+    def _requisicao(self) -> dict:
+        return {"method": "POST", "url": self._url, "json": self._params}
+
+    def _resultado(self, r: httpx.Response) -> _Result:
+        return _Result(r.json() if r.content else None)
+
+
 class _Client:
+    def __init__(self, pool: _Pool):
+        self._pool = pool
+
     def table(self, name: str):
-        return _Table(name)
+        return _Table(name, self._pool)
 
+    def rpc(self, fn: str, params: dict | None = None):
+        return _Rpc(fn, _rest(f"rpc/{fn}"), self._pool, params)
 
-def get_supabase():
+
+def _checar_config() -> None:
     if not _SUPABASE_URL or not _SUPABASE_KEY:
         raise ValueError("Defina SUPABASE_URL e SUPABASE_KEY no .env")
-    return _Client()
+
+
+def get_supabase():
+    _checar_config()
+    return _Client(_pool)
+
+
+def get_supabase_async():
+    """Mesma API fluente, mas com `await ....execute()` (não bloqueia o event loop)."""
+    _checar_config()
+    return _Client(_pool_async)
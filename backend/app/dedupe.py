@@ -0,0 +1,82 @@
+"""
+Dedupe de mensagens do webhook (reenvios da Z-API por timeout).
+
+Chave: messageId (Z-API) ou key.id (Evolution). Primeiro um LRU em memória (TTLCache);
+com WEBHOOK_DEDUPE_PERSISTENT=true também a tabela webhook_mensagens
+(supabase/migrations/007_webhook_mensagens.sql), que vale entre reinícios e réplicas.
+Duplicatas são descartadas antes de qualquer chamada à OpenAI ou escrita no Supabase.
+"""
+import logging
+
+from app.cache import TTLCache
+from app.config import settings
+from app.db import get_supabase_async
+
+logger = logging.getLogger(__name__)
+
+
+def extrair_id_mensagem(body: dict) -> str | None:
+    """messageId (Z-API) ou key.id (Evolution: data.key.id ou data.messages[0].key.id)."""
+    try:
+        mid = body.get("messageId")
+        if mid:
+            return str(mid)
+        data = body.get("data") or {}
+        if not isinstance(data, dict):
+            return None
+        key = data.get("key") or ((data.get("messages") or [{}])[0] or {}).get("key") or {}
+        return str(key["id"]) if isinstance(key, dict) and key.get("id") else None
+    except Exception:
+        return None
+
+
+class DedupeMensagens:
+    def __init__(self, max_itens: int, ttl: float, persistente: bool):
+        self._vistos = TTLCache("webhook_dedupe", max_itens, ttl)
+        self._persistente = persistente
+        self.duplicadas = 0
+
+    async def registrar(self, message_id: str) -> bool:
+        """Marca a mensagem como recebida. True se é nova; False se já foi vista (duplicada)."""
+        # Checagem e marcação sem await no meio: atômicas dentro do event loop
+        if self._vistos.get(message_id) is not None:
+            self.duplicadas += 1
+            return False
+        self._vistos.set(message_id, True)
+        if self._persistente and not await self._registrar_no_banco(message_id):
+            self.duplicadas += 1
+            return False
+        return True
+
+    async def _registrar_no_banco(self, message_id: str) -> bool:
+        try:
+            r = await (
+                get_supabase_async()
+                .table("webhook_mensagens")
+                .upsert([{"message_id": message_id}], on_conflict="message_id", ignore_duplicates=True)
+                .execute()
+            )
+            return bool(r.data)
+        except Exception as e:
+            # Falha no banco não pode bloquear o webhook: segue só com o dedupe em memória
+            logger.warning("Dedupe: erro ao gravar webhook_mensagens (%s); usando só memória", e)
+            return True
+
+    async def esquecer(self, message_id: str) -> None:
+        """Desfaz o registro (ex.: job não pôde ser enfileirado e a Z-API vai reenviar)."""
+        self._vistos.set(message_id, None)
+        if self._persistente:
+            try:
+                await get_supabase_async().table("webhook_mensagens").delete().eq("message_id", message_id).execute()
+            except Exception as e:
+                logger.warning("Dedupe: erro ao remover %s de webhook_mensagens: %s", message_id, e)
+
+    def stats(self) -> dict:
+        return {"duplicadas": self.duplicadas, "persistente": self._persistente, **self._vistos.stats()}
+
+
+dedupe_webhook = DedupeMensagens(
+    settings.WEBHOOK_DEDUPE_MAX_ENTRIES,
+    settings.WEBHOOK_DEDUPE_TTL_SECONDS,
+    settings.WEBHOOK_DEDUPE_PERSISTENT,
+)
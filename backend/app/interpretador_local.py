@@ -0,0 +1,298 @@
+"""
+Interpretação local (sem LLM) das mensagens mais comuns do webhook.
+
+Reconhece os formatos documentados no SYSTEM_PROMPT do webhook e devolve o mesmo JSON
+que o GPT devolveria ({"cadastrar_cliente": {...}} ou {"baixa_manual": {...}}):
+    "Cadastrar cliente João Silva, CPF 123, mensalidade 500, vencimento dia 10"
+    "baixa Maria 150"  /  "dar baixa no pagamento da Maria, R$ 1.500,00, ontem"
+Só responde quando todo o texto foi reconhecido; qualquer sobra desconhecida devolve None
+e o webhook segue para o GPT. O nome é reconhecido em positivo (palavras com inicial
+maiúscula, além de de/da/do/dos/das) e, no cadastro, termina na vírgula ou no primeiro campo. Contadores de acerto e latência em stats().
+"""
+import re
+import time
+from datetime import date, timedelta
+
+from app.api.pix_matcher import normalizar_nome
+
+_UNIDADES = {
+    "zero": 0, "um": 1, "uma": 1, "dois": 2, "duas": 2, "tres": 3, "quatro": 4, "cinco": 5,
+    "seis": 6, "sete": 7, "oito": 8, "nove": 9, "dez": 10, "onze": 11, "doze": 12, "treze": 13,
+    "quatorze": 14, "catorze": 14, "quinze": 15, "dezesseis": 16, "dezessete": 17, "dezoito": 18,
+    "dezenove": 19, "vinte": 20, "trinta": 30, "quarenta": 40, "cinquenta": 50, "sessenta": 60,
+    "setenta": 70, "oitenta": 80, "noventa": 90, "cem": 100, "cento": 100, "duzentos": 200,
+    "duzentas": 200, "trezentos": 300, "trezentas": 300, "quatrocentos": 400, "quatrocentas": 400,
+    "quinhentos": 500, "quinhentas": 500, "seiscentos": 600, "seiscentas": 600, "setecentos": 700,
+    "setecentas": 700, "oitocentos": 800, "oitocentas": 800, "novecentos": 900, "novecentas": 900,
+    "mil": 1000,
+}
+# Mais longas primeiro para a alternância não parar em prefixos (ex.: "dez" x "dezoito")
+_PALAVRA_NUM = "|".join(sorted(_UNIDADES, key=len, reverse=True))
+_NUM_EXTENSO = rf"(?:{_PALAVRA_NUM})(?:\s+(?:e\s+)?(?:{_PALAVRA_NUM}))*"
+_NUM_DIGITOS = r"\d{1,3}(?:\.\d{3})+(?:,\d{1,2})?|\d+(?:[.,]\d{1,2})?"
+_VALOR = rf"(?:r\$\s*)?(?P<valor>{_NUM_DIGITOS}|\b{_NUM_EXTENSO})\b(?:\s*reais)?"
+
+_RE_CADASTRAR = re.compile(
+    r"^(?:por favor[,\s]+)?(?:cadastr|registr|adicion|inclu)(?:ar|e|a|ir|i)\s+"
+    r"(?:(?:o|a|um|uma)\s+)?(?:nov[oa]\s+)?cliente\b[\s,:-]*(?:chamad[oa]\s+|de nome\s+)?"
+)
+_RE_BAIXA = re.compile(
+    r"^(?:por favor[,\s]+)?(?:(?:dar|da|de|fazer|faca)\s+(?:a\s+)?)?baixa\s+"
+    r"(?:(?:no|na|do|da|de|em|para|pra)\s+)?(?:(?:o|a)\s+)?(?:pagamento\s+(?:(?:do|da|de)\s+)?)?(?:cliente\s+)?"
+    r"|^(?:registr(?:ar|e|a)|lanc(?:ar|e|a))\s+(?:o\s+)?pagamento\s+(?:(?:do|da|de)\s+)?(?:cliente\s+)?"
+)
+_RE_PAGOU = re.compile(r"^(?:o\s+|a\s+)?(?:cliente\s+)?(?P<nome>.+?)\s+pagou\b")
+
+_RE_DOC = re.compile(
+    r"\b(?:cpf|cnpj|documento|doc)\b\s*(?:n[o.]\s*|numero\s+)?:?\s*(?P<doc>\d[\d./-]*\d|\d)"
+    # Sem rótulo, só no formato mascarado: 11/14 dígitos soltos podem ser telefone
+    r"|(?P<doc_fmt>\b\d{3}\.\d{3}\.\d{3}-\d{2}\b|\b\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}\b)"
+)
+_RE_MENSALIDADE = re.compile(rf"\b(?:mensalidade|valor(?:\s+mensal)?|mensal)\b\s*(?:de\s+)?:?\s*{_VALOR}")
+_RE_VENCIMENTO = re.compile(
+    rf"\b(?:(?:vencimento|vence|venc)\b\.?\s*(?:todo\s+)?(?:(?:no|em|o)\s+)?(?:dia\s+)?:?|dia\s+)"
+    rf"\s*(?P<dia>\d{{1,2}}|{_NUM_EXTENSO})\b"
+)
+_RE_DATA = re.compile(
+    r"(?:\b(?:pago\s+)?(?:em|no dia|data(?:\s+de\s+pagamento)?|dia)\s*:?\s*)?"
+    r"(?P<data>\bhoje\b|\banteontem\b|\bontem\b|\b\d{4}-\d{2}-\d{2}\b|\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b)"
+)
+_RE_VALOR_BAIXA = re.compile(rf"(?:\b(?:no\s+)?valor\s+(?:de\s+)?|\bde\s+(?=r\$))?{_VALOR}")
+
+# Palavras de ligação que podem sobrar entre os campos
+_LIGACAO = {"e", "com", "de", "do", "da", "no", "na", "em", "o", "a", "valor", "reais", "pagamento", "pagou", "referente", "mensalidade"}
+# Palavras que indicam frase (não nome): o GPT decide
+_NAO_NOME = {
+    "todos", "todas", "cliente", "clientes", "que", "quem", "qual", "quais", "nao", "ultimo", "ultima", "mes",
+    "metade", "parte", "parcela", "parcial", "resto", "ref", "dia", "janeiro", "fevereiro", "marco", "abril",
+    "maio", "junho", "julho", "agosto", "setembro", "outubro", "novembro", "dezembro",
+}
+# Ligações que podem aparecer no meio de um nome (Maria da Silva); as outras, só nas pontas
+_PARTICULAS_NOME = {"de", "da", "do", "dos", "das"}
+# "dia 10" sem mês: dia do mês, não valor nem data completa; o GPT decide
+_RE_DIA_SOLTO = re.compile(rf"\bdia\s+(?:\d{{1,2}}|{_NUM_EXTENSO})\b")
+_RE_PAGOU_PALAVRA = re.compile(r"\bpagou\b")
+_RE_NOME = re.compile(r"^[^\W\d_]+(?:[ '.-]+[^\W\d_]+)*\.?$")
+
+
+def numero_por_extenso(texto: str) -> int | None:
+    """'mil e duzentos' -> 1200; 'cento e cinquenta' -> 150. None se houver palavra desconhecida."""
+    total = atual = 0
+    palavras = [p for p in normalizar_nome(texto).split() if p != "e"]
+    if not palavras:
+        return None
+    for p in palavras:
+        v = _UNIDADES.get(p)
+        if v is None:
+            return None
+        if v == 1000:
+            total += (atual or 1) * 1000
+            atual = 0
+        else:
+            atual += v
+    return total + atual
+
+
+def valor_monetario(texto: str) -> float | None:
+    """'R$ 1.500,00' -> 1500.0; '150,5' -> 150.5; '1500.50' -> 1500.5; 'quinhentos' -> 500.0."""
+    s = normalizar_nome(texto).replace("r$", "").replace("reais", "").strip()
+    if not s:
+        return None
+    if s[0].isdigit():
+        if "," in s:
+            s = s.replace(".", "").replace(",", ".")
+        elif re.fullmatch(r"\d{1,3}(?:\.\d{3})+", s):
+            s = s.replace(".", "")
+        try:
+            return float(s)
+        except ValueError:
+            return None
+    n = numero_por_extenso(s)
+    return float(n) if n is not None else None
+
+
+def data_pagamento(texto: str, hoje: date) -> str | None:
+    """'hoje'/'ontem'/'anteontem', 'dd/mm', 'dd/mm/aa(aa)' ou ISO -> 'YYYY-MM-DD'."""
+    s = normalizar_nome(texto)
+    relativas = {"hoje": 0, "ontem": 1, "anteontem": 2}
+    if s in relativas:
+        return (hoje - timedelta(days=relativas[s])).isoformat()
+    try:
+        if "-" in s:
+            return date.fromisoformat(s).isoformat()
+        partes = [int(p) for p in s.split("/")]
+        ano = partes[2] if len(partes) == 3 else hoje.year
+        if ano < 100:
+            ano += 2000
+        return date(ano, partes[1], partes[0]).isoformat()
+    except ValueError:
+        return None
+
+
+def _numero_json(v: float) -> int | float:
+    return int(v) if v == int(v) else round(v, 2)
+
+
+def _remover(texto: str, m: re.Match) -> str:
+    """Troca o trecho casado por espaços (mantém os índices alinhados com o texto original)."""
+    return texto[: m.start()] + " " * (m.end() - m.start()) + texto[m.end():]
+
+
+def _sobra_vazia(texto: str) -> bool:
+    return all(p in _LIGACAO for p in re.split(r"[\s,;:.\-]+", texto) if p)
+
+
+def _limpar_nome(original: str, base: str) -> str | None:
+    """Nome a partir do trecho original, sem palavras de ligação nas pontas. None se não parecer um nome."""
+    palavras_base = base.split()
+    palavras = original.split()
+    while palavras_base and palavras_base[0].strip(",;:") in _LIGACAO:
+        palavras_base.pop(0)
+        palavras.pop(0)
+    while palavras_base and palavras_base[-1].strip(",;:") in _LIGACAO:
+        palavras_base.pop()
+        palavras.pop()
+    nome = " ".join(palavras).strip(" ,;:-")
+    if not nome or len(palavras) > 8 or not _RE_NOME.match(nome):
+        return None
+    # Reconhecimento positivo: cada palavra do nome com inicial maiúscula (fora as partículas).
+    # Palavra desconhecida em minúscula ("via pix", "semana passada", "telefone") vai para o GPT
+    if any(not p[0].isupper() for p, b in zip(palavras, palavras_base) if b.strip(",;:") not in _PARTICULAS_NOME):
+        return None
+    # Sobra de frase no meio ("Maria referente outubro") ou dois nomes ("João e Maria"): não é um nome só
+    internas = {p.strip(",;:") for p in palavras_base} - _PARTICULAS_NOME
+    if _NAO_NOME.intersection(internas) or _LIGACAO.intersection(internas):
+        return None
+    return nome
+
+
+def _cadastrar(original: str, base: str, inicio: int) -> dict | None:
+    resto = base[inicio:]
+    campos: dict = {"documento_cpf_cnpj": None, "valor_mensalidade": 0, "dia_vencimento": 10}
+    fim_nome = len(resto)
+    for regex, campo in ((_RE_DOC, "doc"), (_RE_MENSALIDADE, "valor"), (_RE_VENCIMENTO, "dia")):
+        m = regex.search(resto)
+        if not m:
+            continue
+        if campo == "doc":
+            campos["documento_cpf_cnpj"] = re.sub(r"\D", "", m.group("doc") or m.group("doc_fmt"))
+        elif campo == "valor":
+            valor = valor_monetario(m.group("valor"))
+            if valor is None:
+                return None
+            campos["valor_mensalidade"] = _numero_json(valor)
+        else:
+            dia = m.group("dia")
+            dia = int(dia) if dia.isdigit() else numero_por_extenso(dia)
+            if dia is None or not 1 <= dia <= 31:
+                return None
+            campos["dia_vencimento"] = dia
+        fim_nome = min(fim_nome, m.start())
+        resto = _remover(resto, m)
+    # O nome termina na primeira vírgula ou no primeiro campo (cpf, mensalidade, vencimento...)
+    virgula = resto.find(",")
+    if 0 <= virgula < fim_nome:
+        fim_nome = virgula
+    if not _sobra_vazia(resto[fim_nome:]):
+        return None
+    nome = _limpar_nome(original[inicio: inicio + fim_nome], resto[:fim_nome])
+    if nome is None:
+        return None
+    return {"cadastrar_cliente": {"nome": nome, **campos}}
+
+
+def _baixa(original: str, base: str, inicio: int, hoje: date) -> dict | None:
+    resto = base[inicio:]
+    data_pag = doc = valor = None
+    m = _RE_DATA.search(resto)
+    if m:
+        data_pag = data_pagamento(m.group("data"), hoje)
+        if data_pag is None:
+            return None
+        resto = _remover(resto, m)
+    if _RE_DIA_SOLTO.search(resto):
+        return None
+    # "pagou" encerra o nome: o que vem depois tem de ser valor/data/documento
+    resto = _RE_PAGOU_PALAVRA.sub(lambda m: " " * len(m.group()), resto)
+    m = _RE_DOC.search(resto)
+    if m:
+        doc = re.sub(r"\D", "", m.group("doc") or m.group("doc_fmt"))
+        resto = _remover(resto, m)
+    valores = list(_RE_VALOR_BAIXA.finditer(resto))
+    if len(valores) > 1:
+        return None
+    if valores:
+        valor = valor_monetario(valores[0].group("valor"))
+        if valor is None:
+            return None
+        resto = _remover(resto, valores[0])
+    nome = None
+    if not _sobra_vazia(resto):
+        # O nome é o único trecho contíguo que sobrou
+        trechos = [t for t in re.finditer(r"\S+(?: \S+)*", resto) if not _sobra_vazia(t.group())]
+        if len(trechos) != 1:
+            return None
+        t = trechos[0]
+        nome = _limpar_nome(original[inicio + t.start(): inicio + t.end()], t.group())
+        if nome is None:
+            return None
+    if not (doc or nome):
+        return None
+    return {"baixa_manual": {
+        "nome_ou_documento": doc or nome,
+        "valor": _numero_json(valor) if valor is not None else None,
+        "data_pagamento": data_pag,
+    }}
+
+
+class InterpretadorLocal:
+    def __init__(self):
+        self.tentativas = 0
+        self.acertos = 0
+        self._tempo_total = 0.0
+        self._tempo_max = 0.0
+
+    def interpretar(self, texto: str, hoje: date | None = None) -> dict | None:
+        """JSON equivalente ao do GPT para cadastro/baixa, ou None se o texto não for reconhecido."""
+        inicio = time.perf_counter()
+        self.tentativas += 1
+        try:
+            resultado = self._interpretar(texto, hoje or date.today())
+        except Exception:
+            resultado = None
+        decorrido = time.perf_counter() - inicio
+        self._tempo_total += decorrido
+        self._tempo_max = max(self._tempo_max, decorrido)
+        if resultado is not None:
+            self.acertos += 1
+        return resultado
+
+    @staticmethod
+    def _interpretar(texto: str, hoje: date) -> dict | None:
+        original = (texto or "").strip()
+        base = normalizar_nome(original)
+        # Índices do texto normalizado precisam valer no original (nome preserva acentos/maiúsculas)
+        if not base or len(base) != len(original):
+            return None
+        m = _RE_CADASTRAR.match(base)
+        if m:
+            return _cadastrar(original, base, m.end())
+        m = _RE_BAIXA.match(base)
+        if m:
+            return _baixa(original, base, m.end(), hoje)
+        m = _RE_PAGOU.match(base)
+        if m:
+            return _baixa(original, base, m.start("nome"), hoje)
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "tentativas": self.tentativas,
+            "acertos": self.acertos,
+            "taxa_acerto": round(self.acertos / self.tentativas, 4) if self.tentativas else 0.0,
+            "latencia_media_us": round(self._tempo_total / self.tentativas * 1e6, 1) if self.tentativas else 0.0,
+            "latencia_max_us": round(self._tempo_max * 1e6, 1),
+        }
+
+
+interpretador_local = InterpretadorLocal()
@@ -0,0 +1,128 @@
+"""
+Fila de jobs assíncronos em memória com pool de workers (asyncio).
+
+Usada pelo webhook do WhatsApp: a rota valida e enfileira, responde 200 na hora,
+e os workers executam o pipeline (transcrição → GPT → Supabase → Z-API).
+A fila é limitada: enfileirar() devolve False quando cheia (a rota responde 503 e a
+Z-API reenvia depois), e stats() expõe profundidade, rejeições e tempos de espera.
+Cada job roda no contexto (contextvars) de quem o enfileirou: request id e span da
+requisição seguem para o processamento em background.
+"""
+import asyncio
+import contextvars
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from app.metrics import FILA_ESPERA_SEGUNDOS, FILA_EXECUCAO_SEGUNDOS, registrar_gauge
+
+logger = logging.getLogger(__name__)
+_filas: list["FilaJobs"] = []
+
+
+class FilaJobs:
+    def __init__(self, nome: str, workers: int, tamanho_max: int):
+        self.nome = nome
+        self._n_workers = max(1, workers)
+        self._tamanho_max = max(1, tamanho_max)
+        self._fila: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+        self._em_execucao = 0
+        self.enfileirados = 0
+        self.processados = 0
+        self.falhas = 0
+        self.rejeitados = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+        self._execucao_total = 0.0
+        _filas.append(self)
+
+    def _obter_fila(self) -> asyncio.Queue:
+        if self._fila is None:
+            self._fila = asyncio.Queue(maxsize=self._tamanho_max)
+        return self._fila
+
+    async def iniciar(self) -> None:
+        fila = self._obter_fila()
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(fila), name=f"{self.nome}-worker-{i}")
+            for i in range(self._n_workers)
+        ]
+
+    async def parar(self, timeout: float = 10.0) -> None:
+        """Espera os jobs pendentes (até timeout) e encerra os workers."""
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._obter_fila().join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Fila %s: %d job(s) descartado(s) no shutdown", self.nome, self._obter_fila().qsize())
+        for w in self._workers:
+            w.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def enfileirar(self, func: Callable[..., Awaitable[Any]], *args) -> bool:
+        """Agenda func(*args). Não bloqueia: devolve False se a fila estiver cheia."""
+        try:
+            # Leva o contexto de quem enfileirou (request id, span atual) para o worker
+            self._obter_fila().put_nowait((func, args, time.monotonic(), contextvars.copy_context()))
+        except asyncio.QueueFull:
+            self.rejeitados += 1
+            return False
+        self.enfileirados += 1
+        return True
+
+    async def _worker(self, fila: asyncio.Queue) -> None:
+        while True:
+            func, args, enfileirado_em, contexto = await fila.get()
+            inicio = time.monotonic()
+            espera = inicio - enfileirado_em
+            self._espera_total += espera
+            self._espera_max = max(self._espera_max, espera)
+            FILA_ESPERA_SEGUNDOS.observar(espera, self.nome)
+            self._em_execucao += 1
+            status = "ok"
+            try:
+                await asyncio.create_task(func(*args), context=contexto)
+                self.processados += 1
+            except Exception:
+                status = "erro"
+                self.falhas += 1
+                logger.exception("Fila %s: falha ao processar job", self.nome)
+            finally:
+                self._em_execucao -= 1
+                duracao = time.monotonic() - inicio
+                self._execucao_total += duracao
+                FILA_EXECUCAO_SEGUNDOS.observar(duracao, self.nome, status)
+                fila.task_done()
+
+    def stats(self) -> dict:
+        concluidos = self.processados + self.falhas
+        return {
+            "workers": self._n_workers if self._workers else 0,
+            "profundidade": self._fila.qsize() if self._fila else 0,
+            "tamanho_max": self._tamanho_max,
+            "em_execucao": self._em_execucao,
+            "enfileirados": self.enfileirados,
+            "processados": self.processados,
+            "falhas": self.falhas,
+            "rejeitados": self.rejeitados,
+            "espera_media_ms": round(self._espera_total / concluidos * 1000, 1) if concluidos else 0.0,
+            "espera_max_ms": round(self._espera_max * 1000, 1),
+            "execucao_media_ms": round(self._execucao_total / concluidos * 1000, 1) if concluidos else 0.0,
+        }
+
+
+def _metricas_filas() -> dict:
+    valores = {}
+    for f in _filas:
+        st = f.stats()
+        valores[(f.nome, "profundidade")] = st["profundidade"]
+        valores[(f.nome, "em_execucao")] = st["em_execucao"]
+    return valores
+
+
+registrar_gauge("job_queue", "Jobs por fila: na fila (profundidade) e em execução", _metricas_filas, ("queue", "state"))
@@ -0,0 +1,123 @@
+"""
+Cache das interpretações do GPT (webhook), endereçado pelo conteúdo.
+
+Chave = sha256(hash do prompt + modelo + texto já limpo por _limpar_texto_para_ia):
+mudar o SYSTEM_PROMPT ou o modelo invalida tudo automaticamente.
+- Memória: LRU + TTL (TTLCache). Opcional: arquivo SQLite (LLM_CACHE_SQLITE_PATH) que
+  sobrevive a reinícios; lido no miss da memória. Leituras e gravações no SQLite rodam em
+  thread (asyncio.to_thread), fora do event loop.
+- Não usa cache para textos com datas relativas ("hoje", "ontem", "amanhã"...), cujo
+  significado muda com o dia, nem grava respostas de erro (quem chama só grava sucesso).
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+from app.api.pix_matcher import normalizar_nome
+from app.cache import TTLCache
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_RE_DATA_RELATIVA = re.compile(r"\b(?:hoje|ontem|anteontem|amanha|depois de amanha|semana passada|mes passado)\b")
+
+
+class CacheInterpretacao:
+    def __init__(self, max_itens: int, ttl: float, caminho_sqlite: str = ""):
+        self._ttl = ttl
+        self._memoria = TTLCache("llm_interpretacao", max_itens, ttl)
+        self._caminho = caminho_sqlite
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self.ignorados = 0
+        self.hits_sqlite = 0
+
+    @staticmethod
+    def chave(texto: str, prompt: str, modelo: str) -> str | None:
+        """Chave do texto, ou None quando não deve ir para o cache (datas relativas)."""
+        if _RE_DATA_RELATIVA.search(normalizar_nome(texto)):
+            return None
+        versao_prompt = hashlib.sha256(prompt.encode()).hexdigest()
+        return hashlib.sha256(f"{versao_prompt}\0{modelo}\0{texto}".encode()).hexdigest()
+
+    def _conexao(self) -> sqlite3.Connection | None:
+        if not self._caminho:
+            return None
+        if self._db is None:
+            self._db = sqlite3.connect(self._caminho, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (chave TEXT PRIMARY KEY, valor TEXT NOT NULL, expira_em REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM llm_cache WHERE expira_em < ?", (time.time(),))
+            self._db.commit()
+        return self._db
+
+    def _ler_sqlite(self, chave: str) -> str | None:
+        try:
+            with self._lock:
+                linha = self._conexao().execute(
+                    "SELECT valor FROM llm_cache WHERE chave = ? AND expira_em >= ?", (chave, time.time())
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Cache LLM: erro ao ler SQLite: %s", e)
+            return None
+        return linha[0] if linha else None
+
+    def _gravar_sqlite(self, chave: str, valor: str) -> None:
+        try:
+            with self._lock:
+                db = self._conexao()
+                db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (chave, valor, expira_em) VALUES (?, ?, ?)",
+                    (chave, valor, time.time() + self._ttl),
+                )
+                db.commit()
+        except sqlite3.Error as e:
+            logger.warning("Cache LLM: erro ao gravar SQLite: %s", e)
+
+    async def get(self, chave: str | None) -> dict | None:
+        if chave is None:
+            self.ignorados += 1
+            return None
+        valor = self._memoria.get(chave)
+        if valor is None and self._caminho:
+            valor = await asyncio.to_thread(self._ler_sqlite, chave)
+            if valor is not None:
+                self.hits_sqlite += 1
+                self._memoria.set(chave, valor)
+        # Guardado como JSON: cada leitura devolve um dict novo
+        return json.loads(valor) if valor is not None else None
+
+    async def set(self, chave: str | None, resultado: dict) -> None:
+        if chave is None:
+            return
+        valor = json.dumps(resultado, ensure_ascii=False)
+        self._memoria.set(chave, valor)
+        if self._caminho:
+            await asyncio.to_thread(self._gravar_sqlite, chave, valor)
+
+    def fechar(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> dict:
+        return {
+            **self._memoria.stats(),
+            "ignorados_data_relativa": self.ignorados,
+            "hits_sqlite": self.hits_sqlite,
+            "sqlite": self._caminho or None,
+        }
+
+
+cache_interpretacao = CacheInterpretacao(
+    settings.LLM_CACHE_MAX_ENTRIES,
+    settings.LLM_CACHE_TTL_SECONDS,
+    settings.LLM_CACHE_SQLITE_PATH,
+)
@@ -1,12 +1,24 @@
 """
 MVP Gestão Financeira - API FastAPI
 """
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
-from app.routers import clientes, santander, bank, webhook
+from app.routers import clientes, santander, bank, webhook, zapi
 from app.middleware.api_key import APIKeyMiddleware
 from app.config import settings
+from app import db, metrics, tracing
+from app.cache import cache_stats
+from app.dedupe import dedupe_webhook
+from app.openai_client import cliente_openai
+from app.interpretador_local import interpretador_local
+from app.llm_cache import cache_interpretacao
+from app.zapi import enviador_zapi
+from app.api.busca_clientes import indice_clientes
+from conexao_banco import cliente_santander
 
 # Origens CORS: localhost + CORS_ORIGINS (ex.: URL do front na Vercel/Netlify)
 _default_origins = [
@@ -18,10 +30,35 @@ _default_origins = [
 _extra_origins = [o.strip() for o in (settings.CORS_ORIGINS or "").split(",") if o.strip()]
 cors_origins = _default_origins + _extra_origins
 
+tracing.configurar_logs()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tracing.configurar()
+    # Pools HTTP keep-alive abertos uma vez e compartilhados por todas as requisições
+    db.abrir_pools()
+    indice_clientes.aquecer()
+    await cliente_santander.abrir()
+    cliente_openai.abrir()
+    enviador_zapi.abrir()
+    await webhook.fila_webhook.iniciar()
+    yield
+    await webhook.fila_webhook.parar()
+    await enviador_zapi.fechar()
+    await indice_clientes.parar()
+    await cliente_santander.fechar()
+    await cliente_openai.fechar()
+    cache_interpretacao.fechar()
+    await db.fechar_pools()
+    tracing.encerrar()
+
+
 app = FastAPI(
     title="Gestão Financeira Inteligente",
     description="API para clientes, transações, Santander (mTLS) e webhook WhatsApp",
     version="0.2.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(APIKeyMiddleware)
@@ -31,12 +68,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Request-ID"],
 )
+if settings.METRICS_ENABLED:
+    # Por fora do CORS/API key: mede também as respostas 401 e os preflights
+    app.add_middleware(metrics.MetricasHTTPMiddleware)
+# Mais externo: request id (logs, header X-Request-ID) e span raiz valem para toda a pilha
+app.add_middleware(tracing.RequestIdMiddleware)
 
 app.include_router(clientes.router, prefix="/api/clientes", tags=["Clientes"])
 app.include_router(santander.router, prefix="/api/santander", tags=["Santander"])
 app.include_router(bank.router, prefix="/api/bank", tags=["Bank"])
 app.include_router(webhook.router, prefix="/api/webhook", tags=["Webhook"])
+app.include_router(zapi.router, prefix="/api/zapi", tags=["Z-API"])
 
 
 @app.get("/")
@@ -48,3 +92,29 @@ def root():
 def health():
     """Rota para healthcheck (Railway, etc.). Não depende do Supabase."""
     return {"status": "ok"}
+
+
+# Sob /api/: exige X-API-KEY como o resto da API (contadores internos não são públicos)
+@app.get("/api/health/stats", tags=["Health"])
+def health_stats():
+    """Estatísticas internas: pools HTTP (reuso de conexões), caches (hit/miss) e filas."""
+    return {
+        "pools": db.pool_stats(),
+        "cache": cache_stats(),
+        "filas": {webhook.fila_webhook.nome: webhook.fila_webhook.stats()},
+        "webhook_dedupe": dedupe_webhook.stats(),
+        "openai": cliente_openai.stats(),
+        "interpretador_local": interpretador_local.stats(),
+        "llm_cache": cache_interpretacao.stats(),
+        "zapi": enviador_zapi.stats(),
+        "indice_clientes": indice_clientes.stats(),
+        "santander": cliente_santander.stats(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+def metricas():
+    """Métricas no formato texto do Prometheus (histogramas de latência por etapa + gauges)."""
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("", status_code=404)
+    return PlainTextResponse(metrics.exportar(), media_type="text/plain; version=0.0.4")
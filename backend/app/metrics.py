@@ -0,0 +1,215 @@
+"""
+Métricas no formato texto do Prometheus (GET /metrics), sem dependência externa.
+
+- Counter e Histogram com rótulos. Cada thread escreve só no seu próprio shard
+  (threading.local), então registrar não usa lock; a coleta soma os shards.
+  No event loop (rotas async, workers, OpenAI, Z-API) tudo cai num único shard.
+- Gauges são lidos na hora da coleta a partir de funções (ex.: stats() das filas e pools),
+  sem custo no caminho quente.
+- MetricasHTTPMiddleware (ASGI puro) mede as rotas pelo template do path
+  (/api/clientes/{id}), não pela URL, para não explodir a cardinalidade.
+
+Uso: DB_SEGUNDOS.observar(0.012, "clientes", "select", "200")
+     registrar_gauge("fila_profundidade", "Jobs na fila", lambda: {("webhook",): 3}, ("fila",))
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Limites padrão (segundos): de 5 ms (PostgREST em keep-alive) a 60 s (Whisper/GPT)
+BUCKETS_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_metricas: list["_Metrica"] = []
+_gauges: list[tuple[str, str, tuple[str, ...], Callable[[], dict]]] = []
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _rotulos(nomes: tuple[str, ...], valores: tuple, extra: str = "") -> str:
+    partes = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _numero(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple[str, ...] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self._local = threading.local()
+        self._shards: list[dict] = []
+        _metricas.append(self)
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "valores", None)
+        if shard is None:
+            shard = self._local.valores = {}
+            self._shards.append(shard)  # list.append é atômico
+        return shard
+
+    def _cabecalho(self) -> list[str]:
+        return [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+
+
+class Counter(_Metrica):
+    tipo = "counter"
+
+    def inc(self, *rotulos, valor: float = 1) -> None:
+        shard = self._shard()
+        shard[rotulos] = shard.get(rotulos, 0) + valor
+
+    def valores(self) -> dict[tuple, float]:
+        total: dict[tuple, float] = {}
+        for shard in list(self._shards):
+            for chave, v in list(shard.items()):
+                total[chave] = total.get(chave, 0) + v
+        return total
+
+    def exportar(self) -> list[str]:
+        linhas = self._cabecalho()
+        for chave, v in sorted(self.valores().items()):
+            linhas.append(f"{self.nome}{_rotulos(self.rotulos, chave)} {_numero(v)}")
+        return linhas
+
+
+class Histogram(_Metrica):
+    """Buckets não cumulativos por shard ([contagens..., soma]); acumulados só na exportação."""
+
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple[str, ...] = (), buckets: Iterable[float] = BUCKETS_PADRAO):
+        super().__init__(nome, ajuda, rotulos)
+        self.buckets = tuple(sorted(buckets))
+
+    def observar(self, valor: float, *rotulos) -> None:
+        shard = self._shard()
+        serie = shard.get(rotulos)
+        if serie is None:
+            serie = shard[rotulos] = [0] * (len(self.buckets) + 1) + [0.0]
+        serie[bisect_left(self.buckets, valor)] += 1
+        serie[-1] += valor
+
+    def medir(self, *rotulos) -> "_Cronometro":
+        return _Cronometro(self, rotulos)
+
+    def exportar(self) -> list[str]:
+        total: dict[tuple, list] = {}
+        for shard in list(self._shards):
+            for chave, serie in list(shard.items()):
+                acumulado = total.setdefault(chave, [0] * len(serie))
+                for i, v in enumerate(serie):
+                    acumulado[i] += v
+        linhas = self._cabecalho()
+        for chave, serie in sorted(total.items()):
+            cumulativo = 0
+            for limite, n in zip(self.buckets + (float("inf"),), serie[:-1]):
+                cumulativo += n
+                rotulo_le = f'le="{_numero(limite)}"'
+                linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos, chave, rotulo_le)} {cumulativo}")
+            linhas.append(f"{self.nome}_sum{_rotulos(self.rotulos, chave)} {_numero(serie[-1])}")
+            linhas.append(f"{self.nome}_count{_rotulos(self.rotulos, chave)} {cumulativo}")
+        return linhas
+
+
+class _Cronometro:
+    """with HIST.medir("x"): ...  — observa a duração do bloco."""
+
+    def __init__(self, histograma: Histogram, rotulos: tuple):
+        self._histograma = histograma
+        self._rotulos = rotulos
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histograma.observar(time.perf_counter() - self._inicio, *self._rotulos)
+        return False
+
+
+def registrar_gauge(nome: str, ajuda: str, coletar: Callable[[], dict], rotulos: tuple[str, ...] = ()) -> None:
+    """coletar() devolve {(valores dos rótulos): número}; chamado a cada scrape."""
+    _gauges.append((nome, ajuda, rotulos, coletar))
+
+
+def exportar() -> str:
+    """Todas as métricas no formato texto do Prometheus (version 0.0.4)."""
+    linhas: list[str] = []
+    for metrica in _metricas:
+        linhas.extend(metrica.exportar())
+    for nome, ajuda, rotulos, coletar in _gauges:
+        linhas.extend([f"# HELP {nome} {ajuda}", f"# TYPE {nome} gauge"])
+        try:
+            valores = coletar()
+        except Exception:
+            continue  # um gauge com erro não derruba o scrape inteiro
+        for chave, v in sorted(valores.items()):
+            linhas.append(f"{nome}{_rotulos(rotulos, chave)} {_numero(v)}")
+    return "\n".join(linhas) + "\n"
+
+
+# Métricas da aplicação (instrumentadas nos módulos correspondentes)
+HTTP_SEGUNDOS = Histogram("http_request_duration_seconds", "Duração das requisições HTTP", ("method", "route", "status"))
+DB_SEGUNDOS = Histogram("db_request_duration_seconds", "Duração das chamadas ao PostgREST", ("table", "verb", "status"))
+OPENAI_SEGUNDOS = Histogram("openai_request_duration_seconds", "Duração das chamadas à OpenAI (com retries)", ("operation", "model", "status"))
+OPENAI_TOKENS = Counter("openai_tokens_total", "Tokens consumidos na OpenAI", ("model", "kind"))
+SANTANDER_SEGUNDOS = Histogram("santander_request_duration_seconds", "Duração das páginas do extrato Santander", ("status",))
+ZAPI_SEGUNDOS = Histogram("zapi_send_duration_seconds", "Duração dos send-text na Z-API (por tentativa)", ("status",))
+FILA_ESPERA_SEGUNDOS = Histogram("job_queue_wait_seconds", "Tempo dos jobs na fila até um worker pegar", ("queue",))
+FILA_EXECUCAO_SEGUNDOS = Histogram("job_duration_seconds", "Duração da execução dos jobs", ("queue", "status"))
+
+
+class MetricasHTTPMiddleware:
+    """Observa HTTP_SEGUNDOS por método, template da rota e status (ASGI puro)."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._templates: dict = {}
+
+    def _template(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "desconhecida"  # 404 etc.: um rótulo só
+        template = self._templates.get(endpoint)
+        if template is None:
+            app = scope.get("app")
+            for rota in getattr(app, "routes", ()):
+                if getattr(rota, "endpoint", None) is endpoint:
+                    template = rota.path
+                    break
+            else:
+                template = getattr(endpoint, "__name__", "desconhecida")
+            self._templates[endpoint] = template
+        return template
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        inicio = time.perf_counter()
+
+        async def send_com_status(mensagem: Message) -> None:
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, send_com_status)
+        finally:
+            HTTP_SEGUNDOS.observar(time.perf_counter() - inicio, scope["method"], self._template(scope), str(status))
@@ -1,31 +1,59 @@
 """
 Middleware que exige o header X-API-KEY em todas as rotas /api/, exceto no webhook
 (que usa validação própria com ZAPI_SECURITY_TOKEN).
+
+ASGI puro (sem BaseHTTPMiddleware): não cria task nem reempacota o corpo da resposta,
+então streaming (ex.: export da contabilidade) passa direto. As chaves são lidas uma vez,
+quando o app monta a pilha de middlewares. API_KEY aceita várias chaves separadas por
+vírgula (rotação: publique a nova, troque os clientes, remova a antiga); a comparação
+é em tempo constante.
 """
+import hmac
 import os
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
+_HEADER = b"x-api-key"
 
-class APIKeyMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        path = request.scope.get("path") or ""
-        if not path.startswith("/api/"):
-            return await call_next(request)
 
-        # Webhook: não exige X-API-KEY aqui; a rota valida ZAPI_SECURITY_TOKEN
-        if path.startswith("/api/webhook/"):
-            return await call_next(request)
+def ler_chaves() -> tuple[bytes, ...]:
+    """Chaves válidas de API_KEY (separadas por vírgula); vazio = API sem proteção."""
+    return tuple(c.strip().encode() for c in (os.getenv("API_KEY") or "").split(",") if c.strip())
+
 
-        api_key = (os.getenv("API_KEY") or "").strip()
-        if not api_key:
-            return await call_next(request)
+class APIKeyMiddleware:
+    def __init__(self, app: ASGIApp, chaves: tuple[bytes, ...] | None = None):
+        self.app = app
+        self._chaves = ler_chaves() if chaves is None else chaves
+
+    def _chave_valida(self, recebida: bytes) -> bool:
+        # Compara com todas as chaves (sem sair na primeira) para não vazar qual bateu
+        valida = False
+        for chave in self._chaves:
+            valida |= hmac.compare_digest(recebida, chave)
+        return valida
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._chaves:
+            await self.app(scope, receive, send)
+            return
+        path = scope.get("path") or ""
+        # Webhook: não exige X-API-KEY aqui; a rota valida ZAPI_SECURITY_TOKEN
+        if not path.startswith("/api/") or path.startswith("/api/webhook/"):
+            await self.app(scope, receive, send)
+            return
 
-        received = (request.headers.get("X-API-KEY") or "").strip()
-        if received != api_key:
-            return JSONResponse(
+        recebida = b""
+        for nome, valor in scope["headers"]:
+            if nome == _HEADER:
+                recebida = valor.strip()
+                break
+        if not self._chave_valida(recebida):
+            resposta = JSONResponse(
                 status_code=401,
                 content={"detail": "Header X-API-KEY inválido ou ausente"},
             )
-        return await call_next(request)
+            await resposta(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
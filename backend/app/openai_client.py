@@ -0,0 +1,167 @@
+"""
+Cliente OpenAI assíncrono compartilhado (GPT e Whisper do webhook).
+
+- AsyncOpenAI sobre um httpx.AsyncClient com pool keep-alive (aberto/fechado no lifespan).
+- Semáforo limita as chamadas simultâneas ao modelo (OPENAI_MAX_CONCURRENCY).
+- Prazo total por chamada (OPENAI_TIMEOUT_SECONDS), incluindo as novas tentativas.
+- Retry com backoff exponencial + jitter em 429, 5xx e erros de conexão/timeout;
+  o retry interno do SDK fica desligado para não multiplicar tentativas.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable
+
+import httpx
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI, RateLimitError
+
+from app.config import settings
+from app.metrics import OPENAI_SEGUNDOS, OPENAI_TOKENS, registrar_gauge
+from app.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+def _deve_repetir(erro: Exception) -> bool:
+    if isinstance(erro, (RateLimitError, APIConnectionError, asyncio.TimeoutError)):
+        return True
+    return isinstance(erro, APIStatusError) and erro.status_code >= 500
+
+
+def _status_metrica(erro: Exception) -> str:
+    if isinstance(erro, APIStatusError):
+        return str(erro.status_code)
+    return "timeout" if isinstance(erro, asyncio.TimeoutError) else "erro"
+
+
+def _retry_after(erro: Exception) -> float | None:
+    """Segundos pedidos pelo servidor no header Retry-After (429), se houver."""
+    resposta = getattr(erro, "response", None)
+    try:
+        return float(resposta.headers.get("retry-after")) if resposta is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class ClienteOpenAI:
+    def __init__(self):
+        self._http: httpx.AsyncClient | None = None
+        self._client: AsyncOpenAI | None = None
+        self._semaforo: asyncio.Semaphore | None = None
+        self.chamadas = 0
+        self.tentativas_extras = 0
+        self.falhas = 0
+        self.prazos_estourados = 0
+        self._em_andamento = 0
+
+    @property
+    def configurado(self) -> bool:
+        return bool(os.getenv("OPENAI_API_KEY"))
+
+    def abrir(self) -> AsyncOpenAI:
+        if self._client is None:
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.OPENAI_TIMEOUT_SECONDS, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=settings.OPENAI_MAX_CONCURRENCY,
+                    max_keepalive_connections=settings.OPENAI_MAX_CONCURRENCY,
+                    keepalive_expiry=60.0,
+                ),
+            )
+            self._client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY") or "",
+                http_client=self._http,
+                max_retries=0,
+            )
+            self._semaforo = asyncio.Semaphore(max(1, settings.OPENAI_MAX_CONCURRENCY))
+        return self._client
+
+    async def fechar(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+        self._client = None
+        self._semaforo = None
+
+    async def _chamar(self, operacao: Callable[[AsyncOpenAI], Awaitable[Any]], nome: str, modelo: str) -> Any:
+        """Executa operacao(client) e registra duração total (com retries) e tokens por modelo."""
+        inicio = time.perf_counter()
+        status = "ok"
+        with span(f"openai.{nome}", modelo=modelo) as sp:
+            try:
+                resposta = await self._chamar_com_retry(operacao)
+            except Exception as e:
+                status = _status_metrica(e)
+                raise
+            finally:
+                OPENAI_SEGUNDOS.observar(time.perf_counter() - inicio, nome, modelo, status)
+            uso = getattr(resposta, "usage", None)
+            if uso is not None:
+                prompt, completion = getattr(uso, "prompt_tokens", 0) or 0, getattr(uso, "completion_tokens", 0) or 0
+                OPENAI_TOKENS.inc(modelo, "prompt", valor=prompt)
+                OPENAI_TOKENS.inc(modelo, "completion", valor=completion)
+                sp.set_attribute("tokens.prompt", prompt)
+                sp.set_attribute("tokens.completion", completion)
+        return resposta
+
+    async def _chamar_com_retry(self, operacao: Callable[[AsyncOpenAI], Awaitable[Any]]) -> Any:
+        """
+        Executa operacao(client) com limite de concorrência, prazo total e retry. O semáforo
+        vale só durante cada tentativa: no backoff (ex.: 429) a vaga fica livre para outras chamadas.
+        """
+        client = self.abrir()
+        self.chamadas += 1
+        prazo = time.monotonic() + settings.OPENAI_TIMEOUT_SECONDS
+        tentativa = 0
+        while True:
+            try:
+                async with self._semaforo:
+                    restante = prazo - time.monotonic()
+                    if restante <= 0:
+                        raise asyncio.TimeoutError()
+                    self._em_andamento += 1
+                    try:
+                        return await asyncio.wait_for(operacao(client), restante)
+                    finally:
+                        self._em_andamento -= 1
+            except Exception as e:
+                tentativa += 1
+                espera = min(
+                    settings.OPENAI_BACKOFF_MAX_SECONDS,
+                    _retry_after(e) or settings.OPENAI_BACKOFF_BASE_SECONDS * 2 ** (tentativa - 1),
+                )
+                espera = random.uniform(espera / 2, espera)
+                if (
+                    not _deve_repetir(e)
+                    or tentativa > settings.OPENAI_MAX_RETRIES
+                    or time.monotonic() + espera >= prazo
+                ):
+                    self.falhas += 1
+                    if isinstance(e, asyncio.TimeoutError):
+                        self.prazos_estourados += 1
+                    raise
+                self.tentativas_extras += 1
+                logger.info("OpenAI: %s; nova tentativa %d em %.2fs", type(e).__name__, tentativa, espera)
+                await asyncio.sleep(espera)
+
+    async def chat(self, **kwargs) -> Any:
+        return await self._chamar(lambda c: c.chat.completions.create(**kwargs), "chat", kwargs.get("model", ""))
+
+    async def transcrever(self, **kwargs) -> Any:
+        return await self._chamar(lambda c: c.audio.transcriptions.create(**kwargs), "transcricao", kwargs.get("model", ""))
+
+    def stats(self) -> dict:
+        return {
+            "max_concorrencia": settings.OPENAI_MAX_CONCURRENCY,
+            "em_andamento": self._em_andamento,
+            "chamadas": self.chamadas,
+            "tentativas_extras": self.tentativas_extras,
+            "falhas": self.falhas,
+            "prazos_estourados": self.prazos_estourados,
+        }
+
+
+cliente_openai = ClienteOpenAI()
+registrar_gauge("openai_in_flight", "Chamadas à OpenAI em andamento", lambda: {(): cliente_openai.stats()["em_andamento"]})
@@ -10,14 +10,15 @@ router = APIRouter()
 
 
 @router.post("/sync")
-async def bank_sync(dias: int = 30):
+async def bank_sync(dias: int = 30, completo: bool = False):
     """
     Busca o extrato de PIX no Santander (certificados privada.key + .crt em backend/certs/).
+    Incremental: só o que entrou desde a última sincronização (completo=true refaz os últimos `dias`).
     Para cada entrada PIX, verifica se existe cliente correspondente no Supabase (valor + nome).
     Se houver match, insere na tabela transacoes.
     """
     try:
-        return await sincronizar_santander_com_supabase(dias=dias)
+        return await sincronizar_santander_com_supabase(dias=dias, completo=completo)
     except FileNotFoundError as e:
         raise HTTPException(
             status_code=503,
@@ -1,16 +1,34 @@
+import base64
+import csv
+import itertools
+import json
+import zlib
 from datetime import date
-from fastapi import APIRouter, HTTPException
-from app.db import get_supabase
+from io import StringIO
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.db import get_supabase, valor_postgrest
+from app.cache import respostas_clientes, invalidar_cache_clientes, etag_de, etag_confere
+from app.api.busca_clientes import indice_clientes
 from app.models.schemas import ClienteCreate, ClienteUpdate, ClienteResponse
 
 router = APIRouter()
 
+# Colunas de clientes no banco (status_pagamento é calculado)
+_COLUNAS_CLIENTES = ("id", "nome", "documento_cpf_cnpj", "valor_mensalidade", "dia_vencimento", "status_ativo")
+# Linhas de transacoes por página na exportação CSV
+_PAGINA_EXPORT = 1000
+# Ids pagos no mês enviados como filtro id=in./not.in. (~45 bytes por id na URL: 300 ids
+# ~ 14 KB, abaixo do limite de ~16 KB de URL do proxy na frente do Supabase). Acima disso o
+# filtro volta a ser feito aqui, página a página
+_MAX_IDS_FILTRO = 300
 
-def _status_pagamento(cliente_id: str, dia_vencimento: int, transacoes_mes: list) -> str:
-    """Calcula status: pago, pendente, atrasado."""
+
+def _status_pagamento(cliente_id: str, dia_vencimento: int, pagos: set[str]) -> str:
+    """Calcula status: pago, pendente, atrasado. pagos = ids com pagamento no mês."""
     hoje = date.today()
-    tem_pagamento = any(str(t.get("cliente_id")) == str(cliente_id) for t in transacoes_mes)
-    if tem_pagamento:
+    if str(cliente_id) in pagos:
         return "pago"
     # Dia de vencimento neste mês (simplificado: usar dia fixo)
     if dia_vencimento > 28:
@@ -24,10 +42,19 @@ def _status_pagamento(cliente_id: str, dia_vencimento: int, transacoes_mes: list
     return "pendente"
 
 
-def _row_to_cliente(row: dict, transacoes_mes: list) -> ClienteResponse:
+def _nao_modificado(request: Request, response: Response, etag: str) -> Response | None:
+    """Define ETag na resposta; devolve um 304 pronto se o If-None-Match do cliente bater."""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_confere(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def _row_to_cliente(row: dict, pagos: set[str]) -> ClienteResponse:
     cid = str(row["id"])
     dia = int(row.get("dia_vencimento") or 10)
-    status = _status_pagamento(cid, dia, transacoes_mes)
+    status = _status_pagamento(cid, dia, pagos)
     return ClienteResponse(
         id=cid,
         nome=row["nome"],
@@ -39,107 +66,269 @@ def _row_to_cliente(row: dict, transacoes_mes: list) -> ClienteResponse:
     )
 
 
+def _pagos_no_mes(hoje: date) -> set[str]:
+    """Ids de clientes com pagamento no mês (hash set, em cache até a próxima escrita)."""
+    def calcular():
+        supabase = get_supabase()
+        inicio_mes = hoje.replace(day=1)
+        r = supabase.table("transacoes").select("cliente_id").gte("data_pagamento", str(inicio_mes)).lte("data_pagamento", str(hoje)).execute()
+        return {str(t["cliente_id"]) for t in (r.data or [])}
+    return respostas_clientes.get_or_set(("pagos_no_mes", hoje), calcular)
+
+
+def _codificar_cursor(row: dict) -> str:
+    bruto = json.dumps([row["nome"], str(row["id"])], ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def _decodificar_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        nome, cid = json.loads(bruto)
+        return str(nome), str(cid)
+    except Exception:
+        raise HTTPException(status_code=400, detail="cursor inválido")
+
+
+def _parse_fields(fields: str | None) -> list[str] | None:
+    if not fields:
+        return None
+    campos = [f.strip() for f in fields.split(",") if f.strip()]
+    invalidos = [f for f in campos if f not in ClienteResponse.model_fields]
+    if invalidos:
+        raise HTTPException(status_code=400, detail=f"fields inválidos: {', '.join(invalidos)}")
+    return campos
+
+
+def _listar_clientes(
+    hoje: date,
+    limit: int | None,
+    cursor: str | None,
+    status_ativo: bool | None,
+    status_pagamento: str | None,
+    campos: list[str] | None,
+) -> tuple[list, str | None]:
+    """
+    Página de clientes ordenada por (nome, id). Keyset: cada página continua após o
+    (nome, id) do cursor, então o custo por página não cresce com o offset.
+    Retorna (itens, próximo cursor ou None).
+    """
+    supabase = get_supabase()
+    pagos = _pagos_no_mes(hoje)
+
+    if campos is None:
+        colunas = "*"
+    else:
+        # id/nome sustentam o cursor; dia_vencimento entra no cálculo do status
+        necessarias = {"id", "nome", "dia_vencimento"} | {c for c in campos if c in _COLUNAS_CLIENTES}
+        colunas = ",".join(c for c in _COLUNAS_CLIENTES if c in necessarias)
+
+    # pago/pendente/atrasado dependem de ter pagamento no mês: o banco filtra pelos ids pagos
+    filtro_no_banco = status_pagamento is None or len(pagos) <= _MAX_IDS_FILTRO
+    ids_pagos = sorted(pagos) if status_pagamento and filtro_no_banco else []
+    if status_pagamento == "pago" and not pagos:
+        return [], None
+
+    def passa(row: dict) -> bool:
+        if filtro_no_banco:
+            return True
+        return (str(row["id"]) in pagos) == (status_pagamento == "pago")
+
+    def serializar(row: dict):
+        cliente = _row_to_cliente(row, pagos)
+        if campos is None:
+            return cliente
+        return cliente.model_dump(include=set(campos))
+
+    posicao = _decodificar_cursor(cursor) if cursor else None
+    tamanho = limit + 1 if limit else None
+    itens: list = []
+    ultimo = None
+    while True:
+        q = supabase.table("clientes").select(colunas).order("nome").order("id")
+        if status_ativo is not None:
+            q = q.eq("status_ativo", status_ativo)
+        # Vencimento 1-28: atrasado se o dia já passou no mês, pendente caso contrário
+        if status_pagamento == "atrasado":
+            q = q.lt("dia_vencimento", hoje.day)
+        elif status_pagamento == "pendente":
+            q = q.gte("dia_vencimento", hoje.day)
+        if ids_pagos:
+            q = q.in_("id", ids_pagos) if status_pagamento == "pago" else q.not_in("id", ids_pagos)
+        if posicao:
+            nome, cid = valor_postgrest(posicao[0]), valor_postgrest(posicao[1])
+            q = q.or_(f"nome.gt.{nome},and(nome.eq.{nome},id.gt.{cid})")
+        if tamanho:
+            q = q.limit(tamanho)
+        rows = q.execute().data or []
+        for row in rows:
+            posicao = (row["nome"], str(row["id"]))
+            if not passa(row):
+                continue
+            if limit and len(itens) == limit:
+                return itens, _codificar_cursor(ultimo)
+            itens.append(serializar(row))
+            ultimo = row
+        if not tamanho or len(rows) < tamanho:
+            return itens, None
+
+
 @router.get("", response_model=list[ClienteResponse])
-def listar_clientes():
+def listar_clientes(
+    request: Request,
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=500, description="Tamanho da página (sem limit: lista completa)"),
+    cursor: str | None = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    status_ativo: bool | None = None,
+    status_pagamento: Literal["pago", "pendente", "atrasado"] | None = None,
+    fields: str | None = Query(None, description="Campos separados por vírgula, ex.: id,nome,status_pagamento"),
+):
+    """
+    Lista clientes ordenados por nome. Paginação por cursor (keyset em nome,id): o header
+    X-Next-Cursor traz o cursor da próxima página. fields= devolve só os campos pedidos.
+    """
+    campos = _parse_fields(fields)
+
+    def calcular():
+        itens, proximo = _listar_clientes(hoje, limit, cursor, status_ativo, status_pagamento, campos)
+        # ETag da página calculado uma vez e guardado junto (hits do cache não re-serializam)
+        conteudo = [i.model_dump(mode="json") if isinstance(i, ClienteResponse) else i for i in itens]
+        return itens, proximo, etag_de(conteudo, proximo)
+
     try:
-        supabase = get_supabase()
         hoje = date.today()
-        inicio_mes = hoje.replace(day=1)
-        r_trans = supabase.table("transacoes").select("cliente_id").gte("data_pagamento", str(inicio_mes)).lte("data_pagamento", str(hoje)).execute()
-        transacoes_mes = r_trans.data or []
-        r = supabase.table("clientes").select("*").order("nome").execute()
-        return [_row_to_cliente(row, transacoes_mes) for row in (r.data or [])]
+        chave = ("listar_clientes", hoje, limit, cursor, status_ativo, status_pagamento, tuple(campos or ()))
+        itens, proximo, etag = respostas_clientes.get_or_set(chave, calcular)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    nao_modificado = _nao_modificado(request, response, etag)
+    if nao_modificado:
+        return nao_modificado
+    if proximo:
+        response.headers["X-Next-Cursor"] = proximo
+    if campos is not None:
+        return JSONResponse(content=itens, headers=dict(response.headers))
+    return itens
+
+
+def _dashboard_kpis(hoje: date) -> dict:
+    supabase = get_supabase()
+    r = supabase.rpc("dashboard_kpis", {"p_hoje": str(hoje)}).execute()
+    kpis = r.data or {}
+    return {
+        "total_recebido": round(float(kpis.get("total_recebido") or 0), 2),
+        "notas_a_emitir": int(kpis.get("notas_a_emitir") or 0),
+        "clientes_inadimplentes": int(kpis.get("clientes_inadimplentes") or 0),
+    }
 
 
 @router.get("/dashboard")
-def dashboard_kpis():
-    """KPIs: total_recebido, notas_a_emitir, clientes_inadimplentes."""
+def dashboard_kpis(request: Request, response: Response):
+    """
+    KPIs: total_recebido, notas_a_emitir, clientes_inadimplentes.
+    Agregados no banco pela função dashboard_kpis (supabase/migrations/006_dashboard_kpis.sql).
+    """
     try:
-        supabase = get_supabase()
         hoje = date.today()
-        inicio_mes = hoje.replace(day=1)
-        # Total recebido no mês
-        r_trans = supabase.table("transacoes").select("valor").gte("data_pagamento", str(inicio_mes)).lte("data_pagamento", str(hoje)).execute()
-        total_recebido = sum(float(t.get("valor") or 0) for t in (r_trans.data or []))
-        # Notas a emitir = transações com status_nota_fiscal = pendente
-        r_notas = supabase.table("transacoes").select("id").eq("status_nota_fiscal", "pendente").execute()
-        notas_a_emitir = len(r_notas.data or [])
-        # Clientes ativos + transações do mês para calcular inadimplentes
-        r_clientes = supabase.table("clientes").select("id, dia_vencimento").eq("status_ativo", True).execute()
-        r_trans_mes = supabase.table("transacoes").select("cliente_id").gte("data_pagamento", str(inicio_mes)).lte("data_pagamento", str(hoje)).execute()
-        pagos = {str(t["cliente_id"]) for t in (r_trans_mes.data or [])}
-        inadimplentes = 0
-        for c in (r_clientes.data or []):
-            cid = str(c["id"])
-            if cid in pagos:
-                continue
-            dia = int(c.get("dia_vencimento") or 28)
-            try:
-                venc = hoje.replace(day=min(dia, 28))
-            except ValueError:
-                venc = hoje.replace(day=28)
-            if hoje > venc:
-                inadimplentes += 1
-        return {
-            "total_recebido": round(total_recebido, 2),
-            "notas_a_emitir": notas_a_emitir,
-            "clientes_inadimplentes": inadimplentes,
-        }
+        kpis = respostas_clientes.get_or_set(("dashboard_kpis", hoje), lambda: _dashboard_kpis(hoje))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return _nao_modificado(request, response, etag_de(kpis)) or kpis
+
+
+def _paginas_transacoes(supabase, data_inicio: date | None, data_fim: date | None):
+    """Páginas de transacoes (data_pagamento desc, id desc) via keyset: memória constante por página."""
+    posicao = None
+    while True:
+        q = (
+            supabase.table("transacoes")
+            .select("id, data_pagamento, valor, cliente_id")
+            .order("data_pagamento", asc=False)
+            .order("id", asc=False)
+        )
+        if data_inicio:
+            q = q.gte("data_pagamento", str(data_inicio))
+        if data_fim:
+            q = q.lte("data_pagamento", str(data_fim))
+        if posicao:
+            data, tid = valor_postgrest(posicao[0]), valor_postgrest(posicao[1])
+            q = q.or_(f"data_pagamento.lt.{data},and(data_pagamento.eq.{data},id.lt.{tid})")
+        rows = q.limit(_PAGINA_EXPORT).execute().data or []
+        if rows:
+            yield rows
+        if len(rows) < _PAGINA_EXPORT:
+            return
+        posicao = (rows[-1]["data_pagamento"], str(rows[-1]["id"]))
+
+
+def _csv_contabilidade(primeira: list[dict], paginas, clientes_map: dict, compactar: bool):
+    """Gera o CSV em blocos (um por página de transacoes), opcionalmente já em gzip."""
+    gz = zlib.compressobj(wbits=31) if compactar else None
+
+    def saida(texto: str) -> bytes:
+        dados = texto.encode("utf-8")
+        return gz.compress(dados) if gz else dados
+
+    buf = StringIO()
+    w = csv.writer(buf)
+    w.writerow(["Data", "Cliente", "Valor", "Documento"])
+    for pagina in itertools.chain([primeira] if primeira else [], paginas):
+        for t in pagina:
+            nome, doc = clientes_map.get(str(t["cliente_id"]), ("", ""))
+            w.writerow([t.get("data_pagamento"), nome, t.get("valor"), doc])
+        bloco = saida(buf.getvalue())
+        buf.seek(0)
+        buf.truncate()
+        if bloco:
+            yield bloco
+    if buf.getvalue():
+        yield saida(buf.getvalue())
+    if gz:
+        yield gz.flush()
 
 
 @router.get("/export/contabilidade")
-def exportar_contabilidade():
-    """CSV para contabilidade: Data, Cliente, Valor, Documento."""
-    import csv
-    from io import StringIO
-    from fastapi.responses import StreamingResponse
+def exportar_contabilidade(
+    data_inicio: date | None = Query(None, description="Filtra data_pagamento >= (YYYY-MM-DD)"),
+    data_fim: date | None = Query(None, description="Filtra data_pagamento <= (YYYY-MM-DD)"),
+    gzip: bool = Query(False, description="Entrega contabilidade.csv.gz"),
+):
+    """
+    CSV para contabilidade: Data, Cliente, Valor, Documento.
+    Transmitido em blocos conforme as páginas de transacoes chegam (memória limitada
+    mesmo para exportações de vários anos).
+    """
     try:
         supabase = get_supabase()
-        r_trans = supabase.table("transacoes").select("data_pagamento, valor, cliente_id").order("data_pagamento", asc=False).execute()
-        trans = r_trans.data or []
-        if not trans:
-            return StreamingResponse(
-                iter(["Data,Cliente,Valor,Documento\n"]),
-                media_type="text/csv",
-                headers={"Content-Disposition": "attachment; filename=contabilidade.csv"},
-            )
-        cliente_ids = list({t["cliente_id"] for t in trans})
+        paginas = _paginas_transacoes(supabase, data_inicio, data_fim)
+        # Primeira página antes de responder: erro de banco ainda vira 500, não CSV truncado
+        primeira = next(paginas, [])
         clientes_map = {}
-        r_clientes = supabase.table("clientes").select("id, nome, documento_cpf_cnpj").execute()
-        for c in (r_clientes.data or []):
-            if str(c["id"]) in [str(cid) for cid in cliente_ids]:
+        if primeira:
+            r_clientes = supabase.table("clientes").select("id, nome, documento_cpf_cnpj").execute()
+            for c in (r_clientes.data or []):
                 clientes_map[str(c["id"])] = (c.get("nome") or "", c.get("documento_cpf_cnpj") or "")
-        buf = StringIO()
-        w = csv.writer(buf)
-        w.writerow(["Data", "Cliente", "Valor", "Documento"])
-        for t in trans:
-            nome, doc = clientes_map.get(str(t["cliente_id"]), ("", ""))
-            w.writerow([t.get("data_pagamento"), nome, t.get("valor"), doc])
-        buf.seek(0)
+        nome_arquivo = "contabilidade.csv.gz" if gzip else "contabilidade.csv"
         return StreamingResponse(
-            iter([buf.getvalue()]),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=contabilidade.csv"},
+            _csv_contabilidade(primeira, paginas, clientes_map, gzip),
+            media_type="application/gzip" if gzip else "text/csv",
+            headers={"Content-Disposition": f"attachment; filename={nome_arquivo}"},
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{id}", response_model=ClienteResponse)
-def obter_cliente(id: str):
+def obter_cliente(id: str, request: Request, response: Response):
     try:
         supabase = get_supabase()
         r = supabase.table("clientes").select("*").eq("id", id).single().execute()
         if not r.data:
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
-        hoje = date.today()
-        inicio_mes = hoje.replace(day=1)
-        r_trans = supabase.table("transacoes").select("cliente_id").gte("data_pagamento", str(inicio_mes)).lte("data_pagamento", str(hoje)).execute()
-        return _row_to_cliente(r.data, r_trans.data or [])
+        cliente = _row_to_cliente(r.data, _pagos_no_mes(date.today()))
+        return _nao_modificado(request, response, etag_de(cliente.model_dump(mode="json"))) or cliente
     except HTTPException:
         raise
     except Exception as e:
@@ -158,7 +347,9 @@ def criar_cliente(payload: ClienteCreate):
             "status_ativo": payload.status_ativo,
         }
         r = supabase.table("clientes").insert(data).select().single().execute()
-        return _row_to_cliente(r.data, [])
+        invalidar_cache_clientes()
+        indice_clientes.atualizar(r.data)
+        return _row_to_cliente(r.data, set())
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -174,13 +365,13 @@ def atualizar_cliente(id: str, payload: ClienteUpdate):
             r = supabase.table("clientes").select("*").eq("id", id).single().execute()
             if not r.data:
                 raise HTTPException(status_code=404, detail="Cliente não encontrado")
-            r_trans = supabase.table("transacoes").select("cliente_id").gte("data_pagamento", str(date.today().replace(day=1))).lte("data_pagamento", str(date.today())).execute()
-            return _row_to_cliente(r.data, r_trans.data or [])
+            return _row_to_cliente(r.data, _pagos_no_mes(date.today()))
         r = supabase.table("clientes").update(data).eq("id", id).select().single().execute()
+        invalidar_cache_clientes()
+        indice_clientes.atualizar(r.data)
         if not r.data:
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
-        r_trans = supabase.table("transacoes").select("cliente_id").gte("data_pagamento", str(date.today().replace(day=1))).lte("data_pagamento", str(date.today())).execute()
-        return _row_to_cliente(r.data, r_trans.data or [])
+        return _row_to_cliente(r.data, _pagos_no_mes(date.today()))
     except HTTPException:
         raise
     except Exception as e:
@@ -192,5 +383,7 @@ def excluir_cliente(id: str):
     try:
         supabase = get_supabase()
         supabase.table("clientes").delete().eq("id", id).execute()
+        invalidar_cache_clientes()
+        indice_clientes.remover(id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
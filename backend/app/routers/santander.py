@@ -1,11 +1,25 @@
 """
 Sincronização com Santander Sandbox: busca extrato e atualiza status dos clientes (Pago/Pendente).
 """
+from datetime import date
+
 from fastapi import APIRouter, HTTPException
-from app.db import get_supabase
-from app.santander_api import buscar_extrato
+from fastapi.responses import JSONResponse
+from app.db import get_supabase_async
+from app.cache import invalidar_cache_clientes
+from app.santander_api import SANTANDER_EXTRATO_URL, iterar_extrato
+from app.api.sync_cursor import gravar_cursor, inicio_janela, ler_cursor
+from conexao_banco import cliente_santander
 
 router = APIRouter()
+_CONTA_CURSOR = "santander_legado"
+
+
+@router.get("/health")
+async def santander_health():
+    """Sonda do cliente mTLS: certificados carregados e conexão até a API do Santander (503 se falhar)."""
+    saude = await cliente_santander.saude(SANTANDER_EXTRATO_URL)
+    return JSONResponse(saude, status_code=200 if saude["ok"] else 503)
 
 
 @router.post("/sincronizar")
@@ -14,14 +28,21 @@ async def sincronizar_santander():
     Busca o extrato no Santander Sandbox e marca como 'Pago' os clientes
     cujo PIX foi encontrado no extrato (por valor ou identificação).
     """
+    # Incremental: cursor próprio, separado do usado por /api/bank/sync
+    hoje = date.today()
+    cursor = await ler_cursor(_CONTA_CURSOR)
+    extrato_lido = False
     try:
-        transacoes = await buscar_extrato(dias=30)
+        transacoes = [t async for t in iterar_extrato(dias=30, desde=inicio_janela(cursor, 30, hoje))]
+        extrato_lido = True
+    except FileNotFoundError:
+        transacoes = []
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"Erro ao conectar no Santander: {e}")
 
     try:
-        supabase = get_supabase()
-        r = supabase.table("clientes").select("id, nome, valor_esperado, chave_pix, status").execute()
+        supabase = get_supabase_async()
+        r = await supabase.table("clientes").select("id, nome, valor_esperado, chave_pix, status").execute()
         clientes = r.data or []
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar clientes: {e}")
@@ -36,8 +57,12 @@ async def sincronizar_santander():
             continue
         valor_esperado = c.get("valor_esperado")
         if valor_esperado is not None and (valor_esperado in pix_valores or -valor_esperado in pix_valores):
-            supabase.table("clientes").update({"status": "Pago"}).eq("id", c["id"]).execute()
+            await supabase.table("clientes").update({"status": "Pago"}).eq("id", c["id"]).execute()
             atualizados += 1
+    if atualizados:
+        invalidar_cache_clientes()
+    if extrato_lido:
+        await gravar_cursor(_CONTA_CURSOR, hoje, None)
 
     return {
         "message": "Sincronização concluída",
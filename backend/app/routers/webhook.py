@@ -6,25 +6,41 @@ Aceita também payload no formato Evolution API para compatibilidade.
 """
 import os
 import re
+import json
+import asyncio
 import base64
-import tempfile
+import hashlib
 import logging
 from datetime import date
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-from openai import OpenAI
 import httpx
 
-from app.db import get_supabase
+from app.db import get_supabase_async
+from app.cache import TTLCache, invalidar_cache_clientes
+from app.config import settings
+from app.jobs import FilaJobs
+from app.dedupe import dedupe_webhook, extrair_id_mensagem
+from app.openai_client import cliente_openai
+from app.interpretador_local import interpretador_local
+from app.llm_cache import cache_interpretacao
+from app.zapi import enviador_zapi
+from app.api.busca_clientes import indice_clientes
+from app.tracing import rastrear
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
-client_openai = OpenAI(api_key=os.getenv("OPENAI_API_KEY") or "")
+# Workers que processam as mensagens fora do ciclo da requisição (iniciados no lifespan do app)
+fila_webhook = FilaJobs("webhook", settings.WEBHOOK_WORKERS, settings.WEBHOOK_QUEUE_SIZE)
+# Transcrições por SHA-256 do áudio: o mesmo áudio reenviado não volta ao Whisper
+transcricoes = TTLCache("transcricoes_audio", settings.TRANSCRICAO_CACHE_MAX_ENTRIES, settings.TRANSCRICAO_CACHE_TTL_SECONDS)
 
 # Payload genérico (Z-API principal; formato Evolution aceito opcionalmente)
 class WebhookWhatsAppBody(BaseModel):
     pass  # aceita qualquer JSON
 
+_MODELO_GPT = "gpt-4o"
+
 SYSTEM_PROMPT = """Você é um assistente de gestão financeira. Extraia dados do texto do usuário e responda APENAS com um JSON válido (sem markdown, sem explicação).
 
 Ações possíveis:
@@ -144,67 +160,41 @@ def _extrair_phone_resposta(body: dict) -> str | None:
     return None
 
 
-def _get_zapi_base_url() -> str:
-    """Base da Z-API (sem /send-text). Usa ZAPI_BASE_URL ou monta com ZAPI_INSTANCE_ID + ZAPI_INSTANCE_TOKEN."""
-    base = (os.getenv("ZAPI_BASE_URL") or "").strip().rstrip("/")
-    if base:
-        return base
-    instance_id = (os.getenv("ZAPI_INSTANCE_ID") or "").strip()
-    instance_token = (os.getenv("ZAPI_INSTANCE_TOKEN") or "").strip()
-    if instance_id and instance_token:
-        return f"https://api.z-api.io/instances/{instance_id}/token/{instance_token}"
-    return ""
-
-
-def _enviar_zapi_text(phone: str, message: str) -> bool:
-    """
-    Envia texto via Z-API send-text (doc: developer.z-api.io/en/message/send-message-text).
-    POST {base}/send-text | Header: Client-Token (obrigatório se ativado) | Body: {"phone": "...", "message": "..."}.
-    """
-    base = _get_zapi_base_url()
-    if not base or not phone or not message:
-        if not base:
-            logger.warning("Z-API: base URL vazia. Defina ZAPI_BASE_URL ou ZAPI_INSTANCE_ID + ZAPI_INSTANCE_TOKEN no Railway.")
-        return False
-    url = f"{base}/send-text"
-    headers = {"Content-Type": "application/json"}
-    client_token = (os.getenv("ZAPI_CLIENT_TOKEN") or "").strip()
-    if client_token:
-        headers["Client-Token"] = client_token
-    else:
-        logger.warning("Z-API: ZAPI_CLIENT_TOKEN não definido. Doc exige header Client-Token (Account security token). Defina no Railway.")
-    try:
-        with httpx.Client(timeout=15.0) as client:
-            r = client.post(url, json={"phone": phone, "message": message}, headers=headers)
-            if r.status_code != 200:
-                logger.warning("Z-API send-text falhou: status=%s body=%s", r.status_code, r.text[:200])
-            return r.status_code == 200
-    except Exception as e:
-        logger.warning("Z-API send-text exceção: %s", e)
-        return False
-
-
-def _transcrever_audio(b64_ogg: str) -> str:
-    if not client_openai.api_key:
+@rastrear("webhook.transcrever_audio")
+async def _transcrever_audio(b64_ogg: str) -> str:
+    if not cliente_openai.configurado:
+        return ""
+    # Tamanho decodificado estimado pelo base64 (4 chars -> 3 bytes): rejeita antes de decodificar
+    if len(b64_ogg) * 3 // 4 > settings.WHISPER_MAX_AUDIO_BYTES:
+        logger.warning("Webhook: áudio de ~%d bytes acima do limite do Whisper; ignorado", len(b64_ogg) * 3 // 4)
         return ""
     try:
-        with tempfile.NamedTemporaryFile(suffix=".ogg", delete=False) as f:
-            f.write(base64.b64decode(b64_ogg))
-            path = f.name
-        with open(path, "rb") as f:
-            transcript = client_openai.audio.transcriptions.create(model="whisper-1", file=f)
-        os.unlink(path)
-        return (transcript.text or "").strip()
+        audio = base64.b64decode(b64_ogg)
+        chave = hashlib.sha256(audio).hexdigest()
+        em_cache = transcricoes.get(chave)
+        if em_cache is not None:
+            return em_cache
+        # Bytes direto para a API (multipart em memória), sem arquivo temporário
+        transcript = await cliente_openai.transcrever(model="whisper-1", file=("audio.ogg", audio, "audio/ogg"))
+        texto = (transcript.text or "").strip()
+        if texto:
+            transcricoes.set(chave, texto)
+        return texto
     except Exception:
         return ""
 
 
-def _openai_interpretar(texto: str) -> dict:
-    if not texto or not client_openai.api_key:
+@rastrear("webhook.openai_interpretar")
+async def _openai_interpretar(texto: str) -> dict:
+    if not texto or not cliente_openai.configurado:
         return {"resposta": "Configure OPENAI_API_KEY no .env para processar mensagens."}
+    chave = cache_interpretacao.chave(texto, SYSTEM_PROMPT, _MODELO_GPT)
+    em_cache = await cache_interpretacao.get(chave)
+    if em_cache is not None:
+        return em_cache
     try:
-        r = client_openai.chat.completions.create(
-            model="gpt-4o",
+        r = await cliente_openai.chat(
+            model=_MODELO_GPT,
             messages=[
                 {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": texto},
@@ -217,12 +207,14 @@ def _openai_interpretar(texto: str) -> dict:
             content = content.split("```json")[1].split("```")[0].strip()
         elif "```" in content:
             content = content.split("```")[1].split("```")[0].strip()
-        if content.startswith("{"):
-            import json
-            return json.loads(content)
-        return {"resposta": content}
+        resultado = json.loads(content) if content.startswith("{") else {"resposta": content}
+    except asyncio.TimeoutError:
+        return {"resposta": "A IA demorou demais para responder. Tente novamente em instantes."}
     except Exception as e:
         return {"resposta": f"Erro ao processar: {e}"}
+    # Só respostas bem-sucedidas vão para o cache
+    await cache_interpretacao.set(chave, resultado)
+    return resultado
 
 
 def _to_float(val, default: float = 0.0) -> float:
@@ -249,7 +241,8 @@ def _to_int(val, default: int = 10, min_val: int = 1, max_val: int = 28) -> int:
         return min(max_val, max(min_val, default))
 
 
-def _cadastrar_cliente(payload: dict) -> str:
+@rastrear("webhook.cadastrar_cliente")
+async def _cadastrar_cliente(payload: dict) -> str:
     """Valida os dados e insere no Supabase. Garante tipos numéricos (nunca string com letras)."""
     nome = (payload.get("nome") or "").strip()
     if not nome:
@@ -270,9 +263,11 @@ def _cadastrar_cliente(payload: dict) -> str:
         "dia_vencimento": dia,
         "status_ativo": True,
     }
-    supabase = get_supabase()
+    supabase = get_supabase_async()
     try:
-        supabase.table("clientes").insert(row).execute()
+        r = await supabase.table("clientes").insert(row).execute()
+        invalidar_cache_clientes()
+        indice_clientes.atualizar(r.data)
     except httpx.HTTPStatusError as e:
         try:
             body = e.response.json()
@@ -289,15 +284,15 @@ def _cadastrar_cliente(payload: dict) -> str:
     )
 
 
-def _baixa_manual(payload: dict) -> str:
-    supabase = get_supabase()
+@rastrear("webhook.baixa_manual")
+async def _baixa_manual(payload: dict) -> str:
+    supabase = get_supabase_async()
     nome_ou_doc = (payload.get("nome_ou_documento") or "").strip()
     if not nome_ou_doc:
         return "Informe o nome ou documento do cliente."
     data_pag = payload.get("data_pagamento") or str(date.today())
-    r = supabase.table("clientes").select("id, nome, valor_mensalidade, documento_cpf_cnpj").execute()
-    clientes = r.data or []
-    candidatos = [c for c in clientes if nome_ou_doc.lower() in (c.get("nome") or "").lower() or c.get("documento_cpf_cnpj") == nome_ou_doc]
+    # Índice de clientes (documento pelos dígitos / nome normalizado): só os melhores candidatos
+    candidatos = await indice_clientes.melhores(nome_ou_doc)
     if not candidatos:
         return f"Cliente não encontrado: {nome_ou_doc}"
     if len(candidatos) > 1:
@@ -308,13 +303,14 @@ def _baixa_manual(payload: dict) -> str:
     valor_final = _to_float(valor_payload, valor_default) if valor_payload is not None else valor_default
     if valor_final < 0:
         return "Valor do pagamento não pode ser negativo."
-    supabase.table("transacoes").insert({
+    await supabase.table("transacoes").insert({
         "cliente_id": c["id"],
         "valor": round(valor_final, 2),
         "data_pagamento": data_pag,
         "status_nota_fiscal": "pendente",
         "hash_bancario": None,
     }).execute()
+    invalidar_cache_clientes()
     return (
         f"✅ _Baixa confirmada!_\n\n"
         f"Pagamento de *{c.get('nome')}* registrado: R$ {valor_final:.2f} em {data_pag}."
@@ -334,27 +330,12 @@ def _validar_token_webhook(request: Request) -> None:
         raise HTTPException(status_code=401, detail="Token de segurança do webhook inválido ou ausente")
 
 
-@router.post("/whatsapp")
-async def webhook_whatsapp(request: Request):
+@rastrear("webhook.processar_mensagem")
+async def _processar_mensagem(body: dict, texto: str) -> None:
     """
-    Recebe mensagens do WhatsApp (Z-API). Processa áudio (Whisper) ou texto com OpenAI:
-    cadastrar cliente ou baixa manual. Resposta enviada de volta via Z-API send-text.
-    Se ZAPI_SECURITY_TOKEN estiver no .env, exige header X-ZAPI-Security-Token ou Client-Token com o mesmo valor.
+    Pipeline executado pelos workers da fila: transcrição (se áudio) → GPT →
+    cadastrar/baixa no Supabase → resposta via Z-API send-text.
     """
-    _validar_token_webhook(request)
-    try:
-        body = await request.json()
-    except Exception:
-        raise HTTPException(status_code=400, detail="Body JSON inválido")
-
-    texto = (
-        _extrair_texto_zapi(body)
-        or _extrair_texto_payload_evolution(body)
-        or (body.get("message") or body.get("text") or "").strip()
-    )
-    if not texto:
-        return {"ok": True, "message": "Nenhuma mensagem para processar"}
-
     if texto == "__AUDIO__":
         # Z-API ou formato compatível: áudio em body.message.audio ou data.messages[0].message.audioMessage
         try:
@@ -364,33 +345,37 @@ async def webhook_whatsapp(request: Request):
             if audio:
                 b64 = audio.get("audio") or audio.get("data") or body.get("audio")
                 if b64:
-                    texto = _transcrever_audio(b64)
+                    texto = await _transcrever_audio(b64)
         except Exception:
             pass
         if not texto:
-            return {"ok": True, "message": "Áudio não transcrito"}
+            logger.info("Webhook: áudio não transcrito; nada a responder")
+            return
 
     texto_limpo = _limpar_texto_para_ia(texto)
-    resultado = _openai_interpretar(texto_limpo)
+    # Mensagens no formato padrão (cadastro/baixa) não precisam do GPT
+    resultado = interpretador_local.interpretar(texto_limpo) if settings.INTERPRETADOR_LOCAL else None
+    if resultado is None:
+        resultado = await _openai_interpretar(texto_limpo)
     resposta = resultado.get("resposta", "")
 
     if "cadastrar_cliente" in resultado:
         try:
-            resposta = _cadastrar_cliente(resultado["cadastrar_cliente"])
+            resposta = await _cadastrar_cliente(resultado["cadastrar_cliente"])
         except httpx.HTTPStatusError as e:
             try:
-                body = e.response.json()
-                msg = body.get("message") or body.get("details") or e.response.text
+                erro = e.response.json()
+                msg = erro.get("message") or erro.get("details") or e.response.text
             except Exception:
                 msg = e.response.text or str(e)
             resposta = f"Erro ao cadastrar cliente: {msg}"
     elif "baixa_manual" in resultado:
         try:
-            resposta = _baixa_manual(resultado["baixa_manual"])
+            resposta = await _baixa_manual(resultado["baixa_manual"])
         except httpx.HTTPStatusError as e:
             try:
-                body = e.response.json()
-                msg = body.get("message") or body.get("details") or e.response.text
+                erro = e.response.json()
+                msg = erro.get("message") or erro.get("details") or e.response.text
             except Exception:
                 msg = e.response.text or str(e)
             resposta = f"Erro ao dar baixa: {msg}"
@@ -417,7 +402,7 @@ async def webhook_whatsapp(request: Request):
         )
     if phone and resposta:
         logger.info("Webhook: enviando resposta ao WhatsApp para phone=%s (resposta com %d chars)", phone[:10] + "..." if len(phone) > 10 else phone, len(resposta))
-        ok = _enviar_zapi_text(phone, resposta)
+        ok = await enviador_zapi.enviar(phone, resposta)
         if not ok:
             logger.warning(
                 "Webhook: falha ao enviar resposta ao WhatsApp (phone=%s). Confira no Railway: ZAPI_BASE_URL ou ZAPI_INSTANCE_ID+ZAPI_INSTANCE_TOKEN e ZAPI_CLIENT_TOKEN (obrigatório na Z-API).",
@@ -428,4 +413,40 @@ async def webhook_whatsapp(request: Request):
     elif phone and not resposta:
         logger.info("Webhook: Processado com sucesso para o número %s (sem resposta a enviar)", phone[:10] + "..." if len(phone) > 10 else phone)
 
-    return {"ok": True, "resposta": resposta}
+
+@router.post("/whatsapp")
+async def webhook_whatsapp(request: Request):
+    """
+    Recebe mensagens do WhatsApp (Z-API). Processa áudio (Whisper) ou texto com OpenAI:
+    cadastrar cliente ou baixa manual. Resposta enviada de volta via Z-API send-text.
+    Se ZAPI_SECURITY_TOKEN estiver no .env, exige header X-ZAPI-Security-Token ou Client-Token com o mesmo valor.
+
+    A rota só valida e enfileira (resposta imediata à Z-API); o processamento roda nos
+    workers de fila_webhook. Com a fila cheia responde 503 para a Z-API reenviar depois.
+    """
+    _validar_token_webhook(request)
+    try:
+        body = await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Body JSON inválido")
+
+    texto = (
+        _extrair_texto_zapi(body)
+        or _extrair_texto_payload_evolution(body)
+        or (body.get("message") or body.get("text") or "").strip()
+    )
+    if not texto:
+        return {"ok": True, "message": "Nenhuma mensagem para processar"}
+
+    # Reenvio da mesma mensagem (timeout na Z-API): descarta antes de gastar OpenAI/Supabase
+    message_id = extrair_id_mensagem(body)
+    if message_id and not await dedupe_webhook.registrar(message_id):
+        logger.info("Webhook: mensagem %s duplicada; ignorada", message_id)
+        return {"ok": True, "message": "Mensagem duplicada; ignorada"}
+
+    if not fila_webhook.enfileirar(_processar_mensagem, body, texto):
+        if message_id:
+            await dedupe_webhook.esquecer(message_id)
+        logger.warning("Webhook: fila cheia (%d); pedindo reenvio à Z-API", fila_webhook.stats()["profundidade"])
+        raise HTTPException(status_code=503, detail="Fila de processamento cheia; tente novamente")
+    return {"ok": True, "message": "Mensagem recebida; processando"}
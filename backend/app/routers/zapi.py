@@ -0,0 +1,30 @@
+"""
+Mensagens do WhatsApp que esgotaram as tentativas de envio pela Z-API (dead letter).
+Protegido pelo X-API-KEY como as demais rotas /api/. O buffer é do processo: com vários
+workers, cada um tem o seu.
+"""
+from fastapi import APIRouter, HTTPException
+
+from app.zapi import enviador_zapi
+
+router = APIRouter()
+
+
+@router.get("/dead-letter")
+def listar_dead_letter():
+    """Mensagens não entregues. entrega_incerta=true: a Z-API pode ter recebido (ex.: timeout de leitura)."""
+    return {"total": len(enviador_zapi.dead_letter), "mensagens": list(enviador_zapi.dead_letter)}
+
+
+@router.post("/dead-letter/reenviar")
+async def reenviar_dead_letter():
+    """
+    Reenvia todas as mensagens do buffer (confira antes as marcadas entrega_incerta, que podem
+    chegar em dobro). As que falharem de novo voltam para o buffer.
+    """
+    enviador_zapi.abrir()
+    if not enviador_zapi.configurado:
+        raise HTTPException(status_code=503, detail="Z-API não configurada (ZAPI_BASE_URL ou ZAPI_INSTANCE_ID + ZAPI_INSTANCE_TOKEN)")
+    total = len(enviador_zapi.dead_letter)
+    entregues = await enviador_zapi.reenviar_dead_letter()
+    return {"reenviadas": total, "entregues": entregues, "dead_letter": len(enviador_zapi.dead_letter)}
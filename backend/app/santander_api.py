@@ -1,19 +1,33 @@
 """
 Cliente da API de Extrato do Santander Sandbox.
 Usa conexao_banco para mTLS com certificados.
+
+Janelas longas são divididas em blocos de datas buscados em paralelo; cada bloco segue a
+paginação da API (links _next ou _pageable/_offset) e as transações são entregues em
+streaming por iterar_extrato(). buscar_extrato() junta tudo numa lista.
 """
+import asyncio
+import logging
 import os
+import time
+from datetime import date, timedelta
 from pathlib import Path
+from typing import AsyncIterator
 
 import httpx
 from dotenv import load_dotenv
 
+from app.config import settings
+from app.metrics import SANTANDER_SEGUNDOS
+from app.tracing import rastrear, span
+
 # Permite importar conexao_banco quando o app roda a partir de backend/
 _backend_dir = Path(__file__).resolve().parent.parent
 if str(_backend_dir) not in __import__("sys").path:
     __import__("sys").path.insert(0, str(_backend_dir))
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 
 SANTANDER_EXTRATO_URL = os.getenv(
     "SANTANDER_EXTRATO_URL",
@@ -21,35 +35,135 @@ SANTANDER_EXTRATO_URL = os.getenv(
 )
 
 
-async def buscar_extrato(conta: str | None = None, dias: int = 7):
+def _blocos_de_datas(inicio: date, fim: date, tamanho: int) -> list[tuple[date, date]]:
+    """Divide [inicio, fim] (inclusivo) em blocos de até `tamanho` dias, sem sobreposição."""
+    blocos = []
+    passo = max(1, tamanho)
+    while inicio <= fim:
+        ate = min(fim, inicio + timedelta(days=passo - 1))
+        blocos.append((inicio, ate))
+        inicio = ate + timedelta(days=1)
+    return blocos
+
+
+def _proxima_pagina(data, resp: httpx.Response, params: dict | None) -> tuple[str, dict | None] | None:
     """
-    Busca extrato no Santander Sandbox.
-    Retorna lista de transações (descrição, valor, data, eh_pix).
+    Próxima página, se houver: link (_links._next.href / links.next) ou, na falta dele,
+    _pageable com _pageNumber/_totalPages (Santander: _offset é o número da página).
     """
-    try:
-        from conexao_banco import obter_cliente_santander_async
-    except ImportError:
-        return []
+    if not isinstance(data, dict):
+        return None
+    links = data.get("_links") or data.get("links") or {}
+    if isinstance(links, dict):
+        prox = links.get("_next") or links.get("next")
+        href = prox.get("href") if isinstance(prox, dict) else prox
+        if isinstance(href, str) and href:
+            return str(resp.url.join(href)), None
+    paginacao = data.get("_pageable")
+    if isinstance(paginacao, dict) and params is not None:
+        try:
+            pagina = int(paginacao.get("_pageNumber") or paginacao.get("_offset") or params.get("_offset") or 1)
+            total = int(paginacao.get("_totalPages") or 0)
+        except (TypeError, ValueError):
+            return None
+        if pagina < total:
+            return str(resp.url.copy_with(query=None)), {**params, "_offset": pagina + 1}
+    return None
 
-    try:
-        client = obter_cliente_santander_async()
-    except FileNotFoundError:
-        return []
 
+async def _paginas(client: httpx.AsyncClient, url: str, params: dict, semaforo: asyncio.Semaphore):
+    """Segue a paginação de uma consulta; devolve as transações normalizadas página a página."""
+    proxima: tuple[str, dict | None] | None = (url, params)
+    for _ in range(settings.SANTANDER_MAX_PAGINAS):
+        url_pagina, params_pagina = proxima
+        async with semaforo:
+            inicio = time.perf_counter()
+            status = "erro"
+            with span("santander.pagina_extrato") as sp:
+                try:
+                    resp = await client.get(url_pagina, params=params_pagina)
+                    status = str(resp.status_code)
+                finally:
+                    sp.set_attribute("http.status_code", status)
+                    SANTANDER_SEGUNDOS.observar(time.perf_counter() - inicio, status)
+        resp.raise_for_status()
+        data = resp.json()
+        itens = _normalizar_transacoes(data)
+        yield itens
+        proxima = _proxima_pagina(data, resp, params_pagina)
+        if not proxima or not itens:
+            return
+    logger.warning("Santander: limite de %d páginas atingido em %s", settings.SANTANDER_MAX_PAGINAS, params)
+
+
+async def iterar_extrato(conta: str | None = None, dias: int = 7, desde: date | None = None) -> AsyncIterator[dict]:
+    """
+    Extrato dos últimos `dias` dias (ou de `desde` até hoje) como gerador assíncrono de
+    transações normalizadas.
+
+    A janela é dividida em blocos de SANTANDER_CHUNK_DIAS buscados em paralelo (no máximo
+    SANTANDER_MAX_CONCURRENCY requisições ao mesmo tempo), cada um seguindo a paginação;
+    as transações chegam ao chamador conforme as páginas chegam (a ordem entre blocos não
+    é garantida). Levanta FileNotFoundError sem certificados e httpx.HTTPError em falha da API.
+    """
+    from conexao_banco import cliente_santander
+
+    client = await cliente_santander.obter()
     url = SANTANDER_EXTRATO_URL.rstrip("/")
-    if conta:
-        url = f"{url}/contas/{conta}/extrato"
-    else:
-        url = f"{url}/extrato"
-    params = {"dias": dias}
+    url = f"{url}/contas/{conta}/extrato" if conta else f"{url}/extrato"
+    hoje = date.today()
+    blocos = _blocos_de_datas(desde or hoje - timedelta(days=dias), hoje, settings.SANTANDER_CHUNK_DIAS)
+    semaforo = asyncio.Semaphore(max(1, settings.SANTANDER_MAX_CONCURRENCY))
+    # Limitada: se o consumidor (match + gravação) atrasar, as buscas esperam
+    fila: asyncio.Queue = asyncio.Queue(maxsize=64)
+    fim_bloco = object()
 
+    async def produzir(inicio: date, fim: date) -> None:
+        params = {
+            "initialDate": inicio.isoformat(),
+            "finalDate": fim.isoformat(),
+            "_limit": settings.SANTANDER_PAGE_SIZE,
+            "_offset": 1,
+        }
+        try:
+            async for itens in _paginas(client, url, params, semaforo):
+                if itens:
+                    await fila.put(itens)
+        except Exception as e:
+            await fila.put(e)
+        finally:
+            await fila.put(fim_bloco)
+
+    tarefas = [asyncio.create_task(produzir(inicio, fim)) for inicio, fim in blocos]
     try:
-        async with client:
-            resp = await client.get(url, params=params)
-            resp.raise_for_status()
-            data = resp.json()
-        return _normalizar_transacoes(data)
-    except Exception:
+        pendentes = len(tarefas)
+        while pendentes:
+            item = await fila.get()
+            if item is fim_bloco:
+                pendentes -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                for transacao in item:
+                    yield transacao
+    finally:
+        for t in tarefas:
+            t.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+
+
+@rastrear("santander.buscar_extrato")
+async def buscar_extrato(conta: str | None = None, dias: int = 7, desde: date | None = None):
+    """
+    Busca extrato no Santander Sandbox.
+    Retorna lista de transações (descrição, valor, data, eh_pix); [] sem certificados ou em erro.
+    """
+    try:
+        return [t async for t in iterar_extrato(conta, dias, desde)]
+    except FileNotFoundError:
+        return []
+    except Exception as e:
+        logger.warning("Santander: erro ao buscar extrato: %s", e)
         return []
 
 
@@ -61,7 +175,7 @@ def _normalizar_transacoes(data):
     if isinstance(data, list):
         items = data
     elif isinstance(data, dict):
-        items = data.get("transacoes", data.get("lancamentos", data.get("itens", [])))
+        items = data.get("transacoes", data.get("lancamentos", data.get("itens", data.get("_content", []))))
     else:
         items = []
 
@@ -0,0 +1,270 @@
+"""
+Tracing opcional (TRACING_ENABLED) e request id nos logs.
+
+- span("nome", atributo=valor) / @rastrear("nome"): mede um trecho (sync ou async).
+  Desligado, span() devolve um context manager nulo (custo de uma chamada de função).
+- Com opentelemetry-sdk instalado, os spans vão para o SDK: OTLP se
+  OTEL_EXPORTER_OTLP_ENDPOINT estiver definido (e o exportador instalado), senão console.
+  Sem o SDK, um exportador próprio grava um JSON por linha (TRACING_FILE ou stdout)
+  com os mesmos campos do OTel (trace_id, span_id, parent_span_id, tempos em ns).
+- RequestIdMiddleware: usa o X-Request-ID recebido (ou gera um), devolve no header da
+  resposta e guarda num contextvar. Os logs ganham %(request_id)s e os jobs enfileirados
+  herdam o contexto (FilaJobs), então o processamento em background do webhook sai
+  com o mesmo request id e pendurado no span da requisição.
+"""
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+from contextvars import ContextVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_request_id: ContextVar[str] = ContextVar("request_id", default="-")
+_span_atual: ContextVar["_Span | None"] = ContextVar("span_atual", default=None)
+
+_modo: str | None = None  # None (desligado), "otel" ou "jsonl"
+_tracer = None
+_exportador: "_ExportadorJsonl | None" = None
+_HEADER = b"x-request-id"
+
+
+def request_id() -> str:
+    return _request_id.get()
+
+
+# Logs: todo LogRecord ganha request_id (usável em qualquer formatter com %(request_id)s)
+_fabrica_original = logging.getLogRecordFactory()
+
+
+def _fabrica_com_request_id(*args, **kwargs) -> logging.LogRecord:
+    record = _fabrica_original(*args, **kwargs)
+    record.request_id = _request_id.get()
+    return record
+
+
+logging.setLogRecordFactory(_fabrica_com_request_id)
+
+
+def configurar_logs() -> None:
+    """Sem handler no root (padrão do uvicorn), loga os módulos do app com o request id."""
+    raiz = logging.getLogger()
+    if not raiz.handlers:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s",
+        )
+        # httpx loga cada requisição em INFO (uma linha por query ao PostgREST)
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+class _ExportadorJsonl:
+    """Grava spans como JSON lines numa thread própria (não bloqueia o event loop)."""
+
+    def __init__(self, caminho: str):
+        self._caminho = caminho
+        self._fila: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._gravar, name="tracing-jsonl", daemon=True)
+        self._thread.start()
+
+    def exportar(self, span: dict) -> None:
+        self._fila.put(span)
+
+    def _gravar(self) -> None:
+        saida = open(self._caminho, "a", encoding="utf-8") if self._caminho else sys.stdout
+        try:
+            while True:
+                span = self._fila.get()
+                if span is None:
+                    break
+                saida.write(json.dumps(span, ensure_ascii=False, default=str) + "\n")
+                if self._fila.empty():
+                    saida.flush()
+        finally:
+            saida.flush()
+            if saida is not sys.stdout:
+                saida.close()
+
+    def fechar(self) -> None:
+        self._fila.put(None)
+        self._thread.join(timeout=5)
+
+
+class _Span:
+    __slots__ = ("nome", "atributos", "trace_id", "span_id", "pai", "inicio", "_token")
+
+    def __init__(self, nome: str, atributos: dict):
+        self.nome = nome
+        self.atributos = atributos
+
+    def set_attribute(self, chave: str, valor) -> None:
+        self.atributos[chave] = valor
+
+    def __enter__(self) -> "_Span":
+        pai = _span_atual.get()
+        self.trace_id = pai.trace_id if pai else secrets.token_hex(16)
+        self.pai = pai.span_id if pai else None
+        self.span_id = secrets.token_hex(8)
+        self.inicio = time.time_ns()
+        self._token = _span_atual.set(self)
+        return self
+
+    def __exit__(self, tipo, erro, tb) -> bool:
+        fim = time.time_ns()
+        _span_atual.reset(self._token)
+        if _exportador is not None:
+            _exportador.exportar({
+                "name": self.nome,
+                "trace_id": self.trace_id,
+                "span_id": self.span_id,
+                "parent_span_id": self.pai,
+                "start_time_unix_nano": self.inicio,
+                "end_time_unix_nano": fim,
+                "duration_ms": round((fim - self.inicio) / 1e6, 3),
+                "status": "ERROR" if tipo else "OK",
+                "error": f"{tipo.__name__}: {erro}" if tipo else None,
+                "request_id": _request_id.get(),
+                "attributes": self.atributos,
+            })
+        return False
+
+
+class _SpanNulo:
+    def set_attribute(self, chave: str, valor) -> None:
+        pass
+
+    def __enter__(self) -> "_SpanNulo":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NULO = _SpanNulo()
+
+
+def span(nome: str, **atributos):
+    """Context manager de um span (filho do span atual); no-op com tracing desligado."""
+    if _modo is None:
+        return _NULO
+    atributos["request.id"] = _request_id.get()
+    if _modo == "otel":
+        return _tracer.start_as_current_span(nome, attributes=atributos)
+    return _Span(nome, atributos)
+
+
+def rastrear(nome: str | None = None):
+    """Decorador: envolve a função (sync ou async) num span."""
+
+    def decorador(func):
+        nome_span = nome or f"{func.__module__}.{func.__qualname__}"
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def envolvida_async(*args, **kwargs):
+                with span(nome_span):
+                    return await func(*args, **kwargs)
+
+            return envolvida_async
+
+        @functools.wraps(func)
+        def envolvida(*args, **kwargs):
+            with span(nome_span):
+                return func(*args, **kwargs)
+
+        return envolvida
+
+    return decorador
+
+
+def _configurar_otel() -> bool:
+    global _tracer
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        return False
+    exportador = None
+    if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+            exportador = OTLPSpanExporter()
+        except ImportError:
+            logger.warning("Tracing: OTEL_EXPORTER_OTLP_ENDPOINT definido, mas o exportador OTLP não está instalado; usando console.")
+    if exportador is None:
+        saida = open(settings.TRACING_FILE, "a", encoding="utf-8") if settings.TRACING_FILE else sys.stdout
+        exportador = ConsoleSpanExporter(out=saida)
+    provedor = TracerProvider(resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME") or "meu-financeiro-api"}))
+    provedor.add_span_processor(BatchSpanProcessor(exportador))
+    trace.set_tracer_provider(provedor)
+    _tracer = trace.get_tracer("app")
+    return True
+
+
+def configurar() -> None:
+    """Liga o tracing se TRACING_ENABLED (chamado no startup do app)."""
+    global _modo, _exportador
+    if not settings.TRACING_ENABLED or _modo is not None:
+        return
+    if _configurar_otel():
+        _modo = "otel"
+    else:
+        _exportador = _ExportadorJsonl(settings.TRACING_FILE)
+        _modo = "jsonl"
+    logger.info("Tracing ligado (%s)", _modo)
+
+
+def encerrar() -> None:
+    """Exporta os spans pendentes (chamado no shutdown do app)."""
+    global _modo, _exportador
+    if _modo == "otel":
+        from opentelemetry import trace
+
+        trace.get_tracer_provider().shutdown()
+    elif _exportador is not None:
+        _exportador.fechar()
+        _exportador = None
+    _modo = None
+
+
+class RequestIdMiddleware:
+    """Request id por requisição (contextvar + header X-Request-ID) e span raiz HTTP (ASGI puro)."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        recebido = b""
+        for nome, valor in scope["headers"]:
+            if nome == _HEADER:
+                recebido = valor[:128]
+                break
+        rid = recebido.decode("latin-1").strip() or secrets.token_hex(8)
+        token = _request_id.set(rid)
+
+        async def send_com_header(mensagem: Message) -> None:
+            if mensagem["type"] == "http.response.start":
+                mensagem["headers"] = list(mensagem.get("headers", [])) + [(_HEADER, rid.encode("latin-1"))]
+                sp.set_attribute("http.status_code", mensagem["status"])
+            await send(mensagem)
+
+        try:
+            with span(f"HTTP {scope['method']}", **{"http.method": scope["method"], "http.target": scope["path"]}) as sp:
+                await self.app(scope, receive, send_com_header)
+        finally:
+            _request_id.reset(token)
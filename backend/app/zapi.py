@@ -0,0 +1,233 @@
+"""
+Envio de mensagens pela Z-API (send-text) com um componente de vida longa.
+
+- Config (URL da instância + Client-Token) resolvida uma vez em abrir(), não a cada envio.
+- httpx.AsyncClient com pool keep-alive compartilhado (aberto/fechado no lifespan).
+- Fila ordenada por telefone: mensagens para o mesmo número saem na ordem em que
+  foram pedidas; números diferentes seguem em paralelo. Mensagens que já estão
+  acumuladas na fila de um número saem juntas num único send-text.
+- Limite de taxa global (token bucket, ZAPI_RATE_PER_SECOND) para não estourar a Z-API.
+- Retry com backoff em 429/5xx/erro de conexão (pedido que não chegou à Z-API). Timeout de
+  leitura e afins não são repetidos: a Z-API pode ter aceitado o envio e o cliente receberia
+  a mensagem duas vezes. Sem sucesso, a mensagem vai para o buffer dead_letter (marcada
+  entrega_incerta nesses casos), listado/reenviado em /api/zapi/dead-letter.
+
+Uso: ok = await enviador_zapi.enviar(phone, texto)    (espera o resultado)
+     enviador_zapi.enfileirar(phone, texto)            (dispara e segue; ex.: jobs de notificação)
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+
+import httpx
+
+from app.config import settings
+from app.metrics import ZAPI_SEGUNDOS, registrar_gauge
+from app.tracing import rastrear
+
+logger = logging.getLogger(__name__)
+
+# Limite de caracteres ao agrupar mensagens pendentes do mesmo número num só envio
+_MAX_AGRUPADO = 4000
+
+
+def resolver_base_url() -> str:
+    """Base da Z-API (sem /send-text). Usa ZAPI_BASE_URL ou monta com ZAPI_INSTANCE_ID + ZAPI_INSTANCE_TOKEN."""
+    base = (os.getenv("ZAPI_BASE_URL") or "").strip().rstrip("/")
+    if base:
+        return base
+    instance_id = (os.getenv("ZAPI_INSTANCE_ID") or "").strip()
+    instance_token = (os.getenv("ZAPI_INSTANCE_TOKEN") or "").strip()
+    if instance_id and instance_token:
+        return f"https://api.z-api.io/instances/{instance_id}/token/{instance_token}"
+    return ""
+
+
+class _TokenBucket:
+    def __init__(self, taxa: float, rajada: int):
+        self._taxa = max(0.01, taxa)
+        self._capacidade = max(1, rajada)
+        self._tokens = float(self._capacidade)
+        self._atualizado = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def adquirir(self) -> None:
+        async with self._lock:
+            while True:
+                agora = time.monotonic()
+                self._tokens = min(self._capacidade, self._tokens + (agora - self._atualizado) * self._taxa)
+                self._atualizado = agora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._taxa)
+
+
+class EnviadorZapi:
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+        self._url = ""
+        self._headers: dict[str, str] = {}
+        self._limite: _TokenBucket | None = None
+        # telefone -> mensagens pendentes (texto, future); uma task por telefone drena a fila
+        self._filas: dict[str, deque[tuple[str, asyncio.Future]]] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self.dead_letter: deque[dict] = deque(maxlen=settings.ZAPI_DEAD_LETTER_SIZE)
+        self.enviados = 0
+        self.agrupados = 0
+        self.tentativas_extras = 0
+        self.falhas = 0
+
+    @property
+    def configurado(self) -> bool:
+        return bool(self._url)
+
+    def abrir(self) -> None:
+        if self._client is not None:
+            return
+        base = resolver_base_url()
+        self._url = f"{base}/send-text" if base else ""
+        self._headers = {"Content-Type": "application/json"}
+        client_token = (os.getenv("ZAPI_CLIENT_TOKEN") or "").strip()
+        if client_token:
+            self._headers["Client-Token"] = client_token
+        elif base:
+            logger.warning("Z-API: ZAPI_CLIENT_TOKEN não definido. Doc exige header Client-Token (Account security token). Defina no Railway.")
+        if not base:
+            logger.warning("Z-API: base URL vazia. Defina ZAPI_BASE_URL ou ZAPI_INSTANCE_ID + ZAPI_INSTANCE_TOKEN no Railway.")
+        self._client = httpx.AsyncClient(
+            timeout=15.0,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10, keepalive_expiry=60.0),
+        )
+        self._limite = _TokenBucket(settings.ZAPI_RATE_PER_SECOND, settings.ZAPI_RATE_BURST)
+
+    async def fechar(self, timeout: float = 10.0) -> None:
+        """Espera os envios pendentes (até timeout) e fecha o pool."""
+        if self._tasks:
+            _, pendentes = await asyncio.wait(list(self._tasks.values()), timeout=timeout)
+            for t in pendentes:
+                t.cancel()
+            await asyncio.gather(*pendentes, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+
+    def enfileirar(self, phone: str, message: str) -> asyncio.Future:
+        """Agenda o envio na fila do telefone; o future resolve com True/False."""
+        futuro = asyncio.get_running_loop().create_future()
+        if not phone or not message:
+            futuro.set_result(False)
+            return futuro
+        self.abrir()
+        if not self._url:
+            futuro.set_result(False)
+            return futuro
+        self._filas.setdefault(phone, deque()).append((message, futuro))
+        if phone not in self._tasks:
+            self._tasks[phone] = asyncio.create_task(self._drenar(phone), name=f"zapi-{phone[-4:]}")
+        return futuro
+
+    async def enviar(self, phone: str, message: str) -> bool:
+        """Envia e espera o resultado (True se a Z-API respondeu 200)."""
+        return await asyncio.shield(self.enfileirar(phone, message))
+
+    async def _drenar(self, phone: str) -> None:
+        fila = self._filas[phone]
+        futuros: list[asyncio.Future] = []
+        try:
+            while fila:
+                # Agrupa o que já está pendente para este número (mantém a ordem)
+                textos, futuros = [], []
+                tamanho = 0
+                while fila and (not textos or tamanho + len(fila[0][0]) <= _MAX_AGRUPADO):
+                    texto, futuro = fila.popleft()
+                    textos.append(texto)
+                    futuros.append(futuro)
+                    tamanho += len(texto) + 2
+                if len(textos) > 1:
+                    self.agrupados += len(textos) - 1
+                ok = await self._enviar_com_retry(phone, "\n\n".join(textos))
+                for futuro in futuros:
+                    if not futuro.done():
+                        futuro.set_result(ok)
+        finally:
+            del self._tasks[phone]
+            # Cancelado no shutdown: em envio e pendentes resolvem como não entregues
+            for futuro in futuros + [f for _, f in fila]:
+                if not futuro.done():
+                    futuro.set_result(False)
+            del self._filas[phone]
+
+    @rastrear("zapi.enviar_texto")
+    async def _enviar_com_retry(self, phone: str, message: str) -> bool:
+        erro = ""
+        incerta = False
+        for tentativa in range(settings.ZAPI_MAX_RETRIES + 1):
+            if tentativa:
+                self.tentativas_extras += 1
+                espera = min(30.0, 0.5 * 2 ** (tentativa - 1))
+                await asyncio.sleep(random.uniform(espera / 2, espera))
+            await self._limite.adquirir()
+            inicio = time.perf_counter()
+            try:
+                r = await self._client.post(self._url, json={"phone": phone, "message": message}, headers=self._headers)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                # O pedido não saiu: repetir é seguro
+                ZAPI_SEGUNDOS.observar(time.perf_counter() - inicio, "erro")
+                erro = f"exceção: {e!r}"
+                logger.warning("Z-API send-text %s (tentativa %d)", erro, tentativa + 1)
+                continue
+            except httpx.HTTPError as e:
+                # Corpo já enviado (ex.: ReadTimeout): a Z-API pode ter entregue; não repete
+                ZAPI_SEGUNDOS.observar(time.perf_counter() - inicio, "erro")
+                erro = f"exceção: {e!r}"
+                incerta = True
+                logger.warning("Z-API send-text %s após envio do pedido; sem nova tentativa", erro)
+                break
+            ZAPI_SEGUNDOS.observar(time.perf_counter() - inicio, str(r.status_code))
+            if r.status_code == 200:
+                self.enviados += 1
+                return True
+            erro = f"status={r.status_code} body={r.text[:200]}"
+            logger.warning("Z-API send-text falhou: %s (tentativa %d)", erro, tentativa + 1)
+            if r.status_code != 429 and r.status_code < 500:
+                break  # erro do pedido (ex.: token inválido): repetir não resolve
+        self.falhas += 1
+        self.dead_letter.append({
+            "phone": phone, "message": message, "erro": erro, "entrega_incerta": incerta, "em": time.time(),
+        })
+        return False
+
+    async def reenviar_dead_letter(self) -> int:
+        """Reenfileira as mensagens que falharam; devolve quantas foram entregues."""
+        self.abrir()
+        if not self.configurado:
+            return 0  # sem URL nada seria enviado: mantém o buffer
+        pendentes = list(self.dead_letter)
+        self.dead_letter.clear()
+        resultados = await asyncio.gather(*(self.enviar(m["phone"], m["message"]) for m in pendentes))
+        return sum(resultados)
+
+    def stats(self) -> dict:
+        return {
+            "configurado": self.configurado,
+            "telefones_em_envio": len(self._tasks),
+            "pendentes": sum(len(f) for f in self._filas.values()),
+            "enviados": self.enviados,
+            "agrupados": self.agrupados,
+            "tentativas_extras": self.tentativas_extras,
+            "falhas": self.falhas,
+            "dead_letter": len(self.dead_letter),
+        }
+
+
+enviador_zapi = EnviadorZapi()
+registrar_gauge(
+    "zapi_queue",
+    "Mensagens da Z-API pendentes e no dead letter",
+    lambda: {("pendentes",): enviador_zapi.stats()["pendentes"], ("dead_letter",): len(enviador_zapi.dead_letter)},
+    ("state",),
+)
@@ -0,0 +1 @@
+# Benchmarks dos caminhos críticos (execute na pasta backend)
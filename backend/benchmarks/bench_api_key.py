@@ -0,0 +1,94 @@
+"""
+Benchmark: APIKeyMiddleware antigo (BaseHTTPMiddleware, os.getenv por requisição)
+x novo (ASGI puro, chaves lidas uma vez). Mede req/s em processo (httpx + ASGITransport,
+sem rede) numa rota JSON e numa resposta em streaming, e confere 200/401 nos dois.
+
+Execute na pasta backend: python benchmarks/bench_api_key.py [n_requisicoes]
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import StreamingResponse  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+
+from app.middleware.api_key import APIKeyMiddleware  # noqa: E402
+
+_CHAVE = "chave-benchmark"
+
+
+class APIKeyMiddlewareAntigo(BaseHTTPMiddleware):
+    """Implementação anterior (referência)."""
+
+    async def dispatch(self, request: Request, call_next):
+        path = request.scope.get("path") or ""
+        if not path.startswith("/api/"):
+            return await call_next(request)
+        if path.startswith("/api/webhook/"):
+            return await call_next(request)
+        api_key = (os.getenv("API_KEY") or "").strip()
+        if not api_key:
+            return await call_next(request)
+        received = (request.headers.get("X-API-KEY") or "").strip()
+        if received != api_key:
+            return JSONResponse(status_code=401, content={"detail": "Header X-API-KEY inválido ou ausente"})
+        return await call_next(request)
+
+
+def _app(middleware) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/api/stream")
+    async def stream():
+        async def linhas():
+            for i in range(50):
+                yield f"{i};linha de exemplo do csv\n"
+        return StreamingResponse(linhas(), media_type="text/csv")
+
+    app.add_middleware(middleware)
+    return app
+
+
+async def _medir(app: FastAPI, rota: str, n: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        headers = {"X-API-KEY": _CHAVE}
+        # Conferência de comportamento antes de medir
+        assert (await client.get(rota, headers=headers)).status_code == 200
+        assert (await client.get(rota, headers={"X-API-KEY": "errada"})).status_code == 401
+        t0 = time.perf_counter()
+        for _ in range(n):
+            r = await client.get(rota, headers=headers)
+            await r.aread()
+        return n / (time.perf_counter() - t0)
+
+
+async def main() -> bool:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    os.environ["API_KEY"] = _CHAVE
+    apps = {"BaseHTTPMiddleware (antigo)": _app(APIKeyMiddlewareAntigo), "ASGI puro (novo)": _app(APIKeyMiddleware)}
+    print(f"requisições por caso={n}")
+    for rota in ("/api/ping", "/api/stream"):
+        resultados = {nome: await _medir(app, rota, n) for nome, app in apps.items()}
+        for nome, rps in resultados.items():
+            print(f"{rota:12} {nome:28} {rps:9.0f} req/s")
+        antigo, novo = resultados.values()
+        print(f"{rota:12} ganho: {novo / antigo:.2f}x")
+    return True
+
+
+if __name__ == "__main__":
+    ok = asyncio.run(main())
+    exit(0 if ok else 1)
@@ -0,0 +1,90 @@
+"""
+Benchmark: match PIX × clientes.
+Compara o loop original (entradas × clientes, com cópia literal do _normalizar_nome e do
+_cliente_corresponde_entrada_pix anteriores ao PixMatcher) com o PixMatcher (buckets por
+centavos + Aho–Corasick) e confere que o resultado é o mesmo.
+
+Execute na pasta backend: python benchmarks/bench_pix_matcher.py [n_clientes n_entradas]
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.api.pix_matcher import PixMatcher  # noqa: E402
+from benchmarks.dados import gerar_clientes, gerar_entradas_pix  # noqa: E402
+
+
+def _normalizar_nome_antigo(s: str) -> str:
+    """Implementação anterior (referência)."""
+    if not s:
+        return ""
+    s = s.lower().strip()
+    for a, b in [("á", "a"), ("é", "e"), ("í", "i"), ("ó", "o"), ("ú", "u"), ("ã", "a"), ("õ", "o"), ("ç", "c")]:
+        s = s.replace(a, b)
+    return s
+
+
+def _cliente_corresponde_entrada_pix_antigo(cliente: dict, valor_pix: float, descricao_pix: str) -> bool:
+    """Implementação anterior (referência)."""
+    valor_cli = round(float(cliente.get("valor_mensalidade") or 0), 2)
+    if round(valor_pix, 2) != valor_cli:
+        return False
+    nome_cli = _normalizar_nome_antigo(cliente.get("nome") or "")
+    if not nome_cli:
+        return False
+    return nome_cli in _normalizar_nome_antigo(descricao_pix)
+
+
+def match_loop(clientes, entradas):
+    """Loop anterior de sincronizar_santander_com_supabase: primeiro cliente que corresponde."""
+    out = []
+    for e in entradas:
+        valor = round(float(e["valor"]), 2)
+        for c in clientes:
+            if _cliente_corresponde_entrada_pix_antigo(c, valor, e["descricao"]):
+                out.append(c["id"])
+                break
+        else:
+            out.append(None)
+    return out
+
+
+def match_indexado(clientes, entradas):
+    matcher = PixMatcher(clientes)
+    out = []
+    for e in entradas:
+        cands = matcher.candidatos(round(float(e["valor"]), 2), e["descricao"])
+        out.append(cands[0]["id"] if cands else None)
+    return out
+
+
+def _medir(fn, *args):
+    t0 = time.perf_counter()
+    r = fn(*args)
+    return r, time.perf_counter() - t0
+
+
+def main():
+    n_clientes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_entradas = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    clientes = gerar_clientes(n_clientes)
+    entradas = gerar_entradas_pix(clientes, n_entradas)
+    print(f"clientes={n_clientes} entradas={n_entradas}")
+
+    r_idx, t_idx = _medir(match_indexado, clientes, entradas)
+    print(f"PixMatcher (inclui montar índice): {t_idx * 1000:9.1f} ms")
+    r_loop, t_loop = _medir(match_loop, clientes, entradas)
+    print(f"Loop original:                     {t_loop * 1000:9.1f} ms")
+    print(f"Speedup: {t_loop / t_idx:.1f}x | matches: {sum(1 for x in r_idx if x)}")
+    if r_idx != r_loop:
+        print("ERRO: resultados diferentes entre loop e PixMatcher")
+        return False
+    print("Resultados idênticos: OK")
+    return True
+
+
+if __name__ == "__main__":
+    ok = main()
+    exit(0 if ok else 1)
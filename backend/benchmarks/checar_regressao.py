@@ -0,0 +1,103 @@
+"""
+Checagem de regressão: compara uma rodada da suíte (benchmarks/suite.py) com o baseline.json.
+
+A comparação usa o tempo relativo à calibração (min do caso / min da carga de calibração),
+o que absorve boa parte da diferença entre máquinas. Sai com código 1 se algum caso ficou
+mais lento que baseline × (1 + tolerância) mesmo depois de remedido (--confirmacoes);
+casos novos ou ausentes só são listados.
+
+Execute na pasta backend:
+    python benchmarks/checar_regressao.py [--tolerancia 0.3] [--tamanhos 1000 10000] [--casos pix]
+    python benchmarks/checar_regressao.py --resultados resultados.json   # sem rodar de novo
+    python benchmarks/checar_regressao.py --atualizar                    # aceita a rodada como baseline
+"""
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks import suite  # noqa: E402
+
+
+def comparar(atual: dict, baseline: dict, tolerancia: float) -> tuple[list[tuple], list[str]]:
+    """Devolve (linhas da tabela, chaves que regrediram). Linha: (chave, base, atual, variação)."""
+    linhas, regressoes = [], []
+    base_res = baseline.get("resultados", {})
+    for chave, r in atual["resultados"].items():
+        b = base_res.get(chave)
+        if b is None:
+            linhas.append((chave, None, r["relativo"], None))
+            continue
+        variacao = r["relativo"] / b["relativo"] - 1
+        linhas.append((chave, b["relativo"], r["relativo"], variacao))
+        if variacao > tolerancia:
+            regressoes.append(chave)
+    return linhas, regressoes
+
+
+def confirmar(atual: dict, baseline: dict, regressoes: list[str], repeticoes: int, tentativas: int) -> None:
+    """Remede os casos suspeitos e fica com o melhor tempo (ruído só piora, nunca melhora)."""
+    for chave in regressoes:
+        r = atual["resultados"][chave]
+        for _ in range(tentativas):
+            if r["relativo"] / baseline["resultados"][chave]["relativo"] - 1 <= 0:
+                break
+            novo = suite.executar([r["n"]], [r["caso"]], repeticoes, saida=lambda _: None)["resultados"][chave]
+            if novo["relativo"] < r["relativo"]:
+                atual["resultados"][chave] = r = novo
+
+
+def imprimir(linhas: list[tuple], regressoes: list[str], tolerancia: float) -> None:
+    cab = f"{'caso':<36} {'baseline':>10} {'atual':>10} {'variação':>9}"
+    print(cab)
+    print("-" * len(cab))
+    for chave, base, atual, variacao in linhas:
+        if base is None:
+            print(f"{chave:<36} {'—':>10} {atual:>10.3f} {'novo':>9}")
+            continue
+        marca = "  <-- REGRESSÃO" if chave in regressoes else ""
+        print(f"{chave:<36} {base:>10.3f} {atual:>10.3f} {variacao:>+9.1%}{marca}")
+    print(f"(tempo relativo à calibração; tolerância +{tolerancia:.0%})")
+
+
+def main() -> None:
+    parser = suite.argumentos()
+    parser.description = "Compara a suíte de benchmarks com o baseline"
+    parser.add_argument("--tolerancia", type=float, default=0.3, help="fração de piora aceita (0.3 = +30%%)")
+    parser.add_argument("--resultados", type=Path, default=None, help="JSON de suite.py --salvar (não roda a suíte)")
+    parser.add_argument("--baseline-arquivo", type=Path, default=suite.BASELINE)
+    parser.add_argument("--confirmacoes", type=int, default=2,
+                        help="rodadas extras para um caso acima da tolerância antes de acusar regressão")
+    parser.add_argument("--atualizar", action="store_true", help="grava a rodada atual como novo baseline")
+    args = parser.parse_args()
+
+    if not args.baseline_arquivo.exists() and not args.atualizar:
+        raise SystemExit(f"{args.baseline_arquivo} não existe: gere com python benchmarks/suite.py --baseline")
+    if args.resultados:
+        atual = json.loads(args.resultados.read_text(encoding="utf-8"))
+    else:
+        atual = suite.executar(args.tamanhos, suite.selecionar(args.casos), args.repeticoes, saida=lambda _: None)
+
+    if args.atualizar:
+        suite.gravar(atual, args.baseline_arquivo)
+        print(f"Baseline atualizado em {args.baseline_arquivo}")
+        return
+
+    baseline = json.loads(args.baseline_arquivo.read_text(encoding="utf-8"))
+    linhas, regressoes = comparar(atual, baseline, args.tolerancia)
+    if regressoes and not args.resultados and args.confirmacoes:
+        confirmar(atual, baseline, regressoes, args.repeticoes, args.confirmacoes)
+        linhas, regressoes = comparar(atual, baseline, args.tolerancia)
+    imprimir(linhas, regressoes, args.tolerancia)
+    ausentes = sorted(set(baseline.get("resultados", {})) - set(atual["resultados"]))
+    if ausentes and not (args.casos or args.tamanhos != list(suite.TAMANHOS_PADRAO)):
+        print(f"Ausentes nesta rodada: {', '.join(ausentes)}")
+    if regressoes:
+        print(f"{len(regressoes)} caso(s) acima da tolerância: {', '.join(regressoes)}")
+        sys.exit(1)
+    print("Sem regressões.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Dados sintéticos e reprodutíveis (seed fixa) para os benchmarks.
+"""
+import random
+from datetime import date, timedelta
+
+_PRENOMES = [
+    "João", "Maria", "José", "Ana", "Antônio", "Francisca", "Carlos", "Paula", "Luís", "Márcia",
+    "Pedro", "Luíza", "Lucas", "Juliana", "Gabriel", "Fernanda", "Rafael", "Letícia", "Tiago", "Débora",
+]
+_SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Conceição", "Pereira", "Lima", "Gonçalves", "Araújo", "Ribeiro",
+    "Gomes", "Martins", "Fálcão", "Monteiro", "Barbosa", "Brandão", "Simões", "Assunção", "Magalhães", "Peçanha",
+]
+
+
+def gerar_clientes(n: int, seed: int = 42) -> list[dict]:
+    """n clientes ativos com nome único (nome + 2 sobrenomes + sufixo), mensalidade e vencimento."""
+    rnd = random.Random(seed)
+    clientes = []
+    for i in range(n):
+        nome = f"{rnd.choice(_PRENOMES)} {rnd.choice(_SOBRENOMES)} {rnd.choice(_SOBRENOMES)} {i:06d}"
+        clientes.append({
+            "id": f"00000000-0000-0000-0000-{i:012d}",
+            "nome": nome,
+            "documento_cpf_cnpj": f"{rnd.randrange(10**10, 10**11)}",
+            "valor_mensalidade": float(rnd.choice([99.9, 150, 200, 250.5, 300, 450, 500, 750, 1000, 1200])),
+            "dia_vencimento": rnd.randint(1, 28),
+            "status_ativo": True,
+        })
+    return clientes
+
+
+def gerar_entradas_pix(clientes: list[dict], n: int, taxa_match: float = 0.6, seed: int = 7) -> list[dict]:
+    """n entradas de extrato já normalizadas; ~taxa_match delas pagas por algum cliente."""
+    rnd = random.Random(seed)
+    hoje = date.today()
+    entradas = []
+    for i in range(n):
+        if clientes and rnd.random() < taxa_match:
+            c = rnd.choice(clientes)
+            desc = f"PIX RECEBIDO - {c['nome'].upper()} - CPF ***{c['documento_cpf_cnpj'][-3:]}"
+            valor = float(c["valor_mensalidade"])
+        else:
+            desc = f"PIX RECEBIDO - {rnd.choice(_PRENOMES)} {rnd.choice(_SOBRENOMES)} avulso {i}"
+            valor = round(rnd.uniform(10, 2000), 2)
+        entradas.append({
+            "descricao": desc,
+            "valor": valor,
+            "data": str(hoje - timedelta(days=rnd.randint(0, 29))),
+            "eh_pix": True,
+            "hash_bancario": f"E{i:020d}",
+        })
+    return entradas
+
+
+def gerar_extrato_bruto(n: int, seed: int = 11) -> dict:
+    """Resposta crua da API de extrato (n lançamentos) com os nomes de campo alternativos
+    que _normalizar_transacoes aceita (descricao/historico, valor/valorLancamento, ...)."""
+    rnd = random.Random(seed)
+    hoje = date.today()
+    itens = []
+    for i in range(n):
+        dia = str(hoje - timedelta(days=rnd.randint(0, 29)))
+        nome = f"{rnd.choice(_PRENOMES)} {rnd.choice(_SOBRENOMES)}"
+        valor = round(rnd.uniform(10, 2000), 2)
+        if i % 3 == 0:
+            itens.append({"descricao": f"PIX RECEBIDO - {nome}", "valor": valor, "data": dia, "tipo": "PIX", "id": f"E{i:020d}"})
+        elif i % 3 == 1:
+            itens.append({"historico": f"TED {nome}", "valorLancamento": str(valor), "dataLancamento": dia, "tipoTransacao": "TED", "hash": f"H{i}"})
+        else:
+            itens.append({"descricaoTransacao": f"Pix recebido {nome}", "valor": valor, "dataTransacao": f"{dia}T10:00:00Z", "hashBancario": f"B{i}"})
+    return {"_content": itens}
+
+
+def gerar_datas(n: int, seed: int = 13) -> list[str | None]:
+    """Datas em formatos variados como chegam do extrato/GPT (ISO, dd/mm/aaaa, com hora, vazias)."""
+    rnd = random.Random(seed)
+    hoje = date.today()
+    out: list[str | None] = []
+    for i in range(n):
+        d = hoje - timedelta(days=rnd.randint(0, 400))
+        formato = i % 5
+        if formato == 0:
+            out.append(d.isoformat())
+        elif formato == 1:
+            out.append(f"{d.year}/{d.month:02d}/{d.day:02d}")
+        elif formato == 2:
+            out.append(f"{d.isoformat()}T12:34:56Z")
+        elif formato == 3:
+            out.append(f"{d.day:02d}/{d.month:02d}/{d.year}")  # não é Y-M-D: cai no fallback
+        else:
+            out.append(None if rnd.random() < 0.5 else "")
+    return out
+
+
+def gerar_transacoes(clientes: list[dict], n: int, seed: int = 17) -> list[dict]:
+    """n linhas de transacoes (data_pagamento desc) de clientes existentes, como na exportação."""
+    rnd = random.Random(seed)
+    hoje = date.today()
+    linhas = []
+    for i in range(n):
+        c = clientes[rnd.randrange(len(clientes))] if clientes else {"id": "0", "valor_mensalidade": 0}
+        linhas.append({
+            "id": f"10000000-0000-0000-0000-{i:012d}",
+            "data_pagamento": str(hoje - timedelta(days=rnd.randint(0, 720))),
+            "valor": c["valor_mensalidade"],
+            "cliente_id": c["id"],
+        })
+    linhas.sort(key=lambda t: (t["data_pagamento"], t["id"]), reverse=True)
+    return linhas
+
+
+def gerar_payloads_webhook(n: int, seed: int = 19) -> list[dict]:
+    """Payloads do webhook: Z-API texto, Z-API áudio, phone com @lid, grupo e formato Evolution."""
+    rnd = random.Random(seed)
+    payloads = []
+    for i in range(n):
+        phone = f"5511{rnd.randrange(10**8, 10**9)}"
+        texto = f"  Cadastrar cliente {rnd.choice(_PRENOMES)}   {rnd.choice(_SOBRENOMES)}, mensalidade {rnd.choice([150, 300])}  "
+        tipo = i % 5
+        if tipo == 0:
+            payloads.append({"phone": phone, "fromMe": False, "text": {"message": texto}, "messageId": f"m{i}"})
+        elif tipo == 1:
+            payloads.append({"phone": f"{phone}@lid", "audio": {"audioUrl": "x"}, "message": {"audio": {"audio": "T2dnUw=="}}})
+        elif tipo == 2:
+            payloads.append({"participantPhone": phone, "phone": f"{phone}-group", "text": {"message": texto}})
+        elif tipo == 3:
+            payloads.append({"data": {"event": "messages.upsert", "phone": phone, "messages": [
+                {"key": {"id": f"k{i}"}, "message": {"conversation": texto}}]}})
+        else:
+            payloads.append({"senderPhone": f"+55 (11) {phone[4:9]}-{phone[9:]}", "message": {"text": texto}})
+    return payloads
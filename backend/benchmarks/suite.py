@@ -0,0 +1,287 @@
+"""
+Suíte de benchmarks dos caminhos quentes (match PIX, status, normalização, CSV, webhook).
+
+Cada caso roda com datasets sintéticos de 1k/10k/100k itens (benchmarks/dados.py, seed fixa).
+O preparo dos dados fica fora da medição; de cada caso guarda-se o mínimo e a mediana de
+várias repetições. Antes de cada caso mede-se uma carga de calibração (Python puro) e
+checar_regressao.py compara a razão caso/calibração, que absorve a diferença entre máquinas.
+
+Execute na pasta backend:
+    python benchmarks/suite.py [--tamanhos 1000 10000] [--casos pix status] [--repeticoes 5]
+                               [--salvar resultados.json] [--baseline [--rodadas 3]]
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.api.bank_sync import (  # noqa: E402
+    _cliente_corresponde_entrada_pix,
+    _normalizar_nome,
+    _parse_data_pagamento,
+)
+from app.api.pix_matcher import PixMatcher  # noqa: E402
+from app.routers.clientes import _csv_contabilidade, _row_to_cliente, _status_pagamento  # noqa: E402
+from app.routers.webhook import (  # noqa: E402
+    _extrair_phone_resposta,
+    _extrair_texto_payload_evolution,
+    _extrair_texto_zapi,
+    _limpar_texto_para_ia,
+)
+from app.santander_api import _normalizar_transacoes  # noqa: E402
+from benchmarks.dados import (  # noqa: E402
+    gerar_clientes,
+    gerar_datas,
+    gerar_entradas_pix,
+    gerar_extrato_bruto,
+    gerar_payloads_webhook,
+    gerar_transacoes,
+)
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+TAMANHOS_PADRAO = (1_000, 10_000, 100_000)
+_PAGINA_CSV = 1000  # mesmo tamanho de página que _paginas_transacoes busca
+
+
+# Cada caso: preparar(n) -> estado (fora da medição); executar(estado) -> qualquer coisa.
+def _prep_pix_corresponde(n):
+    clientes = gerar_clientes(n)
+    entradas = gerar_entradas_pix(clientes, n)
+    # Cada entrada contra um cliente fixo: ~metade dos pares casa no valor e exercita o nome
+    return [(clientes[i], round(float(e["valor"]), 2), e["descricao"]) for i, e in enumerate(entradas)]
+
+
+def _exec_pix_corresponde(pares):
+    return sum(1 for c, v, d in pares if _cliente_corresponde_entrada_pix(c, v, d))
+
+
+def _prep_pix_matcher(n):
+    clientes = gerar_clientes(n)
+    return clientes, gerar_entradas_pix(clientes, min(n, 5000))
+
+
+def _exec_pix_matcher(estado):
+    clientes, entradas = estado
+    matcher = PixMatcher(clientes)
+    return sum(1 for e in entradas if matcher.candidatos(round(float(e["valor"]), 2), e["descricao"]))
+
+
+def _prep_normalizar_nome(n):
+    return [c["nome"] for c in gerar_clientes(n)]
+
+
+def _exec_normalizar_nome(nomes):
+    return [_normalizar_nome(s) for s in nomes]
+
+
+def _prep_parse_data(n):
+    return gerar_datas(n), date.today()
+
+
+def _exec_parse_data(estado):
+    datas, hoje = estado
+    return [_parse_data_pagamento(s, hoje) for s in datas]
+
+
+def _prep_normalizar_transacoes(n):
+    return gerar_extrato_bruto(n)
+
+
+def _exec_normalizar_transacoes(bruto):
+    return _normalizar_transacoes(bruto)
+
+
+def _pagos(clientes):
+    return {c["id"] for c in clientes[::3]}
+
+
+def _prep_status(n):
+    clientes = gerar_clientes(n)
+    return [(c["id"], c["dia_vencimento"]) for c in clientes], _pagos(clientes)
+
+
+def _exec_status(estado):
+    itens, pagos = estado
+    return [_status_pagamento(cid, dia, pagos) for cid, dia in itens]
+
+
+def _prep_row_to_cliente(n):
+    clientes = gerar_clientes(n)
+    return clientes, _pagos(clientes)
+
+
+def _exec_row_to_cliente(estado):
+    rows, pagos = estado
+    return [_row_to_cliente(r, pagos) for r in rows]
+
+
+def _prep_csv(n):
+    clientes = gerar_clientes(max(1, n // 10))
+    transacoes = gerar_transacoes(clientes, n)
+    mapa = {c["id"]: (c["nome"], c["documento_cpf_cnpj"]) for c in clientes}
+    paginas = [transacoes[i:i + _PAGINA_CSV] for i in range(0, len(transacoes), _PAGINA_CSV)]
+    return paginas, mapa
+
+
+def _exec_csv(estado, compactar=False):
+    paginas, mapa = estado
+    return sum(len(b) for b in _csv_contabilidade(paginas[0], iter(paginas[1:]), mapa, compactar))
+
+
+def _prep_webhook(n):
+    return gerar_payloads_webhook(n)
+
+
+def _exec_webhook(payloads):
+    out = 0
+    for body in payloads:
+        texto = _extrair_texto_zapi(body) or _extrair_texto_payload_evolution(body)
+        if texto:
+            texto = _limpar_texto_para_ia(texto)
+        if _extrair_phone_resposta(body):
+            out += 1
+    return out
+
+
+CASOS = {
+    "pix_corresponde": (_prep_pix_corresponde, _exec_pix_corresponde),
+    "pix_matcher": (_prep_pix_matcher, _exec_pix_matcher),
+    "normalizar_nome": (_prep_normalizar_nome, _exec_normalizar_nome),
+    "parse_data_pagamento": (_prep_parse_data, _exec_parse_data),
+    "normalizar_transacoes": (_prep_normalizar_transacoes, _exec_normalizar_transacoes),
+    "status_pagamento": (_prep_status, _exec_status),
+    "row_to_cliente": (_prep_row_to_cliente, _exec_row_to_cliente),
+    "csv_contabilidade": (_prep_csv, _exec_csv),
+    "csv_contabilidade_gzip": (_prep_csv, lambda estado: _exec_csv(estado, compactar=True)),
+    "webhook_extratores": (_prep_webhook, _exec_webhook),
+}
+
+
+def _medir(func, arg, repeticoes: int, duracao_min: float = 0.05) -> list[float]:
+    """Tempo (s) por chamada em cada repetição. Como no timeit: GC desligado e, para casos
+    curtos, várias chamadas por repetição até somar duracao_min (reduz o ruído de 1k)."""
+    t0 = time.perf_counter()  # a primeira chamada também serve de aquecimento
+    func(arg)
+    voltas = max(1, int(duracao_min / max(time.perf_counter() - t0, 1e-9)))
+    tempos = []
+    gc_ligado = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeticoes):
+            t0 = time.perf_counter()
+            for _ in range(voltas):
+                func(arg)
+            tempos.append((time.perf_counter() - t0) / voltas)
+    finally:
+        if gc_ligado:
+            gc.enable()
+    return tempos
+
+
+def calibrar(repeticoes: int = 9) -> float:
+    """Mínimo (s) de uma carga fixa de Python puro (dicts, strings, sort): a régua da máquina."""
+    def carga(_):
+        d = {}
+        for i in range(20_000):
+            d[f"k{i % 5000}"] = d.get(f"k{i % 5000}", 0) + i
+        return sorted(d.items(), key=lambda kv: kv[1])
+
+    return min(_medir(carga, None, repeticoes))
+
+
+def executar(tamanhos, casos, repeticoes: int, saida=print) -> dict:
+    calibracoes = []
+    resultados = {}
+    for nome in casos:
+        preparar, rodar = CASOS[nome]
+        for n in tamanhos:
+            estado = preparar(n)
+            # Calibra colado a cada caso: em máquina compartilhada o ritmo da CPU varia durante a rodada
+            calibracao = calibrar()
+            calibracoes.append(calibracao)
+            # Tamanhos grandes com menos repetições: o mínimo já estabiliza
+            tempos = _medir(rodar, estado, max(3, repeticoes if n <= 10_000 else repeticoes // 2))
+            chave = f"{nome}[{n}]"
+            resultados[chave] = {
+                "caso": nome,
+                "n": n,
+                "min_s": min(tempos),
+                "mediana_s": statistics.median(tempos),
+                "us_por_item": min(tempos) / n * 1e6,
+                "relativo": min(tempos) / calibracao,
+            }
+            saida(f"{chave:<36} min {min(tempos) * 1000:>10.2f} ms  mediana {statistics.median(tempos) * 1000:>10.2f} ms"
+                  f"  {min(tempos) / n * 1e6:>8.3f} µs/item")
+    return {
+        "gerado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "maquina": platform.platform(),
+        "calibracao_s": min(calibracoes),
+        "resultados": resultados,
+    }
+
+
+def argumentos(parser: argparse.ArgumentParser | None = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(description="Benchmarks dos caminhos quentes")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=list(TAMANHOS_PADRAO))
+    parser.add_argument("--casos", nargs="+", default=[],
+                        help="filtra casos por substring (ex.: pix csv); padrão: todos")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    return parser
+
+
+def selecionar(filtros: list[str]) -> list[str]:
+    casos = [c for c in CASOS if not filtros or any(f in c for f in filtros)]
+    if not casos:
+        raise SystemExit(f"nenhum caso corresponde a {filtros}; disponíveis: {', '.join(CASOS)}")
+    return casos
+
+
+def mediana_de_rodadas(relatorios: list[dict]) -> dict:
+    """Junta várias rodadas ficando, por caso, com a de relativo mediano (baseline menos sujeito à sorte)."""
+    final = dict(relatorios[0], resultados={})
+    for chave in relatorios[0]["resultados"]:
+        rodadas = sorted((r["resultados"][chave] for r in relatorios), key=lambda x: x["relativo"])
+        final["resultados"][chave] = rodadas[len(rodadas) // 2]
+    final["calibracao_s"] = min(r["calibracao_s"] for r in relatorios)
+    final["rodadas"] = len(relatorios)
+    return final
+
+
+def gravar(relatorio: dict, caminho: Path) -> None:
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main() -> None:
+    parser = argumentos()
+    parser.add_argument("--salvar", type=Path, default=None, help="grava os resultados neste JSON")
+    parser.add_argument("--baseline", action="store_true", help=f"grava em {BASELINE.name} (nova referência)")
+    parser.add_argument("--rodadas", type=int, default=None,
+                        help="rodadas completas combinadas pela mediana (padrão: 3 com --baseline, senão 1)")
+    args = parser.parse_args()
+    rodadas = args.rodadas or (3 if args.baseline else 1)
+    casos = selecionar(args.casos)
+    relatorios = []
+    for i in range(rodadas):
+        if rodadas > 1:
+            print(f"Rodada {i + 1}/{rodadas}")
+        relatorios.append(executar(args.tamanhos, casos, args.repeticoes))
+    relatorio = mediana_de_rodadas(relatorios)
+    if args.salvar:
+        gravar(relatorio, args.salvar)
+    if args.baseline:
+        gravar(relatorio, BASELINE)
+        print(f"Baseline gravado em {BASELINE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,17 @@
 """
 Conexão com a API de Extrato do Santander Sandbox usando certificados.
 Use os certificados na pasta backend/certs/: privada.key e certificado Santander.
+
+cliente_santander: cliente mTLS de vida longa usado pelo app (aberto/fechado no lifespan).
+O SSLContext é montado uma vez e as conexões keep-alive são reaproveitadas entre chamadas;
+se o certificado ou a chave mudarem no disco (mtime/tamanho), o próximo obter() monta um
+cliente novo e o antigo é fechado depois de um intervalo, sem derrubar requisições em curso.
 """
+import asyncio
+import logging
 import os
+import ssl
+import time
 from pathlib import Path
 
 import httpx
@@ -10,9 +19,9 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-# Diretório dos certificados (pasta certs na mesma pasta que este arquivo)
+# Diretório dos certificados (pasta certs na mesma pasta que este arquivo; CERT_DIR sobrescreve)
 BASE_DIR = Path(__file__).resolve().parent
-CERTS_DIR = BASE_DIR / "certs"
+CERTS_DIR = Path(os.getenv("CERT_DIR") or BASE_DIR / "certs")
 
 # Nomes dos arquivos (ajuste se o certificado do Santander tiver outro nome)
 CERT_KEY_FILE = os.getenv("CERT_KEY_FILE", "privada.key")
@@ -55,7 +64,7 @@ def obter_cliente_santander():
 
 
 def obter_cliente_santander_async():
-    """Cliente assíncrono para uso nas rotas FastAPI."""
+    """Cliente assíncrono avulso (o chamador fecha). No app, use cliente_santander.obter()."""
     cert, key = _caminhos_certificados()
     return httpx.AsyncClient(
         cert=(cert, key),
@@ -64,6 +73,120 @@ def obter_cliente_santander_async():
     )
 
 
+logger = logging.getLogger(__name__)
+
+# Tempo que um cliente substituído (certificado trocado) continua aberto para terminar requisições
+_FECHAR_ANTIGO_APOS = 60.0
+
+
+def _criar_ssl_context(cert: str, key: str) -> ssl.SSLContext:
+    ctx = ssl.create_default_context()
+    ctx.load_cert_chain(cert, key)
+    return ctx
+
+
+def _assinatura(*caminhos: str) -> tuple:
+    """(caminho, mtime, tamanho) dos arquivos: muda quando o certificado é trocado no disco."""
+    return tuple((c, os.stat(c).st_mtime_ns, os.stat(c).st_size) for c in caminhos)
+
+
+class ClienteSantander:
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+        self._assinatura: tuple | None = None
+        self._carregado_em: float | None = None
+        self._lock = asyncio.Lock()
+        self._antigos: set[asyncio.Task] = set()
+        self.recargas = 0
+
+    async def obter(self) -> httpx.AsyncClient:
+        """
+        Cliente mTLS compartilhado (não feche). Levanta FileNotFoundError se os
+        certificados não existirem.
+        """
+        cert, key = _caminhos_certificados()
+        assinatura = _assinatura(cert, key)
+        if self._client is not None and assinatura == self._assinatura:
+            return self._client
+        async with self._lock:
+            if self._client is None or assinatura != self._assinatura:
+                # Leitura/parse do certificado fora do event loop
+                ctx = await asyncio.to_thread(_criar_ssl_context, cert, key)
+                antigo = self._client
+                self._client = httpx.AsyncClient(
+                    verify=ctx,
+                    timeout=30.0,
+                    limits=httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60.0),
+                )
+                self._assinatura = assinatura
+                self._carregado_em = time.time()
+                if antigo is not None:
+                    self.recargas += 1
+                    logger.info("Santander: certificado alterado no disco; cliente mTLS recarregado")
+                    tarefa = asyncio.create_task(self._fechar_depois(antigo, _FECHAR_ANTIGO_APOS))
+                    self._antigos.add(tarefa)
+                    tarefa.add_done_callback(self._antigos.discard)
+        return self._client
+
+    @staticmethod
+    async def _fechar_depois(client: httpx.AsyncClient, segundos: float) -> None:
+        try:
+            await asyncio.sleep(segundos)
+        finally:
+            await client.aclose()
+
+    async def abrir(self) -> None:
+        """Monta o cliente no startup; sem certificados, só registra (as rotas respondem 503)."""
+        try:
+            await self.obter()
+        except FileNotFoundError as e:
+            logger.info("Santander: %s", e)
+        except (ssl.SSLError, OSError) as e:
+            logger.warning("Santander: falha ao carregar certificados: %s", e)
+
+    async def fechar(self) -> None:
+        for tarefa in list(self._antigos):
+            tarefa.cancel()
+        await asyncio.gather(*self._antigos, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._assinatura = None
+
+    async def saude(self, url: str, timeout: float = 5.0) -> dict:
+        """
+        Sonda de saúde: certificados carregados e handshake mTLS até a API. Qualquer resposta
+        HTTP (mesmo 401/404) conta como conexão ok; erro de TLS/rede não.
+        """
+        try:
+            client = await self.obter()
+        except (FileNotFoundError, ssl.SSLError, OSError) as e:
+            return {"ok": False, "certificados": False, "erro": str(e)}
+        inicio = time.perf_counter()
+        try:
+            r = await client.get(url, timeout=timeout)
+        except httpx.HTTPError as e:
+            return {"ok": False, "certificados": True, "erro": f"{type(e).__name__}: {e}", **self.stats()}
+        return {
+            "ok": r.status_code < 500,
+            "certificados": True,
+            "status_http": r.status_code,
+            "latencia_ms": round((time.perf_counter() - inicio) * 1000, 1),
+            **self.stats(),
+        }
+
+    def stats(self) -> dict:
+        return {
+            "aberto": self._client is not None,
+            "certificado": self._assinatura[0][0] if self._assinatura else None,
+            "carregado_em": self._carregado_em,
+            "recargas": self.recargas,
+        }
+
+
+cliente_santander = ClienteSantander()
+
+
 # Cliente Supabase (banco de dados) - será usado pelo app
 def obter_supabase():
     """Retorna o client Supabase configurado via SUPABASE_URL e SUPABASE_KEY."""
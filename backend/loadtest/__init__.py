@@ -0,0 +1,5 @@
+# Teste de carga com serviços falsos locais (PostgREST, Santander mTLS, OpenAI, Z-API).
+# Execute na pasta backend:
+#   python -m loadtest.rodar                      (sobe tudo, roda os cenários e encerra)
+#   python -m loadtest.servicos                   (só os serviços falsos; imprime as variáveis)
+#   python -m loadtest.carga --alvo http://127.0.0.1:8000 --cenario webhook
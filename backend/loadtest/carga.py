@@ -0,0 +1,246 @@
+"""
+Gerador de carga contra um backend já apontado para os serviços falsos.
+
+Cenários:
+- webhook:   rajada de mensagens do WhatsApp (cadastro/baixa no formato padrão, texto livre
+             que vai ao GPT e, opcionalmente, áudio); mede o aceite (HTTP) e o ponta a ponta
+             até a resposta chegar na Z-API falsa.
+- dashboard: polling de GET /api/clientes/dashboard + primeira página de /api/clientes.
+- listagem:  percorre /api/clientes?limit=N seguindo o X-Next-Cursor.
+- bank_sync: POST /api/bank/sync?completo=true (Santander mTLS + match + upsert).
+- misto:     dashboard em paralelo com a rajada de webhook.
+
+Relatório por cenário: requisições, erros por status, throughput e p50/p95/p99/máx.
+
+Execute na pasta backend:
+    python -m loadtest.carga --alvo http://127.0.0.1:8000 --cenario webhook --requisicoes 500 --concorrencia 50
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+import httpx
+
+from benchmarks.dados import _PRENOMES, _SOBRENOMES
+
+CENARIOS = ("webhook", "dashboard", "listagem", "bank_sync", "misto")
+
+
+@dataclass
+class Resultado:
+    nome: str
+    latencias: list[float] = field(default_factory=list)
+    status: Counter = field(default_factory=Counter)
+    duracao: float = 0.0
+
+    def registrar(self, inicio: float, status) -> None:
+        self.latencias.append(time.perf_counter() - inicio)
+        self.status[status] += 1
+
+    def resumo(self) -> dict:
+        lat = sorted(self.latencias)
+
+        def pct(p: float) -> float:
+            # Nearest-rank
+            return round(lat[max(0, -(-len(lat) * p // 100) - 1)] * 1000, 1) if lat else 0.0
+
+        erros = sum(n for s, n in self.status.items() if not (isinstance(s, int) and s < 400))
+        return {
+            "cenario": self.nome,
+            "requisicoes": len(lat),
+            "erros": erros,
+            "status": {str(s): n for s, n in sorted(self.status.items(), key=str)},
+            "throughput_rps": round(len(lat) / self.duracao, 1) if self.duracao else 0.0,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+            "max_ms": round(lat[-1] * 1000, 1) if lat else 0.0,
+        }
+
+
+async def _disparar(nome: str, n: int, concorrencia: int, requisicao) -> Resultado:
+    """Executa requisicao(i) n vezes com até `concorrencia` em voo; requisicao devolve o status."""
+    resultado = Resultado(nome)
+    proximo = iter(range(n))
+
+    async def trabalhador() -> None:
+        for i in proximo:
+            inicio = time.perf_counter()
+            try:
+                status = await requisicao(i)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            resultado.registrar(inicio, status)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(max(1, concorrencia))))
+    resultado.duracao = time.perf_counter() - t0
+    return resultado
+
+
+def _mensagem(i: int, rnd: random.Random, taxa_audio: float, prefixo: str) -> tuple[str, dict]:
+    phone = f"55119{prefixo}{i:06d}"
+    corpo = {"fromMe": False, "phone": phone, "messageId": f"lt-{prefixo}-{i}", "type": "ReceivedCallback"}
+    sorteio = rnd.random()
+    if sorteio < taxa_audio:
+        # Bytes aleatórios: cada áudio é diferente (não cai no cache de transcrição)
+        corpo["audio"] = {"audioUrl": "", "mimeType": "audio/ogg"}
+        corpo["message"] = {"audio": {"audio": base64.b64encode(os.urandom(2048)).decode()}}
+        return phone, corpo
+    nome = f"{rnd.choice(_PRENOMES)} {rnd.choice(_SOBRENOMES)} {prefixo}{i}"
+    escolha = rnd.random()
+    if escolha < 0.4:
+        texto = f"Cadastrar cliente {nome}, mensalidade {rnd.choice([150, 200, 300])}, vencimento dia {rnd.randint(1, 28)}"
+    elif escolha < 0.7:
+        texto = f"Baixa no pagamento de {nome}"
+    else:
+        # Texto livre: vai ao GPT (o número no fim evita acerto no cache de interpretação)
+        texto = f"Oi, quanto eu recebi esse mês? ref {prefixo}{i}"
+    corpo["text"] = {"message": texto}
+    return phone, corpo
+
+
+async def cenario_webhook(client: httpx.AsyncClient, args, zapi: str) -> list[Resultado]:
+    rnd = random.Random(args.seed)
+    prefixo = f"{int(time.time()) % 100:02d}"
+    enviados: dict[str, float] = {}
+
+    async def enviar(i: int):
+        phone, corpo = _mensagem(i, rnd, args.taxa_audio, prefixo)
+        enviados[phone] = time.time()
+        r = await client.post("/api/webhook/whatsapp", json=corpo)
+        return r.status_code
+
+    aceite = await _disparar("webhook (aceite HTTP)", args.requisicoes, args.concorrencia, enviar)
+    ponta = Resultado("webhook (ponta a ponta até a Z-API)")
+    # Espera as respostas chegarem na Z-API falsa (processamento em background)
+    t0 = time.perf_counter()
+    async with httpx.AsyncClient(base_url=zapi, timeout=10) as z:
+        while True:
+            recebidas = (await z.get("/_recebidas")).json()
+            pendentes = [p for p in enviados if p not in recebidas]
+            if not pendentes or time.perf_counter() - t0 > args.espera_max:
+                break
+            await asyncio.sleep(0.25)
+    for phone, enviado_em in enviados.items():
+        chegadas = recebidas.get(phone)
+        if chegadas:
+            ponta.latencias.append(max(0.0, chegadas[0] - enviado_em))
+            ponta.status[200] += 1
+        else:
+            ponta.status["sem resposta"] += 1
+    ponta.duracao = aceite.duracao + (time.perf_counter() - t0)
+    return [aceite, ponta]
+
+
+async def cenario_dashboard(client: httpx.AsyncClient, args, zapi: str) -> list[Resultado]:
+    async def consultar(i: int):
+        if i % 2:
+            r = await client.get("/api/clientes", params={"limit": 50})
+        else:
+            r = await client.get("/api/clientes/dashboard")
+        return r.status_code
+
+    return [await _disparar("dashboard + 1a página", args.requisicoes, args.concorrencia, consultar)]
+
+
+async def cenario_listagem(client: httpx.AsyncClient, args, zapi: str) -> list[Resultado]:
+    cursor: dict[int, str | None] = {}
+
+    async def pagina(i: int):
+        leitor = i % args.concorrencia
+        params = {"limit": args.pagina}
+        if cursor.get(leitor):
+            params["cursor"] = cursor[leitor]
+        r = await client.get("/api/clientes", params=params)
+        cursor[leitor] = r.headers.get("x-next-cursor")
+        return r.status_code
+
+    return [await _disparar(f"listagem (limit={args.pagina})", args.requisicoes, args.concorrencia, pagina)]
+
+
+async def cenario_bank_sync(client: httpx.AsyncClient, args, zapi: str) -> list[Resultado]:
+    async def sincronizar(i: int):
+        r = await client.post("/api/bank/sync", params={"dias": args.dias, "completo": "true"})
+        return r.status_code
+
+    n = max(1, args.requisicoes // 50)
+    return [await _disparar(f"bank_sync ({args.dias} dias)", n, 1, sincronizar)]
+
+
+async def cenario_misto(client: httpx.AsyncClient, args, zapi: str) -> list[Resultado]:
+    resultados = await asyncio.gather(
+        cenario_webhook(client, args, zapi),
+        cenario_dashboard(client, args, zapi),
+    )
+    return [r for lista in resultados for r in lista]
+
+
+async def executar(args) -> list[dict]:
+    headers = {"X-API-KEY": args.api_key} if args.api_key else {}
+    limites = httpx.Limits(max_connections=args.concorrencia * 2, max_keepalive_connections=args.concorrencia * 2)
+    async with httpx.AsyncClient(base_url=args.alvo, headers=headers, timeout=args.timeout, limits=limites) as client:
+        funcoes = {
+            "webhook": cenario_webhook,
+            "dashboard": cenario_dashboard,
+            "listagem": cenario_listagem,
+            "bank_sync": cenario_bank_sync,
+            "misto": cenario_misto,
+        }
+        resumos = []
+        for nome in args.cenario:
+            for resultado in await funcoes[nome](client, args, args.zapi):
+                resumos.append(resultado.resumo())
+    return resumos
+
+
+def imprimir(resumos: list[dict]) -> None:
+    cab = f"{'cenário':<40} {'req':>6} {'erros':>6} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'máx':>8}"
+    print(cab)
+    print("-" * len(cab))
+    for r in resumos:
+        print(
+            f"{r['cenario']:<40} {r['requisicoes']:>6} {r['erros']:>6} {r['throughput_rps']:>8} "
+            f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['max_ms']:>8}"
+        )
+        if r["erros"]:
+            print(f"{'':<40} status: {r['status']}")
+    print("(latências em ms)")
+
+
+def argumentos(parser: argparse.ArgumentParser | None = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(description="Gerador de carga do backend")
+    g = parser.add_argument_group("carga")
+    g.add_argument("--alvo", default="http://127.0.0.1:8000", help="URL do backend")
+    g.add_argument("--zapi", default="http://127.0.0.1:18804", help="Z-API falsa (para o ponta a ponta do webhook)")
+    g.add_argument("--cenario", nargs="+", choices=CENARIOS, default=["webhook", "dashboard", "bank_sync"])
+    g.add_argument("--requisicoes", type=int, default=300)
+    g.add_argument("--concorrencia", type=int, default=20)
+    g.add_argument("--pagina", type=int, default=50, help="limit da listagem")
+    g.add_argument("--dias", type=int, default=30, help="janela do bank_sync")
+    g.add_argument("--taxa-audio", type=float, default=0.1, help="fração das mensagens do webhook que são áudio")
+    g.add_argument("--espera-max", type=float, default=120.0, help="segundos esperando as respostas do webhook")
+    g.add_argument("--timeout", type=float, default=120.0)
+    g.add_argument("--api-key", default=os.getenv("API_KEY", ""))
+    g.add_argument("--seed", type=int, default=11)
+    g.add_argument("--json", dest="saida_json", default="", help="grava o relatório neste arquivo")
+    return parser
+
+
+def main() -> None:
+    args = argumentos().parse_args()
+    resumos = asyncio.run(executar(args))
+    imprimir(resumos)
+    if args.saida_json:
+        with open(args.saida_json, "w", encoding="utf-8") as f:
+            json.dump(resumos, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Certificados descartáveis para o Santander falso (mTLS), gerados com o openssl da máquina.
+
+gerar(pasta) cria uma CA, o certificado do servidor (127.0.0.1/localhost) e o do cliente
+já com os nomes que o backend procura (privada.key e santander.crt), para apontar CERT_DIR
+para a pasta. O backend confia na CA via SSL_CERT_FILE. Nunca use a pasta backend/certs/.
+"""
+import shutil
+import subprocess
+from pathlib import Path
+
+_EXT_SERVIDOR = "subjectAltName=DNS:localhost,IP:127.0.0.1\nbasicConstraints=CA:FALSE\nauthorityKeyIdentifier=keyid\nkeyUsage=digitalSignature,keyEncipherment\nextendedKeyUsage=serverAuth\n"
+_EXT_CLIENTE = "basicConstraints=CA:FALSE\nauthorityKeyIdentifier=keyid\nkeyUsage=digitalSignature,keyEncipherment\nextendedKeyUsage=clientAuth\n"
+
+
+def _openssl(*args: str, pasta: Path) -> None:
+    subprocess.run(["openssl", *args], cwd=pasta, check=True, capture_output=True)
+
+
+def _assinar(nome: str, cn: str, ext: str, pasta: Path) -> None:
+    (pasta / f"{nome}.ext").write_text(ext)
+    _openssl("req", "-newkey", "rsa:2048", "-nodes", "-keyout", f"{nome}.key", "-out", f"{nome}.csr", "-subj", f"/CN={cn}", pasta=pasta)
+    _openssl(
+        "x509", "-req", "-in", f"{nome}.csr", "-CA", "ca.crt", "-CAkey", "ca.key", "-CAcreateserial",
+        "-out", f"{nome}.crt", "-days", "2", "-extfile", f"{nome}.ext",
+        pasta=pasta,
+    )
+
+
+def gerar(pasta: Path) -> dict[str, Path]:
+    """Gera certificados novos (válidos por 2 dias) em `pasta`; devolve os caminhos."""
+    if shutil.which("openssl") is None:
+        raise RuntimeError("openssl não encontrado no PATH: necessário para os certificados do Santander falso")
+    pasta.mkdir(parents=True, exist_ok=True)
+    cliente = pasta / "cliente"
+    caminhos = {
+        "ca": pasta / "ca.crt",
+        "servidor_crt": pasta / "servidor.crt",
+        "servidor_key": pasta / "servidor.key",
+        "cert_dir": cliente,
+    }
+    _openssl(
+        "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-keyout", "ca.key", "-out", "ca.crt",
+        "-days", "2", "-subj", "/CN=loadtest-ca", "-addext", "basicConstraints=critical,CA:TRUE",
+        "-addext", "keyUsage=critical,keyCertSign,cRLSign",
+        pasta=pasta,
+    )
+    _assinar("servidor", "127.0.0.1", _EXT_SERVIDOR, pasta)
+    _assinar("cliente", "loadtest-backend", _EXT_CLIENTE, pasta)
+    cliente.mkdir(exist_ok=True)
+    shutil.copy(pasta / "cliente.crt", cliente / "santander.crt")
+    shutil.copy(pasta / "cliente.key", cliente / "privada.key")
+    return caminhos
@@ -0,0 +1,98 @@
+"""
+OpenAI falsa: POST /v1/chat/completions e /v1/audio/transcriptions com latência configurável.
+
+- chat: responde no formato que o webhook espera ({"resposta": ...} ou, se o texto pedir
+  cadastro, {"cadastrar_cliente": {...}}), com usage de tokens estimado.
+- transcriptions: devolve um texto de cadastro derivado do hash do áudio (áudios diferentes
+  -> textos diferentes, então o cache de transcrição não mascara a carga).
+- taxa_429: fração das chamadas que respondem 429 (exercita o retry do ClienteOpenAI).
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+class OpenAIFalsa:
+    def __init__(self, latencia_chat_ms: float = 800.0, latencia_audio_ms: float = 1500.0, taxa_429: float = 0.0, seed: int = 1):
+        self.latencia_chat = latencia_chat_ms / 1000
+        self.latencia_audio = latencia_audio_ms / 1000
+        self.taxa_429 = taxa_429
+        self._rnd = random.Random(seed)
+        self.chamadas = {"chat": 0, "transcricao": 0, "429": 0}
+
+    async def esperar(self, media: float) -> None:
+        # Jitter de ±30% em volta da média, como uma API real
+        if media:
+            await asyncio.sleep(media * self._rnd.uniform(0.7, 1.3))
+
+    def limitar(self) -> JSONResponse | None:
+        if self.taxa_429 and self._rnd.random() < self.taxa_429:
+            self.chamadas["429"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                status_code=429,
+                headers={"retry-after": "0.2"},
+            )
+        return None
+
+
+def _interpretar(texto: str) -> dict:
+    m = re.search(r"cadastr\w*\s+(?:o\s+)?(?:cliente\s+)?([A-Za-zÀ-ú ]+?)(?:,|\s+valor|\s+mensalidade|$)", texto, re.I)
+    if m:
+        valor = re.search(r"(\d+(?:[.,]\d+)?)", texto)
+        return {"cadastrar_cliente": {
+            "nome": m.group(1).strip().title(),
+            "documento_cpf_cnpj": None,
+            "valor_mensalidade": float(valor.group(1).replace(",", ".")) if valor else 0,
+            "dia_vencimento": 10,
+        }}
+    return {"resposta": f"Entendi: {texto[:60]}"}
+
+
+def criar_app(openai: OpenAIFalsa) -> Starlette:
+    async def chat(request: Request) -> JSONResponse:
+        openai.chamadas["chat"] += 1
+        await openai.esperar(openai.latencia_chat)
+        erro = openai.limitar()
+        if erro:
+            return erro
+        corpo = await request.json()
+        mensagens = corpo.get("messages") or []
+        texto = next((m.get("content") or "" for m in reversed(mensagens) if m.get("role") == "user"), "")
+        conteudo = json.dumps(_interpretar(texto), ensure_ascii=False)
+        prompt = sum(len(m.get("content") or "") for m in mensagens) // 4
+        return JSONResponse({
+            "id": f"chatcmpl-{openai.chamadas['chat']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": corpo.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": conteudo}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt, "completion_tokens": len(conteudo) // 4, "total_tokens": prompt + len(conteudo) // 4},
+        })
+
+    async def transcricao(request: Request) -> JSONResponse:
+        openai.chamadas["transcricao"] += 1
+        # Multipart lido cru (sem python-multipart): o conteúdo só serve para variar o texto
+        digest = hashlib.sha256(await request.body()).hexdigest()
+        await openai.esperar(openai.latencia_audio)
+        erro = openai.limitar()
+        if erro:
+            return erro
+        return JSONResponse({"text": f"Cadastrar cliente Audio {digest[:6].upper()}, mensalidade 150, vencimento dia 10"})
+
+    async def stats(request: Request) -> JSONResponse:
+        return JSONResponse(openai.chamadas)
+
+    return Starlette(routes=[
+        Route("/v1/chat/completions", chat, methods=["POST"]),
+        Route("/v1/audio/transcriptions", transcricao, methods=["POST"]),
+        Route("/_stats", stats),
+    ])
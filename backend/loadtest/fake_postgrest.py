@@ -0,0 +1,394 @@
+"""
+PostgREST falso em memória para o teste de carga.
+
+Cobre o que app/db.py emite: select=colunas, filtros eq/neq/gt/gte/lt/lte/ilike/in/is,
+or=(...) com and(...) aninhado, order=col.asc,col.desc, limit/offset; POST com
+insert ou upsert (Prefer resolution=merge-duplicates|ignore-duplicates + on_conflict),
+PATCH/DELETE com filtros e POST /rpc/dashboard_kpis. Constraints únicas como no schema
+(id; transacoes (cliente_id, data_pagamento); sync_cursores.conta; webhook_mensagens.message_id):
+insert em conflito responde 409 como o Postgres (23505).
+
+Tabelas: clientes, transacoes, sync_cursores, webhook_mensagens.
+"""
+import asyncio
+import random
+import re
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from benchmarks.dados import gerar_clientes
+
+_CHAVES_UNICAS = {
+    "clientes": [("id",)],
+    "transacoes": [("id",), ("cliente_id", "data_pagamento")],
+    "sync_cursores": [("conta",)],
+    "webhook_mensagens": [("message_id",)],
+}
+_PADROES = {
+    "clientes": lambda: {"id": str(uuid.uuid4()), "status_ativo": True, "documento_cpf_cnpj": None},
+    "transacoes": lambda: {"id": str(uuid.uuid4()), "status_nota_fiscal": "pendente", "hash_bancario": None},
+    "sync_cursores": lambda: {"ultimo_hash": None},
+    "webhook_mensagens": lambda: {},
+}
+_PARAMS_RESERVADOS = {"select", "order", "limit", "offset", "on_conflict", "or", "and"}
+
+
+def _agora() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# --- Filtros -------------------------------------------------------------------
+
+def _dividir(texto: str) -> list[str]:
+    """Separa por vírgula no nível de cima (respeita parênteses e aspas)."""
+    partes, atual, nivel, aspas, escape = [], [], 0, False, False
+    for ch in texto:
+        if escape:
+            atual.append(ch)
+            escape = False
+            continue
+        if ch == "\\" and aspas:
+            atual.append(ch)
+            escape = True
+            continue
+        if ch == '"':
+            aspas = not aspas
+        elif not aspas and ch == "(":
+            nivel += 1
+        elif not aspas and ch == ")":
+            nivel -= 1
+        elif not aspas and nivel == 0 and ch == ",":
+            partes.append("".join(atual))
+            atual = []
+            continue
+        atual.append(ch)
+    if atual:
+        partes.append("".join(atual))
+    return partes
+
+
+def _valor_literal(texto: str) -> str:
+    texto = texto.strip()
+    if len(texto) >= 2 and texto[0] == texto[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", texto[1:-1])
+    return texto
+
+
+def _converter(valor_linha, literal: str):
+    """Converte o literal da URL para o tipo do valor da linha (bool/número/texto)."""
+    if isinstance(valor_linha, bool):
+        return literal.lower() == "true"
+    if isinstance(valor_linha, (int, float)):
+        try:
+            return float(literal)
+        except ValueError:
+            return literal
+    return literal
+
+
+def _comparar(valor, op: str, literal: str) -> bool:
+    if op == "is":
+        alvo = literal.lower()
+        if alvo == "null":
+            return valor is None
+        return valor is (alvo == "true")
+    if op == "in":
+        opcoes = [_valor_literal(v) for v in _dividir(literal.strip()[1:-1])]
+        return valor is not None and str(valor) in opcoes
+    if op in ("ilike", "like"):
+        regex = "^" + ".*".join(re.escape(p) for p in literal.replace("%", "*").split("*")) + "$"
+        return valor is not None and re.match(regex, str(valor), re.I if op == "ilike" else 0) is not None
+    if valor is None:
+        return False
+    alvo = _converter(valor, literal)
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool) and isinstance(alvo, float):
+        valor = float(valor)
+    elif not isinstance(valor, bool):
+        valor, alvo = str(valor), str(alvo)
+    try:
+        return {
+            "eq": valor == alvo,
+            "neq": valor != alvo,
+            "gt": valor > alvo,
+            "gte": valor >= alvo,
+            "lt": valor < alvo,
+            "lte": valor <= alvo,
+        }[op]
+    except KeyError:
+        raise ValueError(f"operador não suportado: {op}")
+
+
+def _filtro_simples(coluna: str, expressao: str):
+    negar = expressao.startswith("not.")
+    if negar:
+        expressao = expressao[4:]
+    op, _, literal = expressao.partition(".")
+    if op not in ("in",):
+        literal = _valor_literal(literal)
+
+    def testar(linha: dict) -> bool:
+        return _comparar(linha.get(coluna), op, literal) != negar
+
+    return testar
+
+
+def _filtro_logico(tipo: str, corpo: str):
+    """or(...) / and(...): termos col.op.valor ou and(...)/or(...) aninhados."""
+    filtros = []
+    for termo in _dividir(corpo):
+        termo = termo.strip()
+        m = re.match(r"^(and|or)\((.*)\)$", termo, re.S)
+        if m:
+            filtros.append(_filtro_logico(m.group(1), m.group(2)))
+        else:
+            coluna, _, expressao = termo.partition(".")
+            filtros.append(_filtro_simples(coluna, expressao))
+    if tipo == "or":
+        return lambda linha: any(f(linha) for f in filtros)
+    return lambda linha: all(f(linha) for f in filtros)
+
+
+def _filtros(params: list[tuple[str, str]]) -> list:
+    filtros = []
+    for chave, valor in params:
+        if chave in ("or", "and"):
+            filtros.append(_filtro_logico(chave, valor.strip()[1:-1]))
+        elif chave not in _PARAMS_RESERVADOS:
+            filtros.append(_filtro_simples(chave, valor))
+    return filtros
+
+
+def _ordenar(linhas: list[dict], order: str) -> list[dict]:
+    for termo in reversed([t.strip() for t in order.split(",") if t.strip()]):
+        partes = termo.split(".")
+        coluna, desc = partes[0], "desc" in partes[1:]
+        presentes = [l for l in linhas if l.get(coluna) is not None]
+        nulos = [l for l in linhas if l.get(coluna) is None]
+        presentes.sort(key=lambda l: l[coluna], reverse=desc)
+        linhas = presentes + nulos  # nullslast (padrão do Postgres em asc)
+    return linhas
+
+
+def _projetar(linhas: list[dict], select: str) -> list[dict]:
+    colunas = [c.strip() for c in select.split(",") if c.strip()]
+    if not colunas or "*" in colunas:
+        return [dict(l) for l in linhas]
+    return [{c: l.get(c) for c in colunas} for l in linhas]
+
+
+# --- Banco em memória -------------------------------------------------------------
+
+class BancoFalso:
+    def __init__(self, n_clientes: int = 1000, meses_transacoes: int = 3, latencia_ms: float = 0.0, seed: int = 42):
+        self.latencia = latencia_ms / 1000
+        self.tabelas: dict[str, list[dict]] = {t: [] for t in _CHAVES_UNICAS}
+        # Um dict por constraint única: (valores das colunas) -> linha
+        self.indices: dict[str, dict[tuple, dict]] = {
+            t: {chave: {} for chave in chaves} for t, chaves in _CHAVES_UNICAS.items()
+        }
+        self.requisicoes = 0
+        self._semear(n_clientes, meses_transacoes, seed)
+
+    def _semear(self, n_clientes: int, meses: int, seed: int) -> None:
+        rnd = random.Random(seed)
+        agora = _agora()
+        for c in gerar_clientes(n_clientes, seed=seed):
+            self._inserir_linha("clientes", {**c, "created_at": agora, "updated_at": agora})
+        hoje = date.today()
+        inicio = date(hoje.year, hoje.month, 1)
+        for _ in range(meses - 1):
+            inicio = (inicio - timedelta(days=1)).replace(day=1)
+        for c in self.tabelas["clientes"]:
+            mes = inicio
+            while mes <= hoje:
+                dia = min(c["dia_vencimento"], 28)
+                pagamento = mes.replace(day=dia)
+                if pagamento <= hoje and rnd.random() < 0.8:
+                    self._inserir_linha("transacoes", {
+                        "id": str(uuid.uuid4()),
+                        "cliente_id": c["id"],
+                        "valor": c["valor_mensalidade"],
+                        "data_pagamento": pagamento.isoformat(),
+                        "status_nota_fiscal": "emitida" if rnd.random() < 0.7 else "pendente",
+                        "hash_bancario": None,
+                        "created_at": agora,
+                    })
+                mes = (mes.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    @staticmethod
+    def _valores(linha: dict, chave: tuple) -> tuple:
+        return tuple(str(linha.get(c)) for c in chave)
+
+    def _conflito(self, tabela: str, linha: dict, chaves=None) -> dict | None:
+        for chave in chaves or _CHAVES_UNICAS[tabela]:
+            indice = self.indices[tabela].get(chave)
+            if indice is None:
+                valores = self._valores(linha, chave)
+                existente = next((l for l in self.tabelas[tabela] if self._valores(l, chave) == valores), None)
+            else:
+                existente = indice.get(self._valores(linha, chave))
+            if existente is not None:
+                return existente
+        return None
+
+    def _indexar(self, tabela: str, linha: dict) -> None:
+        for chave, indice in self.indices[tabela].items():
+            indice[self._valores(linha, chave)] = linha
+
+    def _desindexar(self, tabela: str, linha: dict) -> None:
+        for chave, indice in self.indices[tabela].items():
+            indice.pop(self._valores(linha, chave), None)
+
+    def _inserir_linha(self, tabela: str, linha: dict) -> dict:
+        self._indexar(tabela, linha)
+        self.tabelas[tabela].append(linha)
+        return linha
+
+    def _alterar_linha(self, tabela: str, linha: dict, dados: dict) -> None:
+        self._desindexar(tabela, linha)
+        linha.update(dados)
+        self._indexar(tabela, linha)
+
+    def selecionar(self, tabela: str, params: list[tuple[str, str]]) -> list[dict]:
+        filtros = _filtros(params)
+        p = dict(params)
+        id_eq = p.get("id", "")
+        if id_eq.startswith("eq."):
+            # Atalho: busca por id sem varrer a tabela
+            linha = self.indices[tabela].get(("id",), {}).get((id_eq[3:],))
+            linhas = [linha] if linha is not None else []
+        else:
+            linhas = self.tabelas[tabela]
+        linhas = [l for l in linhas if all(f(l) for f in filtros)]
+        if "order" in p:
+            linhas = _ordenar(linhas, p["order"])
+        offset = int(p.get("offset") or 0)
+        if "limit" in p:
+            linhas = linhas[offset:offset + int(p["limit"])]
+        elif offset:
+            linhas = linhas[offset:]
+        return _projetar(linhas, p.get("select", "*"))
+
+    def inserir(self, tabela: str, dados: list[dict], upsert: str | None, on_conflict: str | None) -> list[dict]:
+        criadas = []
+        for dado in dados:
+            linha = {**_PADROES[tabela](), **dado}
+            linha.setdefault("created_at", _agora())
+            alvo = [tuple(c.strip() for c in on_conflict.split(","))] if on_conflict else None
+            existente = self._conflito(tabela, linha, alvo)
+            if existente is not None:
+                if upsert == "ignore-duplicates":
+                    continue
+                if upsert == "merge-duplicates":
+                    self._alterar_linha(tabela, existente, dado)
+                    criadas.append(existente)
+                    continue
+                raise ConflitoUnico(tabela)
+            criadas.append(self._inserir_linha(tabela, linha))
+        return criadas
+
+    def atualizar(self, tabela: str, params: list[tuple[str, str]], dados: dict) -> list[dict]:
+        filtros = _filtros(params)
+        alteradas = []
+        for linha in self.tabelas[tabela]:
+            if all(f(linha) for f in filtros):
+                self._alterar_linha(tabela, linha, dados)
+                if tabela == "clientes":
+                    linha["updated_at"] = _agora()
+                alteradas.append(linha)
+        return alteradas
+
+    def remover(self, tabela: str, params: list[tuple[str, str]]) -> list[dict]:
+        filtros = _filtros(params)
+        ficam, removidas = [], []
+        for linha in self.tabelas[tabela]:
+            (removidas if all(f(linha) for f in filtros) else ficam).append(linha)
+        self.tabelas[tabela] = ficam
+        for linha in removidas:
+            self._desindexar(tabela, linha)
+        return removidas
+
+    def dashboard_kpis(self, p_hoje: str | None) -> dict:
+        """Mesma regra da função SQL 006_dashboard_kpis."""
+        hoje = date.fromisoformat(p_hoje) if p_hoje else date.today()
+        inicio = hoje.replace(day=1).isoformat()
+        fim = hoje.isoformat()
+        do_mes = [t for t in self.tabelas["transacoes"] if inicio <= str(t["data_pagamento"]) <= fim]
+        pagantes = {t["cliente_id"] for t in do_mes}
+        return {
+            "total_recebido": round(sum(float(t["valor"]) for t in do_mes), 2),
+            "notas_a_emitir": sum(1 for t in self.tabelas["transacoes"] if t.get("status_nota_fiscal") == "pendente"),
+            "clientes_inadimplentes": sum(
+                1
+                for c in self.tabelas["clientes"]
+                if c.get("status_ativo")
+                and hoje.day > min(c.get("dia_vencimento") or 28, 28)
+                and c["id"] not in pagantes
+            ),
+        }
+
+
+class ConflitoUnico(Exception):
+    pass
+
+
+def criar_app(banco: BancoFalso) -> Starlette:
+    def _erro(status: int, mensagem: str, code: str = "PGRST000") -> JSONResponse:
+        return JSONResponse({"code": code, "message": mensagem, "details": None, "hint": None}, status_code=status)
+
+    def _resolucao(request: Request) -> str | None:
+        for parte in (request.headers.get("prefer") or "").split(","):
+            chave, _, valor = parte.strip().partition("=")
+            if chave == "resolution":
+                return valor
+        return None
+
+    async def tabela(request: Request) -> Response:
+        nome = request.path_params["tabela"]
+        banco.requisicoes += 1
+        if banco.latencia:
+            await asyncio.sleep(banco.latencia)
+        if nome not in banco.tabelas:
+            return _erro(404, f'relation "public.{nome}" does not exist', "42P01")
+        params = list(request.query_params.multi_items())
+        try:
+            if request.method == "GET":
+                return JSONResponse(banco.selecionar(nome, params))
+            if request.method == "POST":
+                corpo = await request.json()
+                dados = corpo if isinstance(corpo, list) else [corpo]
+                criadas = banco.inserir(nome, dados, _resolucao(request), request.query_params.get("on_conflict"))
+                return JSONResponse(criadas, status_code=201)
+            if request.method == "PATCH":
+                return JSONResponse(banco.atualizar(nome, params, await request.json()))
+            if request.method == "DELETE":
+                banco.remover(nome, params)
+                return Response(status_code=204)
+        except ConflitoUnico:
+            return _erro(409, f'duplicate key value violates unique constraint "{nome}_key"', "23505")
+        except (ValueError, KeyError) as e:
+            return _erro(400, str(e), "PGRST100")
+        return _erro(405, "método não suportado")
+
+    async def rpc(request: Request) -> Response:
+        banco.requisicoes += 1
+        if banco.latencia:
+            await asyncio.sleep(banco.latencia)
+        if request.path_params["funcao"] != "dashboard_kpis":
+            return _erro(404, "função não encontrada", "PGRST202")
+        corpo = await request.json() if await request.body() else {}
+        return JSONResponse(banco.dashboard_kpis(corpo.get("p_hoje")))
+
+    async def stats(request: Request) -> Response:
+        return JSONResponse({"requisicoes": banco.requisicoes, **{t: len(l) for t, l in banco.tabelas.items()}})
+
+    return Starlette(routes=[
+        Route("/rest/v1/rpc/{funcao}", rpc, methods=["POST"]),
+        Route("/rest/v1/{tabela}", tabela, methods=["GET", "POST", "PATCH", "DELETE"]),
+        Route("/_stats", stats),
+    ])
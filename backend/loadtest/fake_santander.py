@@ -0,0 +1,107 @@
+"""
+API de extrato do Santander falsa (servida com mTLS pelo loadtest.servicos).
+
+GET .../extrato?initialDate=&finalDate=&_limit=&_offset= devolve lançamentos determinísticos
+por dia (mesma seed -> mesmo extrato, então a paginação é estável entre requisições), parte
+deles PIX pagos por clientes do PostgREST falso (mesmo gerar_clientes e seed).
+Paginação configurável: "pageable" (_pageable com _pageNumber/_totalPages, _offset é o
+número da página) ou "links" (_links._next.href).
+"""
+import asyncio
+import random
+from datetime import date, timedelta
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from benchmarks.dados import _PRENOMES, _SOBRENOMES
+
+
+class ExtratoFalso:
+    def __init__(
+        self,
+        clientes: list[dict],
+        transacoes_por_dia: int = 50,
+        taxa_match: float = 0.6,
+        paginacao: str = "pageable",
+        max_pagina: int = 500,
+        latencia_ms: float = 0.0,
+        seed: int = 7,
+    ):
+        self.clientes = clientes
+        self.transacoes_por_dia = transacoes_por_dia
+        self.taxa_match = taxa_match
+        self.paginacao = paginacao
+        self.max_pagina = max_pagina
+        self.latencia = latencia_ms / 1000
+        self.seed = seed
+        self.requisicoes = 0
+
+    def do_dia(self, dia: date) -> list[dict]:
+        rnd = random.Random(dia.toordinal() * 1_000_003 + self.seed)
+        itens = []
+        for i in range(self.transacoes_por_dia):
+            if self.clientes and rnd.random() < self.taxa_match:
+                c = rnd.choice(self.clientes)
+                desc = f"PIX RECEBIDO - {c['nome'].upper()} - CPF ***{str(c.get('documento_cpf_cnpj') or '')[-3:]}"
+                valor = float(c["valor_mensalidade"])
+            else:
+                desc = f"PIX RECEBIDO - {rnd.choice(_PRENOMES)} {rnd.choice(_SOBRENOMES)} avulso {i}"
+                valor = round(rnd.uniform(10, 2000), 2)
+            itens.append({
+                "id": f"E{dia.strftime('%Y%m%d')}{i:08d}",
+                "descricao": desc,
+                "valor": valor,
+                "data": dia.isoformat(),
+                "tipo": "PIX" if rnd.random() < 0.9 else "TED",
+            })
+        return itens
+
+    def periodo(self, inicio: date, fim: date) -> list[dict]:
+        itens, dia = [], inicio
+        while dia <= min(fim, date.today()):
+            itens.extend(self.do_dia(dia))
+            dia += timedelta(days=1)
+        return itens
+
+
+def criar_app(extrato: ExtratoFalso) -> Starlette:
+    async def consultar(request: Request) -> JSONResponse:
+        extrato.requisicoes += 1
+        if extrato.latencia:
+            await asyncio.sleep(extrato.latencia)
+        q = request.query_params
+        try:
+            fim = date.fromisoformat(q.get("finalDate") or date.today().isoformat())
+            inicio = date.fromisoformat(q.get("initialDate") or (fim - timedelta(days=7)).isoformat())
+            limite = max(1, min(int(q.get("_limit") or 50), extrato.max_pagina))
+            pagina = max(1, int(q.get("_offset") or 1))
+        except ValueError as e:
+            return JSONResponse({"_errors": [{"_message": str(e)}]}, status_code=400)
+        itens = extrato.periodo(inicio, fim)
+        total_paginas = max(1, -(-len(itens) // limite))
+        corpo = {"_content": itens[(pagina - 1) * limite: pagina * limite]}
+        if extrato.paginacao == "links":
+            if pagina < total_paginas:
+                proxima = request.url.include_query_params(_offset=pagina + 1)
+                corpo["_links"] = {"_next": {"href": f"{proxima.path}?{proxima.query}"}}
+        else:
+            corpo["_pageable"] = {
+                "_limit": limite,
+                "_offset": pagina,
+                "_pageNumber": pagina,
+                "_pageElements": len(corpo["_content"]),
+                "_totalPages": total_paginas,
+                "_totalElements": len(itens),
+            }
+        return JSONResponse(corpo)
+
+    async def stats(request: Request) -> JSONResponse:
+        return JSONResponse({"requisicoes": extrato.requisicoes})
+
+    return Starlette(routes=[
+        Route("/_stats", stats),
+        Route("/{caminho:path}/extrato", consultar),
+    ])
@@ -0,0 +1,50 @@
+"""
+Z-API falsa: recebe POST .../send-text e guarda quando cada telefone recebeu resposta.
+
+GET /_recebidas devolve {phone: [epoch, ...]}: o gerador de carga usa para medir o tempo
+ponta a ponta do webhook (POST recebido -> resposta enviada ao WhatsApp).
+taxa_erro: fração dos envios que respondem 500 (exercita retry e dead letter do EnviadorZapi).
+"""
+import asyncio
+import random
+import time
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+class ZapiFalsa:
+    def __init__(self, latencia_ms: float = 50.0, taxa_erro: float = 0.0, seed: int = 3):
+        self.latencia = latencia_ms / 1000
+        self.taxa_erro = taxa_erro
+        self._rnd = random.Random(seed)
+        self.recebidas: dict[str, list[float]] = {}
+        self.envios = 0
+        self.erros = 0
+
+
+def criar_app(zapi: ZapiFalsa) -> Starlette:
+    async def send_text(request: Request) -> JSONResponse:
+        zapi.envios += 1
+        if zapi.latencia:
+            await asyncio.sleep(zapi.latencia)
+        if zapi.taxa_erro and zapi._rnd.random() < zapi.taxa_erro:
+            zapi.erros += 1
+            return JSONResponse({"error": "instância indisponível"}, status_code=500)
+        corpo = await request.json()
+        zapi.recebidas.setdefault(str(corpo.get("phone")), []).append(time.time())
+        return JSONResponse({"zaapId": f"z{zapi.envios}", "messageId": f"m{zapi.envios}", "id": f"m{zapi.envios}"})
+
+    async def recebidas(request: Request) -> JSONResponse:
+        return JSONResponse(zapi.recebidas)
+
+    async def stats(request: Request) -> JSONResponse:
+        return JSONResponse({"envios": zapi.envios, "erros": zapi.erros, "telefones": len(zapi.recebidas)})
+
+    return Starlette(routes=[
+        Route("/{caminho:path}/send-text", send_text, methods=["POST"]),
+        Route("/_recebidas", recebidas),
+        Route("/_stats", stats),
+    ])
@@ -0,0 +1,101 @@
+"""
+Teste de carga completo: gera certificados descartáveis, sobe os serviços falsos e o backend
+(uvicorn, em subprocessos) apontado para eles, roda os cenários e encerra tudo.
+
+Execute na pasta backend:
+    python -m loadtest.rodar [--cenario webhook dashboard bank_sync] [--requisicoes 500]
+                             [--concorrencia 50] [--clientes 10000] [--latencia-openai-ms 800]
+Qualquer opção de loadtest.servicos e loadtest.carga vale aqui.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from loadtest import carga, certificados, servicos
+
+_BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _esperar(url: str, processo: subprocess.Popen, timeout: float = 60.0, **kwargs) -> None:
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError(f"processo saiu com código {processo.returncode} antes de {url} responder")
+        try:
+            httpx.get(url, timeout=1.0, **kwargs)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} não respondeu em {timeout:.0f}s")
+
+
+def _encerrar(processo: subprocess.Popen | None) -> None:
+    if processo is None or processo.poll() is not None:
+        return
+    processo.terminate()
+    try:
+        processo.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        processo.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sobe serviços falsos + backend e roda o teste de carga")
+    servicos.argumentos(parser)
+    carga.argumentos(parser)
+    parser.add_argument("--porta-backend", type=int, default=18800)
+    parser.add_argument("--workers-webhook", type=int, default=None, help="WEBHOOK_WORKERS do backend")
+    parser.add_argument("--log-backend", default="", help="arquivo para o stdout/stderr do backend")
+    args = parser.parse_args()
+
+    pasta = args.pasta_certs or Path(tempfile.mkdtemp(prefix="loadtest-certs-"))
+    certs = certificados.gerar(pasta)
+    # Repassa ao subprocesso só as opções dos serviços (as de carga ficam aqui)
+    opcoes_servicos, _ = servicos.argumentos().parse_known_args()
+    cmd_servicos = [sys.executable, "-m", "loadtest.servicos", "--pasta-certs", str(pasta)]
+    for chave, valor in vars(opcoes_servicos).items():
+        if chave != "pasta_certs" and valor is not None:
+            cmd_servicos += [f"--{chave.replace('_', '-')}", str(valor)]
+
+    env = {**os.environ, **servicos.variaveis_backend(certs)}
+    if args.workers_webhook:
+        env["WEBHOOK_WORKERS"] = str(args.workers_webhook)
+    if args.api_key:
+        env["API_KEY"] = args.api_key
+    log = open(args.log_backend, "w") if args.log_backend else subprocess.DEVNULL
+
+    proc_servicos = proc_backend = None
+    try:
+        proc_servicos = subprocess.Popen(cmd_servicos, cwd=_BACKEND_DIR, stdout=subprocess.DEVNULL)
+        portas = servicos.PORTAS_PADRAO
+        _esperar(f"http://127.0.0.1:{portas['postgrest']}/_stats", proc_servicos)
+        _esperar(f"http://127.0.0.1:{portas['zapi']}/_stats", proc_servicos)
+        proc_backend = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+             "--port", str(args.porta_backend), "--no-access-log"],
+            cwd=_BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+        args.alvo = f"http://127.0.0.1:{args.porta_backend}"
+        args.zapi = f"http://127.0.0.1:{portas['zapi']}"
+        _esperar(f"{args.alvo}/health", proc_backend)
+        print(f"Backend em {args.alvo}; cenários: {', '.join(args.cenario)}", flush=True)
+        resumos = asyncio.run(carga.executar(args))
+        carga.imprimir(resumos)
+        if args.saida_json:
+            with open(args.saida_json, "w", encoding="utf-8") as f:
+                json.dump(resumos, f, ensure_ascii=False, indent=2)
+    finally:
+        _encerrar(proc_backend)
+        _encerrar(proc_servicos)
+
+
+if __name__ == "__main__":
+    main()
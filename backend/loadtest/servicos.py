@@ -0,0 +1,108 @@
+"""
+Sobe os quatro serviços falsos num só processo (uvicorn, um servidor por porta) e imprime
+as variáveis de ambiente para apontar o backend para eles.
+
+Execute na pasta backend:
+    python -m loadtest.servicos [--clientes 10000] [--transacoes-por-dia 200] [--latencia-openai-ms 800]
+"""
+import argparse
+import asyncio
+import ssl
+import tempfile
+from pathlib import Path
+
+import uvicorn
+
+from loadtest import certificados, fake_openai, fake_postgrest, fake_santander, fake_zapi
+
+PORTAS_PADRAO = {"postgrest": 18801, "santander": 18802, "openai": 18803, "zapi": 18804}
+
+
+class _Servidor(uvicorn.Server):
+    # Vários servidores no mesmo loop: o Ctrl+C é tratado no main, não por cada um
+    def install_signal_handlers(self) -> None:
+        pass
+
+
+def argumentos(parser: argparse.ArgumentParser | None = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(description="Serviços falsos para o teste de carga")
+    g = parser.add_argument_group("serviços falsos")
+    g.add_argument("--clientes", type=int, default=2000, help="clientes no PostgREST falso")
+    g.add_argument("--meses-transacoes", type=int, default=3, help="meses de transações semeadas")
+    g.add_argument("--transacoes-por-dia", type=int, default=100, help="lançamentos por dia no extrato")
+    g.add_argument("--paginacao", choices=["pageable", "links"], default="pageable")
+    g.add_argument("--latencia-db-ms", type=float, default=5.0)
+    g.add_argument("--latencia-santander-ms", type=float, default=80.0)
+    g.add_argument("--latencia-openai-ms", type=float, default=800.0)
+    g.add_argument("--latencia-whisper-ms", type=float, default=1500.0)
+    g.add_argument("--taxa-429-openai", type=float, default=0.0)
+    g.add_argument("--latencia-zapi-ms", type=float, default=50.0)
+    g.add_argument("--taxa-erro-zapi", type=float, default=0.0)
+    g.add_argument("--pasta-certs", type=Path, default=None, help="onde gerar os certificados (padrão: pasta temporária)")
+    return parser
+
+
+def variaveis_backend(certs: dict[str, Path], portas: dict[str, int] = PORTAS_PADRAO) -> dict[str, str]:
+    """Ambiente que liga o backend aos serviços falsos (sem tocar em .env nem em backend/certs/)."""
+    return {
+        "SUPABASE_URL": f"http://127.0.0.1:{portas['postgrest']}",
+        "SUPABASE_KEY": "sb_secret_loadtest",
+        "SANTANDER_EXTRATO_URL": f"https://127.0.0.1:{portas['santander']}/extrato/v1",
+        "CERT_DIR": str(certs["cert_dir"]),
+        "SSL_CERT_FILE": str(certs["ca"]),
+        "OPENAI_API_KEY": "sk-loadtest",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{portas['openai']}/v1",
+        "ZAPI_BASE_URL": f"http://127.0.0.1:{portas['zapi']}/instances/loadtest/token/loadtest",
+        "ZAPI_CLIENT_TOKEN": "loadtest",
+        "ZAPI_SECURITY_TOKEN": "",
+        "API_KEY": "",
+        "WEBHOOK_DEDUPE_PERSISTENT": "false",
+        "LLM_CACHE_SQLITE_PATH": "",
+    }
+
+
+async def servir(args: argparse.Namespace, certs: dict[str, Path], portas: dict[str, int] = PORTAS_PADRAO) -> None:
+    banco = fake_postgrest.BancoFalso(args.clientes, args.meses_transacoes, args.latencia_db_ms)
+    extrato = fake_santander.ExtratoFalso(
+        banco.tabelas["clientes"],
+        transacoes_por_dia=args.transacoes_por_dia,
+        paginacao=args.paginacao,
+        latencia_ms=args.latencia_santander_ms,
+    )
+    openai = fake_openai.OpenAIFalsa(args.latencia_openai_ms, args.latencia_whisper_ms, args.taxa_429_openai)
+    zapi = fake_zapi.ZapiFalsa(args.latencia_zapi_ms, args.taxa_erro_zapi)
+    comum = {"host": "127.0.0.1", "log_level": "warning", "access_log": False, "lifespan": "off"}
+    configs = [
+        uvicorn.Config(fake_postgrest.criar_app(banco), port=portas["postgrest"], **comum),
+        uvicorn.Config(
+            fake_santander.criar_app(extrato),
+            port=portas["santander"],
+            ssl_certfile=str(certs["servidor_crt"]),
+            ssl_keyfile=str(certs["servidor_key"]),
+            ssl_ca_certs=str(certs["ca"]),
+            ssl_cert_reqs=ssl.CERT_REQUIRED,
+            **comum,
+        ),
+        uvicorn.Config(fake_openai.criar_app(openai), port=portas["openai"], **comum),
+        uvicorn.Config(fake_zapi.criar_app(zapi), port=portas["zapi"], **comum),
+    ]
+    await asyncio.gather(*(_Servidor(c).serve() for c in configs))
+
+
+def main() -> None:
+    args = argumentos().parse_args()
+    pasta = args.pasta_certs or Path(tempfile.mkdtemp(prefix="loadtest-certs-"))
+    certs = certificados.gerar(pasta)
+    print("Serviços falsos:", ", ".join(f"{n}=:{p}" for n, p in PORTAS_PADRAO.items()))
+    print("Suba o backend com:")
+    for chave, valor in variaveis_backend(certs).items():
+        print(f"  export {chave}={valor}")
+    print("  python -m uvicorn app.main:app --port 8000", flush=True)
+    try:
+        asyncio.run(servir(args, certs))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
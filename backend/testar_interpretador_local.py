@@ -0,0 +1,62 @@
+"""
+Teste do interpretador local (caminho rápido sem GPT do webhook).
+Confere o JSON das mensagens padrão e que frases ambíguas devolvem None (vão para o GPT).
+Não precisa de .env nem de rede. Rode na pasta backend: python testar_interpretador_local.py
+"""
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from app.interpretador_local import InterpretadorLocal  # noqa: E402
+
+HOJE = date(2026, 10, 17)
+
+
+def _baixa(nome_ou_documento, valor=None, data_pagamento=None):
+    return {"baixa_manual": {"nome_ou_documento": nome_ou_documento, "valor": valor, "data_pagamento": data_pagamento}}
+
+
+CASOS = [
+    ("Cadastrar cliente João Silva, CPF 123, mensalidade 500, vencimento dia 10",
+     {"cadastrar_cliente": {"nome": "João Silva", "documento_cpf_cnpj": "123", "valor_mensalidade": 500, "dia_vencimento": 10}}),
+    ("Cadastrar cliente Maria da Conceição, mensalidade 300",
+     {"cadastrar_cliente": {"nome": "Maria da Conceição", "documento_cpf_cnpj": None, "valor_mensalidade": 300, "dia_vencimento": 10}}),
+    ("baixa Maria 150", _baixa("Maria", 150)),
+    ("dar baixa no pagamento da Maria, R$ 1.500,00, ontem", _baixa("Maria", 1500, "2026-10-16")),
+    ("baixa Maria da Silva 100", _baixa("Maria da Silva", 100)),
+    ("baixa Maria 150 dia 10/10", _baixa("Maria", 150, "2026-10-10")),
+    ("baixa 123.456.789-09", _baixa("12345678909")),
+    ("Cadastrar cliente Ana Souza, CPF 12345678909, mensalidade 200",
+     {"cadastrar_cliente": {"nome": "Ana Souza", "documento_cpf_cnpj": "12345678909", "valor_mensalidade": 200, "dia_vencimento": 10}}),
+    ("Maria Silva pagou 200 reais hoje", _baixa("Maria Silva", 200, "2026-10-17")),
+    ("o cliente João pagou 150 em 12/10", _baixa("João", 150, "2026-10-12")),
+    # Sem confiança: devolve None e o webhook pergunta ao GPT
+    ("baixa Maria dia 10", None),  # dia do mês, não valor
+    ("Maria pagou dia 10", None),
+    ("Maria pagou metade", None),
+    ("Maria pagou hoje a metade", None),
+    ("baixa Maria referente outubro", None),
+    ("baixa Maria 150 referente outubro", None),
+    ("baixa João e Maria 100", None),  # dois clientes
+    ("Cadastrar cliente João Silva telefone 11999999999 mensalidade 500", None),  # telefone não é CPF
+    ("baixa Maria via pix 150", None),
+    ("baixa Ana semana passada 200", None),  # data relativa imprecisa
+    ("baixa maria 150", None),  # nome sem maiúscula: não dá para separar do resto da frase
+    ("Oi, quanto eu recebi esse mês?", None),
+]
+
+
+def main() -> int:
+    falhas = 0
+    for texto, esperado in CASOS:
+        obtido = InterpretadorLocal._interpretar(texto, HOJE)
+        if obtido != esperado:
+            falhas += 1
+            print(f"FALHOU: {texto!r}\n  esperado: {esperado}\n  obtido:   {obtido}")
+    print(f"{len(CASOS) - falhas}/{len(CASOS)} casos ok")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -47,12 +47,12 @@ def main():
             data = json.loads(raw) if raw.strip() else {}
         print(f"Status: {status}")
         print(f"Resposta: {data}")
-        if data.get("ok") and data.get("resposta"):
-            print("\n[OK] Webhook processou e gerou resposta.")
+        if data.get("ok") and "processando" in (data.get("message") or ""):
+            print("\n[OK] Webhook aceitou a mensagem; o processamento roda em segundo plano (veja os logs do backend).")
             if os.getenv("ZAPI_BASE_URL"):
-                print("ZAPI_BASE_URL está configurado: a resposta foi enviada para o WhatsApp nesse número.")
+                print("ZAPI_BASE_URL está configurado: a resposta será enviada para o WhatsApp nesse número.")
             else:
-                print("ZAPI_BASE_URL não configurado: resposta não foi enviada ao WhatsApp.")
+                print("ZAPI_BASE_URL não configurado: resposta não será enviada ao WhatsApp.")
         elif status != 200:
             print("\n[FALHA] Servidor retornou erro.")
         else:
@@ -0,0 +1,38 @@
+-- KPIs do dashboard calculados no banco: uma chamada RPC em vez de 4 selects + soma no Python.
+-- Usado por GET /api/clientes/dashboard (POST /rest/v1/rpc/dashboard_kpis).
+-- Execute no SQL Editor do Supabase.
+
+-- Contagem de notas pendentes sem varrer a tabela inteira
+CREATE INDEX IF NOT EXISTS idx_transacoes_nota_pendente
+  ON public.transacoes (id)
+  WHERE status_nota_fiscal = 'pendente';
+
+-- p_hoje vem do backend (mesma data usada no resto da API)
+CREATE OR REPLACE FUNCTION public.dashboard_kpis(p_hoje date DEFAULT current_date)
+RETURNS json
+LANGUAGE sql
+STABLE
+AS $$
+  WITH periodo AS (
+    SELECT date_trunc('month', p_hoje)::date AS inicio
+  ),
+  transacoes_mes AS (
+    SELECT t.cliente_id, t.valor
+    FROM public.transacoes t, periodo
+    WHERE t.data_pagamento BETWEEN periodo.inicio AND p_hoje
+  )
+  SELECT json_build_object(
+    'total_recebido', (SELECT coalesce(round(sum(valor), 2), 0) FROM transacoes_mes),
+    'notas_a_emitir', (SELECT count(*) FROM public.transacoes WHERE status_nota_fiscal = 'pendente'),
+    -- Ativos sem pagamento no mês cujo vencimento (dia 1-28) já passou
+    'clientes_inadimplentes', (
+      SELECT count(*)
+      FROM public.clientes c
+      WHERE c.status_ativo
+        AND extract(day FROM p_hoje) > least(coalesce(c.dia_vencimento, 28), 28)
+        AND NOT EXISTS (SELECT 1 FROM transacoes_mes tm WHERE tm.cliente_id = c.id)
+    )
+  );
+$$;
+
+COMMENT ON FUNCTION public.dashboard_kpis(date) IS 'KPIs do dashboard: total_recebido, notas_a_emitir, clientes_inadimplentes';
@@ -0,0 +1,17 @@
+-- Dedupe persistente do webhook WhatsApp: ids de mensagens já recebidas (Z-API messageId / Evolution key.id).
+-- Usada só com WEBHOOK_DEDUPE_PERSISTENT=true no backend; sobrevive a reinícios e vale entre réplicas.
+-- Execute no SQL Editor do Supabase.
+
+CREATE TABLE IF NOT EXISTS public.webhook_mensagens (
+  message_id text primary key,
+  recebido_em timestamptz not null default now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_webhook_mensagens_recebido_em ON public.webhook_mensagens (recebido_em);
+
+ALTER TABLE public.webhook_mensagens ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE public.webhook_mensagens IS 'Mensagens do webhook já processadas (evita reprocessar reenvios da Z-API)';
+
+-- Limpeza periódica sugerida (ex.: pg_cron diário):
+-- DELETE FROM public.webhook_mensagens WHERE recebido_em < now() - interval '7 days';
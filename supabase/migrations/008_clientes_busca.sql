@@ -0,0 +1,8 @@
+-- Busca de clientes por nome/documento (baixa manual pelo WhatsApp e fallback do índice em memória).
+-- pg_trgm acelera nome ILIKE '%...%'; documento_cpf_cnpj com índice comum para igualdade.
+-- Execute no SQL Editor do Supabase.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_clientes_nome_trgm ON public.clientes USING gin (nome gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_clientes_documento ON public.clientes (documento_cpf_cnpj);
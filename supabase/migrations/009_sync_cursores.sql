@@ -0,0 +1,14 @@
+-- Cursor da sincronização bancária por conta: até onde o extrato já foi processado.
+-- Permite sincronizar só o delta (com pequena sobreposição) em vez da janela inteira.
+-- Execute no SQL Editor do Supabase.
+
+CREATE TABLE IF NOT EXISTS public.sync_cursores (
+  conta text primary key,
+  ultima_data date not null,
+  ultimo_hash text,
+  atualizado_em timestamptz not null default now()
+);
+
+ALTER TABLE public.sync_cursores ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE public.sync_cursores IS 'Sincronização incremental do extrato (Santander): última data processada por conta';